@@ -7,23 +7,26 @@
 - Here, P and C are plain text and cipher text resp.
 - a, b belong to Z26 ring. Also a must be an invertible element for cipher to work.
 '''
+from __future__ import annotations
 
-from os import system
-import re
+import sys
+from typing import Iterator
+from Extras import TranslateTable, Stream, Batch, Normalize, Instrumentation, LazyImport
+np = LazyImport.module('numpy')
+EnglishStatistics = LazyImport.module('Extras.EnglishStatistics')
 
-__char_index = {chr(i+97): i for i in range(26)}
-__index_char = {i: chr(i+97) for i in range(26)}
-__inverse = {1: 1, 3: 9, 5: 21, 7: 15, 9: 3, 11: 19, 13: 13, 15: 7, 17: 23,
+__inverse = {1: 1, 3: 9, 5: 21, 7: 15, 9: 3, 11: 19, 15: 7, 17: 23,
              19: 11, 21: 5, 23: 17, 25: 25}
 
 
-def encrypt(text: str, key_a: int, key_b: int) -> str:
+def encrypt(text: str, key_a: int, key_b: int, preserve: bool = False) -> str:
     """Performs encryption on the text using key (a, b)
 
     Args:
         text (str): the plain text string to be encrypted
         key_a (int): multiplicative part of the key
         key_b (int): additive part of the key
+        preserve (bool, optional): keep the case and the non-alphabet characters in place. Defaults to False.
 
     Returns:
         str: returns cipher text on successfull encryption else returns None
@@ -32,22 +35,22 @@ def encrypt(text: str, key_a: int, key_b: int) -> str:
     if __inverse.get(key_a, None) is None:
         return None
 
-    text = list( str(re.sub(r'[^a-zA-Z]+', "", text)).lower() )
-    cipher = []
+    if preserve:
+        letters, layout = Normalize.split(text)
+        return layout.restore(encrypt(letters, key_a, key_b))
 
-    for char in text:
-        cipher.append(__index_char[(key_a * __char_index[char] + key_b) % 26])
+    with Instrumentation.call('AffineCipher.encrypt', len(text)):
+        return TranslateTable.translate(text, TranslateTable.affineTable(key_a, key_b % 26))
 
-    return ''.join(cipher)
 
-
-def decrypt(cipher: str, key_a: int, key_b: int) -> str:
+def decrypt(cipher: str, key_a: int, key_b: int, preserve: bool = False) -> str:
     """Performs affine cipher decryption on cipher text using key (a, b)
 
     Args:
         cipher (str): cipher text to be decrypted
         key_a (int): multiplicative part of the key
         key_b (int): additive part of the key
+        preserve (bool, optional): keep the case and the non-alphabet characters in place. Defaults to False.
 
     Returns:
         str: returns the plain text on successful decryption else returns None
@@ -56,47 +59,186 @@ def decrypt(cipher: str, key_a: int, key_b: int) -> str:
         print("AffineCipher: decrypt(): gcd(a, 26) = 1 condition not satisfied for the given key tuple")
         return None
 
-    text = []
-    cipher = list( str(re.sub(r'[^a-zA-Z]+', "", cipher)).lower() )
+    if preserve:
+        letters, layout = Normalize.split(cipher)
+        return layout.restore(decrypt(letters, key_a, key_b))
 
+    # P = a^-1 * (C - b) = a^-1 * C - a^-1 * b, which is itself an affine mapping of the cipher letters
+    a_inv = __inverse[key_a]
+    with Instrumentation.call('AffineCipher.decrypt', len(cipher)):
+        return TranslateTable.translate(cipher, TranslateTable.affineTable(a_inv, (-a_inv * key_b) % 26))
 
-    # we perform + 26 while subtracting key_b to ensure that modulo operation is performed 
-    # on a positive value only as adding 26 is same as adding 0 in modulo-26 addition
-    for char in cipher:
-        text += __index_char[(__inverse[key_a] *
-                              (__char_index[char] - key_b + 26)) % 26]
 
-    return ''.join(text)
+def __transformMany(texts: list[str], key_a, key_b, inverse: bool) -> list[str]:
+    # letters are mapped to a * x + b, keys of every text are expanded to every letter of the text
+    if np.isscalar(key_a) and np.isscalar(key_b):
+        if key_a not in __inverse:
+            return None
+        if inverse:
+            key_a, key_b = __inverse[key_a], -__inverse[key_a] * key_b
+        return Batch.translateMany(texts, TranslateTable.affineTable(key_a, key_b % 26))
 
+    units = np.zeros(26, dtype=np.int64)
+    units[list(__inverse.keys())] = list(__inverse.values())
+    # key_a is validated as given, like in encrypt(), before being reduced for the lookups
+    key_a = np.broadcast_to(np.asarray(key_a, dtype=np.int64), (len(texts),))
+    valid = np.isin(key_a, list(__inverse.keys()))
+    key_a = key_a % 26
+    key_b = np.broadcast_to(np.asarray(key_b, dtype=np.int64) % 26, (len(texts),))
+    if inverse:
+        key_a, key_b = units[key_a], -units[key_a] * key_b
 
-def __isCorrectKey__(isSolution: bool):
-    if isSolution:
-        exit(0)
+    indices, offsets = Batch.pack(texts)
+    a, b = Batch.perLetter(key_a, offsets).astype(np.uint16), Batch.perLetter(key_b, offsets)
+    result = Batch.unpack((indices * a + b) % 26, offsets)
 
+    # texts with a key having no inverse are not transformed
+    return [text if ok else None for (ok, text) in zip(valid.tolist(), result)]
 
-def __main__():
-    system('cls')
 
-    cipher = input("Enter Cipher Text: ").lower()
+def encrypt_many(texts: list[str], key_a: int | list[int], key_b: int | list[int]) -> list[str]:
+    """Performs affine cipher encryption on many messages at once, transforming all of them in a single pass.
+
+    Args:
+        texts (list[str]): the plain text strings to be encrypted
+        key_a (int | list[int]): multiplicative part of the key, for all the texts or one per text
+        key_b (int | list[int]): additive part of the key, for all the texts or one per text
+
+    Returns:
+        list[str]: cipher texts in the same order as the texts, None in place of the texts whose key_a has no inverse.
+        returns None if a single key_a is given without an inverse.
+    """
+    return __transformMany(texts, key_a, key_b, False)
+
+
+def decrypt_many(ciphers: list[str], key_a: int | list[int], key_b: int | list[int]) -> list[str]:
+    """Performs affine cipher decryption on many messages at once, transforming all of them in a single pass.
+
+    Args:
+        ciphers (list[str]): cipher texts to be decrypted
+        key_a (int | list[int]): multiplicative part of the key, for all the texts or one per text
+        key_b (int | list[int]): additive part of the key, for all the texts or one per text
+
+    Returns:
+        list[str]: plain texts in the same order as the texts, None in place of the texts whose key_a has no inverse.
+        returns None if a single key_a is given without an inverse.
+    """
+    return __transformMany(ciphers, key_a, key_b, True)
+
+
+def encrypt_stream(source, key_a: int, key_b: int, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Performs affine cipher encryption chunk by chunk, holding only a single chunk in memory at a time.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        key_a (int): multiplicative part of the key
+        key_b (int): additive part of the key
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str | bytes]: generator of the cipher text chunks, None if key_a is not invertible
+    """
+    if __inverse.get(key_a, None) is None:
+        return None
+
+    table = TranslateTable.affineTable(key_a, key_b % 26)
+    return Stream.pipe(source, lambda letters: letters.translate(table), chunkSize=chunkSize)
+
+
+def decrypt_stream(source, key_a: int, key_b: int, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Performs affine cipher decryption chunk by chunk, holding only a single chunk in memory at a time.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        key_a (int): multiplicative part of the key
+        key_b (int): additive part of the key
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str | bytes]: generator of the plain text chunks, None if key_a is not invertible
+    """
+    if __inverse.get(key_a, None) is None:
+        print("AffineCipher: decrypt_stream(): gcd(a, 26) = 1 condition not satisfied for the given key tuple")
+        return None
+
+    a_inv = __inverse[key_a]
+    table = TranslateTable.affineTable(a_inv, (-a_inv * key_b) % 26)
+    return Stream.pipe(source, lambda letters: letters.translate(table), chunkSize=chunkSize)
+
+
+def encrypt_file(source: str, destination: str | None, key_a: int, key_b: int, preserve: bool = False) -> int:
+    """Performs affine cipher encryption of a whole file through memory-maps, without reading it into memory.
+
+    Args:
+        source (str): path of the plain text file
+        destination (str | None): path of the cipher text file, None to encrypt the file in place (preserve mode only)
+        key_a (int): multiplicative part of the key
+        key_b (int): additive part of the key
+        preserve (bool, optional): keep the case and the non-alphabet characters in place, so that the cipher text
+        file has the same size as the plain text file. Defaults to False.
+
+    Returns:
+        int: size of the cipher text file in bytes, None if key_a is not invertible
+    """
+    if __inverse.get(key_a, None) is None:
+        return None
+
+    return TranslateTable.translateFile(source, destination, TranslateTable.affineTable(key_a, key_b % 26), preserve)
+
+
+def decrypt_file(source: str, destination: str | None, key_a: int, key_b: int, preserve: bool = False) -> int:
+    """Performs affine cipher decryption of a whole file through memory-maps, without reading it into memory.
+
+    Args:
+        source (str): path of the cipher text file
+        destination (str | None): path of the plain text file, None to decrypt the file in place (preserve mode only)
+        key_a (int): multiplicative part of the key
+        key_b (int): additive part of the key
+        preserve (bool, optional): keep the case and the non-alphabet characters in place. Defaults to False.
+
+    Returns:
+        int: size of the plain text file in bytes, None if key_a is not invertible
+    """
+    if __inverse.get(key_a, None) is None:
+        print("AffineCipher: decrypt_file(): gcd(a, 26) = 1 condition not satisfied for the given key tuple")
+        return None
+
+    a_inv = __inverse[key_a]
+    return TranslateTable.translateFile(source, destination, TranslateTable.affineTable(a_inv, (-a_inv * key_b) % 26), preserve)
+
 
-    choice = input("1: Enter Key\n2: Exhaustive Key Search\nYour Choice: ")
+def crack(cipher: str, top: int | None = None, method: str = 'chi-squared') -> list[tuple[tuple[int, int], float, str]]:
+    """Performs ciphertext-only exhaustive key search, ranking all 12 * 26 = 312 valid keys (a, b) by how english-like
+    their decryption is. Decrypting with key (a, b) maps cipher letter (a * p + b) to plain letter p, so the letter counts
+    of every decryption are a permutation of the cipher text letter counts. All the keys are scored at once from those
+    counts, and only the 'top' best keys are actually decrypted.
 
-    if choice == '1':
-        key = int(input("Enter Key: "))
-        print("Plain Text:", decrypt(cipher, key))
-    elif choice == '2':
-        for key in range(26):
-            system('clear')
-            print(key, ":", decrypt(cipher, key), '\n')
-            __isCorrectKey__(
-                input("Enter for next key or any other key to exit..."))
-    else:
-        print("Invalid Choice")
+    Args:
+        cipher (str): text to be decrypted
+        top (int | None, optional): number of best keys to return. Defaults to None, i.e., all the keys.
+        method (str, optional): 'chi-squared' or 'log-likelihood' scoring. Defaults to 'chi-squared'.
+
+    Returns:
+        list[tuple[tuple[int, int], float, str]]: ((a, b), score, plain text) tuples, best key first. Lower score is better.
+    """
+    cipher = Normalize.letters(cipher)
+    counts = EnglishStatistics.letterCounts(cipher)
+
+    # plain_counts[(a, b)][p] = counts[(a * p + b) mod 26]
+    keys = [ (a, b) for a in sorted(__inverse) for b in range(26) ]
+    key_a, key_b = np.array(keys).T
+    plain_counts = counts[(key_a[:, None] * np.arange(26)[None, :] + key_b[:, None]) % 26]
+    scores = EnglishStatistics.score(plain_counts, method)
+
+    ranking = np.argsort(scores, kind='stable')[:top]
+    return [ (keys[i], float(scores[i]), decrypt(cipher, *keys[i])) for i in ranking ]
+
+
+def __main__():
+    # non-interactive, e.g., python AffineCipher.py decrypt --key 5,8 < cipher.txt, or python AffineCipher.py crack cipher.txt
+    from Extras import CLI
+    return CLI.main(['affine'] + sys.argv[1:])
 
 
 if __name__ == "__main__":
-    # __main__()
-    text = input()
-    cipher = encrypt(text, 5, 10)
-    print(cipher)
-    print(decrypt(cipher, 5, 10))
+    sys.exit(__main__())
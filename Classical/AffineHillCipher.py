@@ -1,18 +1,20 @@
 #!/usr/bin/env python
 
 """
-- Performs Affine-Hill cipher encrytion process.
+- Performs Affine-Hill cipher encrytion and decryption process.
 - The cipher text C and plain text P are related as follows
     - C = P * L + b
     - L is the square encryption matrix of order N.
     - b is row matrix of order N.
+- Decryption is also an affine-hill mapping, P = C * L^-1 + (-b * L^-1).
+- Appending a column of ones to P gives C = [P | 1] * [[L], [b]], so the shift is fused into a single matrix multiplication.
 """
+from __future__ import annotations
 
-import numpy as np, math
-from Extras import MatrixInverse
-
-__char_index = {chr(i+97):i for i in range(26)}
-__index_char = {v:k for (k,v) in __char_index.items()}
+import math
+from typing import Iterator
+from Extras import Batch, KeyIndex, LazyImport, Normalize, Stream, TranslateTable
+np = LazyImport.module('numpy')
 
 
 def findKey(plainText: str, cipherText: str) -> tuple[list[list[int]], list[int]]:
@@ -25,12 +27,14 @@ def findKey(plainText: str, cipherText: str) -> tuple[list[list[int]], list[int]
     Returns:
         tuple[list[list[int]], list[int]]: key in a form of tuple (L, b) where y = xL + b. returns None if key is not found.
     """
-    plainText, cipherText = plainText.lower(), cipherText.lower()
+    # Converting the characters to their corresponding index values in ring Z26
+    plain_idx = Normalize.indices(plainText).astype(np.int64)
+    cipher_idx = Normalize.indices(cipherText).astype(np.int64)
     
     # key component L needs to be a sqr matrix of size m such that sqr(m) <= text length so that matrix inversion operations are possible
-    maxKeyDim = math.floor(math.sqrt(len(plainText)))
+    maxKeyDim = math.floor(math.sqrt(len(plain_idx)))
     
-    if len(plainText) != len(cipherText):
+    if len(plain_idx) != len(cipher_idx):
         print("findKey: [Error]: plain text length is not equal to cipher text")
         return None
     
@@ -38,36 +42,24 @@ def findKey(plainText: str, cipherText: str) -> tuple[list[list[int]], list[int]
     # keyDim is limited to maxKeyDim - 1 so as to be able to form 2 plain-matrices such that x1 - x2 != 0-matrix
     for keyDim in range(2, maxKeyDim):
         # two plain matrix, cipher matrix needed to implement L = (x1 - x2)^-1 * (y1 - y2)
-        plain_mat_1, cipher_mat_1 = [], []
-        plain_mat_2, cipher_mat_2 = [], []
-    
-        # forming a matrix of size keyDim from plain text and cipher text to try to decode the key
-        # the matrix has to be of size same as key dimension. also maxKeyDim^2 <= len(plainText)
-        # thus it is ensured that the loop does not access invalid memory location while accessing the list
-        for i in range(keyDim):
-            plain_mat_1.append( plainText[i*keyDim : i*keyDim + keyDim] )
-            plain_mat_2.append( plainText[i*keyDim + keyDim: i*keyDim + 2*keyDim] )     # offseted by a single row
-            cipher_mat_1.append( cipherText[i*keyDim : i*keyDim + keyDim] )
-            cipher_mat_2.append( cipherText[i*keyDim + keyDim: i*keyDim + 2*keyDim] )   # offseted by a single row
-        
-        # Converting the characters to their corresponding index values in ring Z26
-        for i in range(len(plain_mat_1)):
-            plain_mat_1[i] = list( map(lambda x: __char_index[x], plain_mat_1[i]) )
-            plain_mat_2[i] = list( map(lambda x: __char_index[x], plain_mat_2[i]) )
-            cipher_mat_1[i] = list( map(lambda x: __char_index[x], cipher_mat_1[i]) )
-            cipher_mat_2[i] = list( map(lambda x: __char_index[x], cipher_mat_2[i]) )
+        # the second matrices are offseted by a single row, (keyDim + 1) * keyDim <= maxKeyDim^2 <= len(plainText)
+        size = keyDim * keyDim
+        plain_mat_1 = plain_idx[:size].reshape(keyDim, keyDim)
+        plain_mat_2 = plain_idx[keyDim : keyDim + size].reshape(keyDim, keyDim)
+        cipher_mat_1 = cipher_idx[:size].reshape(keyDim, keyDim)
+        cipher_mat_2 = cipher_idx[keyDim : keyDim + size].reshape(keyDim, keyDim)
             
-        plain_mat_inv = MatrixInverse.inverse( (np.array(plain_mat_1) - np.array(plain_mat_2)).tolist() )
-        cipher_mat = (np.array(cipher_mat_1) - np.array(cipher_mat_2)).tolist()
+        plain_mat_inv = KeyIndex.inverse( (plain_mat_1 - plain_mat_2).tolist() )
+        cipher_mat = cipher_mat_1 - cipher_mat_2
         
         # plain matrix inverse successfully calculated so we can move ahead
         if plain_mat_inv:
-            L = ( np.array(plain_mat_inv) @ np.array(cipher_mat) ) % 26
+            L = ( np.array(plain_mat_inv) @ cipher_mat ) % 26
             
             # now using Lx + b = y (mod 26)
-            b = ( np.array(cipher_mat_1[0]) - np.array(plain_mat_1[0]) @ L ) % 26
+            b = ( cipher_mat_1[0] - plain_mat_1[0] @ L ) % 26
             
-            if MatrixInverse.inverse(L) is not None: # L is invertible over Z26 so it is valid key matrix
+            if KeyIndex.isInvertible(L): # L is invertible over Z26 so it is valid key matrix
                 return L.tolist(), b.tolist()
             
     # key not found so we return none
@@ -75,48 +67,223 @@ def findKey(plainText: str, cipherText: str) -> tuple[list[list[int]], list[int]
     return None
             
             
-def encrypt(plainText: str, L: list[list[int]], b:list[int]) -> str:
+class AffineHillKey:
+    """Affine-Hill cipher key (L, b) validated once, with L^-1 and the decryption shift precomputed.
+    Both directions are a single modular multiplication of the augmented text matrix [X | 1] with a (N+1) x N matrix.
+    """
+    __slots__ = ('L', 'b', 'L_inv', 'keyDim', '__enc_mat', '__dec_mat')
+
+    def __init__(self, L: list[list[int]], b: list[int]) -> None:
+        """
+        Args:
+            L (list[list[int]]): matrix key L to multiplied with plain text matrix
+            b (list[int]): vector key to shift the x*L product
+
+        Raises:
+            ValueError: Raises exception when b is missing, the key dimensions do not match or L is not invertible over Z26
+        """
+        if b is None:
+            raise ValueError("AffineHillKey: vector key b is required along with the matrix key L")
+        self.keyDim = len(b)
+        if self.keyDim == 0 or len(L) != self.keyDim or any(len(row) != self.keyDim for row in L):
+            raise ValueError("AffineHillKey: L must be a square matrix of the same order as b")
+        # key is not invertible over Z26 and hence cannot be used for encoding-decoding
+        if not KeyIndex.isInvertible(L):
+            raise ValueError("AffineHillKey: L is not invertible over Z26")
+
+        self.L = [[int(x) % 26 for x in row] for row in L]
+        self.b = [int(x) % 26 for x in b]
+        self.L_inv = KeyIndex.inverse(self.L)
+
+        L_inv = np.array(self.L_inv, dtype=np.int64)
+        self.__enc_mat = np.vstack( (self.L, [self.b]) ).astype(np.int64)
+        self.__dec_mat = np.vstack( (L_inv, (-np.array(self.b) @ L_inv) % 26) )
+
+    def __apply(self, indices: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        # rows of the augmented text matrix [X | 1] multiplied with [[M], [shift]] over Z26
+        text_mat = np.ones( (len(indices) // self.keyDim, self.keyDim + 1), dtype=np.int64 )
+        text_mat[:, :-1] = np.asarray(indices).reshape(-1, self.keyDim)
+        return ((text_mat @ matrix) % 26).astype(np.uint8).ravel()
+
+    def encryptArray(self, indices: np.ndarray) -> np.ndarray:
+        """Encrypts an array of index values in ring Z26, of length multiple of key dimension, to a uint8 array of index values"""
+        return self.__apply(indices, self.__enc_mat)
+
+    def decryptArray(self, indices: np.ndarray) -> np.ndarray:
+        """Decrypts an array of index values in ring Z26, of length multiple of key dimension, to a uint8 array of index values"""
+        return self.__apply(indices, self.__dec_mat)
+
+    def __translate(self, letters: bytes, matrix: np.ndarray) -> bytes:
+        indices = np.frombuffer(letters.translate(TranslateTable.LETTER_INDICES), dtype=np.uint8)
+        return self.__apply(indices, matrix).tobytes().translate(TranslateTable.INDEX_LETTERS)
+
+    def encrypt(self, plainText: str | bytes, padding: str='z') -> str | bytes:
+        """performs encryption on the text, padding it to a multiple of key dimension. Non-alphabet characters are removed.
+
+        Args:
+            plainText (str | bytes): the text to be encrypted
+            padding (str, optional): the character used to pad the last incomplete block. Defaults to 'z'.
+
+        Returns:
+            str | bytes: lower case cipher text, of the same type as plainText
+        """
+        letters = Normalize.letters(plainText.encode('ascii', 'ignore') if isinstance(plainText, str) else plainText)
+        letters += padding.lower().encode('ascii') * (-len(letters) % self.keyDim)
+        cipher = self.__translate(letters, self.__enc_mat)
+        return cipher.decode('ascii') if isinstance(plainText, str) else cipher
+
+    def decrypt(self, cipherText: str | bytes) -> str | bytes:
+        """performs decryption on the text. Non-alphabet characters are removed.
+
+        Args:
+            cipherText (str | bytes): the text to be decrypted
+
+        Raises:
+            ValueError: Raises exception when the cipher text length is not a multiple of key dimension
+
+        Returns:
+            str | bytes: lower case plain text, of the same type as cipherText
+        """
+        letters = Normalize.letters(cipherText.encode('ascii', 'ignore') if isinstance(cipherText, str) else cipherText)
+        if len(letters) % self.keyDim != 0:
+            raise ValueError("AffineHillKey: cipher text length is not a multiple of key dimension")
+        plain = self.__translate(letters, self.__dec_mat)
+        return plain.decode('ascii') if isinstance(cipherText, str) else plain
+
+    def encrypt_many(self, plainTexts: list[str], padding: str='z') -> list[str]:
+        """Encrypts many messages at once. Every message is padded on its own, and all of them are
+        concatenated so that a single matrix multiplication encrypts all the messages.
+
+        Args:
+            plainTexts (list[str]): the messages to be encrypted
+            padding (str, optional): the character used to pad the last incomplete block of each message. Defaults to 'z'.
+
+        Returns:
+            list[str]: lower case cipher texts, in the same order as the messages
+        """
+        indices, offsets = Batch.pack(plainTexts)
+        indices, offsets = Batch.pad(indices, offsets, self.keyDim, ord(padding.lower()) - 97)
+        return Batch.unpack(self.encryptArray(indices), offsets)
+
+    def decrypt_many(self, cipherTexts: list[str]) -> list[str]:
+        """Decrypts many messages at once, using a single matrix multiplication for all the messages.
+
+        Args:
+            cipherTexts (list[str]): the messages to be decrypted
+
+        Raises:
+            ValueError: Raises exception when the length of any message is not a multiple of key dimension
+
+        Returns:
+            list[str]: lower case plain texts, in the same order as the messages
+        """
+        indices, offsets = Batch.pack(cipherTexts)
+        if np.any(offsets % self.keyDim):
+            raise ValueError("AffineHillKey: cipher text length is not a multiple of key dimension")
+        return Batch.unpack(self.decryptArray(indices), offsets)
+
+
+def encrypt(plainText: str, L: list[list[int]] | AffineHillKey, b: list[int] | None = None) -> str:
     """performs affine-hill cipher encryption process on given cipher text
 
     Args:
         plainText (str): plain text to be encrypted
-        L (list[list[int]]): matrix key L to multiplied with plain text matrix
-        b (list[int]): vector key to shift the x*L product
+        L (list[list[int]] | AffineHillKey): matrix key L to multiplied with plain text matrix, or an AffineHillKey
+        b (list[int] | None, optional): vector key to shift the x*L product, not needed with an AffineHillKey
 
     Returns:
         str: cipher text is returned in case successful encryption else returns None
     """
-    keyDim = len(b)
-    # replacing any non-alphabetic characters with empty string
-    plainText = plainText.replace(r'[^a-zA-Z]+','')
-    
-    # basic checks to ensure valid key-dimensions
-    if len(L) != keyDim:
-        return
-    for row in L:
-        if len(row) != keyDim:
-            return
-    # key is not invertible over Z26 and hence cannot be used for encoding-decoding
-    if MatrixInverse.inverse(L) is None:
-        return
-    
-    #padding plaintext with letter z to ensure that it can be converted to a matrix    
-    while len(plainText) % keyDim != 0:
-        plainText += "z"
-        
-    plain_mat = []
-    # converting plain text to plainText matrix in corresponding Z26 values
-    for i in range(len(plainText)//keyDim):
-        temp = plainText[ i*keyDim : i*keyDim + keyDim ]
-        plain_mat.append( list( map(lambda x: __char_index[x], temp) ) )
-    
-    cipher_mat = ( np.array(plain_mat) @ np.array(L) + np.array(b) ) % 26
-    
-    if cipher_mat is None: # never possible condition
+    # basic checks to ensure valid key-dimensions, and that key is invertible over Z26 to be used for encoding-decoding
+    try:
+        key = L if isinstance(L, AffineHillKey) else AffineHillKey(L, b)
+    except ValueError:
         return None
-    
-    cipher_mat = [ "".join(list(map(lambda x: __index_char[x], row))) for row in cipher_mat ]
-    return "".join(cipher_mat)
+
+    #padding plaintext with letter z to ensure that it can be converted to a matrix
+    return key.encrypt(plainText)
+
+
+def decrypt(cipherText: str, L: list[list[int]] | AffineHillKey, b: list[int] | None = None) -> str:
+    """performs affine-hill cipher decryption process on given cipher text
+
+    Args:
+        cipherText (str): cipher text to be decrypted
+        L (list[list[int]] | AffineHillKey): matrix key L used during encryption, or an AffineHillKey
+        b (list[int] | None, optional): vector key b used during encryption, not needed with an AffineHillKey
+
+    Returns:
+        str: plain text is returned in case successful decryption else returns None
+    """
+    try:
+        key = L if isinstance(L, AffineHillKey) else AffineHillKey(L, b)
+        return key.decrypt(cipherText)
+    except ValueError:
+        return None
+
+
+def __blockStream(source, process, keyDim: int, padding: bytes | None, chunkSize: int) -> Iterator[str | bytes]:
+    # carries the letters of an incomplete block at the end of a chunk over to the next chunk
+    partial = [b""]
+
+    def transform(letters: bytes) -> bytes:
+        letters = partial[0] + letters
+        end = len(letters) - len(letters) % keyDim
+        partial[0] = letters[end:]
+        return process(letters[:end])
+
+    def flush() -> bytes:
+        if not partial[0]:
+            return b""
+        if padding is None:
+            raise ValueError("AffineHillCipher: decrypt_stream(): cipher text length is not a multiple of key dimension")
+        return process(partial[0] + padding * (keyDim - len(partial[0])))
+
+    return Stream.pipe(source, transform, flush, chunkSize)
+
+
+def encrypt_stream(source, L: list[list[int]] | AffineHillKey, b: list[int] | None = None, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """performs affine-hill cipher encryption chunk by chunk, holding only a single chunk in memory at a time.
+    The last incomplete block is padded with letter z.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        L (list[list[int]] | AffineHillKey): matrix key L to multiplied with plain text matrix, or an AffineHillKey
+        b (list[int] | None, optional): vector key to shift the x*L product, not needed with an AffineHillKey
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str | bytes]: generator of the cipher text chunks, None if the key is not valid
+    """
+    try:
+        key = L if isinstance(L, AffineHillKey) else AffineHillKey(L, b)
+    except ValueError:
+        return None
+
+    return __blockStream(source, key.encrypt, key.keyDim, b"z", chunkSize)
+
+
+def decrypt_stream(source, L: list[list[int]] | AffineHillKey, b: list[int] | None = None, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """performs affine-hill cipher decryption chunk by chunk, holding only a single chunk in memory at a time.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        L (list[list[int]] | AffineHillKey): matrix key L used during encryption, or an AffineHillKey
+        b (list[int] | None, optional): vector key b used during encryption, not needed with an AffineHillKey
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Raises:
+        ValueError: raised at the end of the stream if the cipher text length is not a multiple of key dimension
+
+    Returns:
+        Iterator[str | bytes]: generator of the plain text chunks, None if the key is not valid
+    """
+    try:
+        key = L if isinstance(L, AffineHillKey) else AffineHillKey(L, b)
+    except ValueError:
+        return None
+
+    return __blockStream(source, key.decrypt, key.keyDim, None, chunkSize)
       
 
 def __main__():
@@ -132,6 +299,7 @@ def __main__():
     print()
     print("encrypted:", encrypt("adisplayedequation", L, m))
     print("expected:  DSRMSIOPLXLJBZULLM")
+    print("decrypted:", decrypt("dsrmsioplxljbzullm", L, m))
     
     
 if __name__ == "__main__":
@@ -2,84 +2,236 @@
 '''
 Encryption and Decryption functions for AutoKey-Cipher given the key is known.
 '''
+from __future__ import annotations
 
-from os import system
-import re
-
-__char_index = {chr(i+97):i for i in range(26)}
-__index_char = {i:chr(i+97) for i in range(26)}
+import sys
+from typing import Iterator
+from Extras import Stream, Batch, Normalize, Instrumentation, LazyImport
+np = LazyImport.module('numpy')
+EnglishStatistics = LazyImport.module('Extras.EnglishStatistics')
         
         
-def encrypt(text: str, key: int) -> str:
+def encrypt(text: str, key: int, preserve: bool = False) -> str:
     """Performs encryption on the text "text" using seed key "key". The function replaces any character outside of a-z A-Z with a blank string ("")
 
     Args:
         text (str): plain text to be encryted
         key (int): key used to perform encrytion
+        preserve (bool, optional): keep the case and the non-alphabet characters in place. Defaults to False.
 
     Returns:
         str: returns cipher text on successful encryption else returns None
     """
-    text = list( re.sub(r'[^a-zA-Z]+', "", text).lower() )
-    cipher = []
-    
-    # encoding first character with the key
-    cipher += __index_char[(__char_index[text[0]] + key) % 26]
-    
-    for i in range(1, len(text)):
-        # encoding ith character with (i-1)th character
-        cipher += __index_char[(__char_index[text[i]] + __char_index[text[i-1]]) % 26]
-        
-    return ''.join(cipher)
+    if preserve:
+        letters, layout = Normalize.split(text)
+        return layout.restore(encrypt(letters, key))
+
+    with Instrumentation.call('AutoKeyCipher.encrypt', len(text)) as call:
+        with call.stage('normalize'):
+            plain = Normalize.indices(text)
+        if len(plain) == 0:
+            return ""
+
+        # encoding ith character with (i-1)th character, first character with the key
+        with call.stage('transform'):
+            shift = np.empty_like(plain)
+            shift[0], shift[1:] = key % 26, plain[:-1]
+            cipher = (plain + shift) % 26
+        with call.stage('output'):
+            return __toText(cipher)
+
 
+def __alternatingChain(cipher: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """The chain p[i] = c[i] - p[i-1] with p[-1] = k unrolls to the alternating sum
+    p[i] = (-1)^i * (sum_{j<=i} (-1)^j * c[j]) - (-1)^i * k, i.e., p = chain - sign * k (mod 26).
+    So the dependency of every decrypted letter on the seed key is known without the sequential loop.
+
+    Args:
+        cipher (np.ndarray): index values of the cipher text letters
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (chain, sign) arrays of the same length as cipher
+    """
+    sign = np.ones(len(cipher), dtype=np.int64)
+    sign[1::2] = -1
+    chain = sign * np.cumsum(sign * cipher.astype(np.int64)) % 26
+    return chain, sign
 
-def decrypt(cipher: str, key: int) -> str:
+
+def __toText(indices: np.ndarray) -> str:
+    return (indices + 97).astype(np.uint8).tobytes().decode('ascii')
+
+
+def decrypt(cipher: str, key: int, preserve: bool = False) -> str:
     """Performs decryption on the text "cipher" using seed key "key". The function replaces any character outside of a-z A-Z with a blank string ("")
 
     Args:
         text (str): cipher text to be decryted
         key (int): key used to perform decrytion
+        preserve (bool, optional): keep the case and the non-alphabet characters in place. Defaults to False.
 
     Returns:
         str: returns plain text on successful decryption else returns None
     """
-    text = []
-    cipher = list( re.sub(r'[^a-zA-Z]+', "", cipher).lower() )
-
-    
-    # decoding first character with the key
-    text += __index_char[(__char_index[cipher[0]] - key) % 26]
-    
-    for i in range(1, len(cipher)):
-        # decoding ith character with (i-1)th character
-        text += __index_char[(__char_index[cipher[i]] - __char_index[text[-1]]) % 26]
-        
-    return ''.join(text)
-        
-        
-def __isCorrectKey__(isSolution: bool):
-    if isSolution:
-        exit(0)
-   
- 
+    if preserve:
+        letters, layout = Normalize.split(cipher)
+        return layout.restore(decrypt(letters, key))
+
+    with Instrumentation.call('AutoKeyCipher.decrypt', len(cipher)) as call:
+        with call.stage('normalize'):
+            indices = Normalize.indices(cipher)
+        with call.stage('transform'):
+            chain, sign = __alternatingChain(indices)
+            plain = (chain - sign * key) % 26
+        with call.stage('output'):
+            return __toText(plain)
+
+
+def decrypt_all_keys(cipher: str) -> list[str]:
+    """Decrypts the cipher text with each of the 26 seed keys in a single pass over the text.
+
+    Args:
+        cipher (str): cipher text to be decrypted
+
+    Returns:
+        list[str]: the 26 decryptions, the decryption with seed key k at index k
+    """
+    chain, sign = __alternatingChain(Normalize.indices(cipher))
+
+    # row k is the decryption with seed key k
+    plain = (chain[None, :] - sign[None, :] * np.arange(26)[:, None]) % 26
+    return [ __toText(row) for row in plain ]
+
+
+def crack(cipher: str, top: int | None = None, method: str = 'chi-squared') -> list[tuple[int, float, str]]:
+    """Recovers the seed key from the cipher text alone, ranking all 26 seed keys by how english-like their decryption is.
+    Letters at even positions decrypt to chain - k and letters at odd positions to chain + k, so the letter counts of
+    every decryption are computed from the counts of the chain at even and odd positions, without decrypting the text.
+
+    Args:
+        cipher (str): cipher text to be decrypted
+        top (int | None, optional): number of best keys to return. Defaults to None, i.e., all the keys.
+        method (str, optional): 'chi-squared' or 'log-likelihood' scoring. Defaults to 'chi-squared'.
+
+    Returns:
+        list[tuple[int, float, str]]: (key, score, plain text) tuples, best key first. Lower score is better.
+    """
+    chain, sign = __alternatingChain(Normalize.indices(cipher))
+    even_counts = np.bincount(chain[0::2], minlength=26)
+    odd_counts = np.bincount(chain[1::2], minlength=26)
+
+    # plain_counts[k][p] = even_counts[(p + k) mod 26] + odd_counts[(p - k) mod 26]
+    keys, letters = np.arange(26)[:, None], np.arange(26)[None, :]
+    plain_counts = even_counts[(letters + keys) % 26] + odd_counts[(letters - keys) % 26]
+    scores = EnglishStatistics.score(plain_counts, method)
+
+    ranking = np.argsort(scores, kind='stable')[:top]
+    return [ (int(key), float(scores[key]), __toText((chain - sign * key) % 26)) for key in ranking ]
+
+
+def encrypt_many(texts: list[str], key: int | list[int]) -> list[str]:
+    """Performs autokey encryption on many messages at once, in a single pass over all of them.
+    Every letter is shifted by the previous letter of its own message, the first letter of a message by its seed key.
+
+    Args:
+        texts (list[str]): plain texts to be encrypted
+        key (int | list[int]): seed key for all the texts, or one seed key per text
+
+    Returns:
+        list[str]: cipher texts, in the same order as the texts
+    """
+    indices, offsets = Batch.pack(texts)
+    previous = np.empty(len(indices), dtype=np.uint8)
+    previous[1:] = indices[:-1]
+
+    # the first letter of every non-empty message follows the seed key instead of the previous message
+    nonEmpty = np.diff(offsets) > 0
+    keys = np.broadcast_to(np.asarray(key, dtype=np.int64) % 26, (len(texts),))
+    previous[offsets[:-1][nonEmpty]] = keys[nonEmpty]
+    return Batch.unpack((indices + previous) % 26, offsets)
+
+
+def decrypt_many(ciphers: list[str], key: int | list[int]) -> list[str]:
+    """Performs autokey decryption on many messages at once, in a single pass over all of them.
+    The alternating sum of __alternatingChain() restarts at every message, by subtracting the running sum before the message.
+
+    Args:
+        ciphers (list[str]): cipher texts to be decrypted
+        key (int | list[int]): seed key for all the texts, or one seed key per text
+
+    Returns:
+        list[str]: plain texts, in the same order as the texts
+    """
+    indices, offsets = Batch.pack(ciphers)
+    lengths = np.diff(offsets)
+
+    # sign alternates from +1 at the first letter of every message
+    position = np.arange(len(indices)) - np.repeat(offsets[:-1], lengths)
+    sign = 1 - 2 * (position % 2)
+    total = np.concatenate( ([0], np.cumsum(sign * indices.astype(np.int64))) )
+    running = total[1:] - np.repeat(total[offsets[:-1]], lengths)
+
+    plain = sign * (running - Batch.perLetter(key, offsets)) % 26
+    return Batch.unpack(plain, offsets)
+
+
+def encrypt_stream(source, key: int, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Performs autokey encryption chunk by chunk, holding only a single chunk in memory at a time.
+    The last plain text letter of each chunk is carried over to encode the first letter of the next chunk.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        key (int): seed key used to encode the very first letter
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str | bytes]: generator of the cipher text chunks
+    """
+    previous = [key % 26]   # index of the previous plain text letter
+
+    def transform(letters: bytes) -> bytes:
+        if not letters:
+            return b""
+        plain = np.frombuffer(letters, dtype=np.uint8) - 97
+        # ith character is encoded with (i-1)th character, first one with the letter carried from previous chunk
+        shift = np.empty_like(plain)
+        shift[0], shift[1:] = previous[0], plain[:-1]
+        previous[0] = plain[-1]
+        return ((plain + shift) % 26 + 97).astype(np.uint8).tobytes()
+
+    return Stream.pipe(source, transform, chunkSize=chunkSize)
+
+
+def decrypt_stream(source, key: int, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Performs autokey decryption chunk by chunk, holding only a single chunk in memory at a time.
+    The last decrypted letter of each chunk is carried over to decode the first letter of the next chunk.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        key (int): seed key used to decode the very first letter
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str | bytes]: generator of the plain text chunks
+    """
+    previous = [key % 26]   # index of the previous decrypted letter
+
+    def transform(letters: bytes) -> bytes:
+        if not letters:
+            return b""
+        chain, sign = __alternatingChain(EnglishStatistics.letterIndices(letters))
+        plain = (chain - sign * previous[0]) % 26
+        previous[0] = int(plain[-1])
+        return (plain + 97).astype(np.uint8).tobytes()
+
+    return Stream.pipe(source, transform, chunkSize=chunkSize)
+
+
 def __main__():
-    system('cls')
-    
-    cipher = input("Enter Cipher Text: ").lower()
-
-    choice = input("1: Enter Key\n2: Exhaustive Key Search\nYour Choice: ")
-    
-    if choice == '1':
-        key = int(input("Enter Key: "))
-        print("Plain Text:", decrypt(cipher, key))
-    elif choice == '2':
-        for key in range(26):
-            system('clear')
-            print(key, ":", decrypt(cipher, key),'\n')
-            __isCorrectKey__(input("Enter for next key or any other key to exit..."))
-    else:
-        print("Invalid Choice")
-        
-        
+    # non-interactive, e.g., python AutoKeyCipher.py decrypt --key 3 < cipher.txt, or python AutoKeyCipher.py crack cipher.txt
+    from Extras import CLI
+    return CLI.main(['autokey'] + sys.argv[1:])
+
+
 if __name__ == "__main__":
-    __main__()
\ No newline at end of file
+    sys.exit(__main__())
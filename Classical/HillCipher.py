@@ -4,16 +4,23 @@
 Performs Hill Cipher encryption, decryption operation given the key is known.
 Can also determine the key if plain text and corresponding cipher text is known.
 - The realtion between plain text matrix P, cipher text matrix C, and key k is C = P * k or P = C * inv(k)
+- Column j of the plain text matrix depends only on column j of inv(k), i.e., P[:, j] = C * inv(k)[:, j].
+So, without any known plain text, every column of inv(k) can be searched independently.
 '''
-import numpy as np, math
-from Extras import MatrixInverse
-
-__char_index = {chr(i+97):i for i in range(26)}
-__index_char = {v:k for (k,v) in __char_index.items()}
+from __future__ import annotations
+import math
+from itertools import permutations
+from typing import Iterator
+from Extras import Batch, Instrumentation, KeyIndex, LazyImport, MatrixInverse, Normalize, Stream, TranslateTable
+np = LazyImport.module('numpy')
+EnglishStatistics = LazyImport.module('Extras.EnglishStatistics')
 
 
 def findKey(plainText: str, cipherText: str) -> list[list[int]]:
     """Attempts to find the key for the given plain-Text and Cipher-Text pair.
+    For every key dimension, all the block aligned windows of the texts are used as equations of C = P * k,
+    and the system is solved over Z26 (over Z2 and Z13, combined with CRT), so the key is found as long as
+    any keyDim of the plain text blocks are independent, not just the first ones.
 
     Args:
         plainText (str): The plain text string
@@ -22,50 +29,277 @@ def findKey(plainText: str, cipherText: str) -> list[list[int]]:
     Returns:
         list[list[int]]: returns the key if the plainText-cipherText pair is valid pair of appropriate length.
     """
+    # Converting the characters to their corresponding index values in ring Z26
+    plain_idx = Normalize.indices(plainText).astype(np.int64)
+    cipher_idx = Normalize.indices(cipherText).astype(np.int64)
     
-    # key needs to be a sqr matrix of size m such that sqr(m) <= text length so that matrix inversion operations are possible
-    maxKeyDim = math.floor(math.sqrt(len(plainText)))
-    
-    if len(plainText) != len(cipherText):
+    if len(plain_idx) != len(cipher_idx):
         print("findKey: [Error]: plain text length is not equal to cipher text")
         return None
+
+    # key needs to be a sqr matrix of size m such that sqr(m) <= text length so that there are at least m equations
+    maxKeyDim = math.floor(math.sqrt(len(plain_idx)))
     
     for keyDim in range(2, maxKeyDim + 1): # key dimension can be starting from 2 to maxKeyDim
         
-        plain_mat, cipher_mat = [], []
-        
-        # forming a matrix of size keyDim from plain text and cipher text to try to decode the key
-        # the matrix has to be of size same as key dimension. also maxKeyDim^2 <= len(plainText)
-        # thus it is ensured that the loop does not access invalid memory location while accessing the list
-        for i in range(keyDim):
-            plain_mat.append( plainText[i*keyDim : i*keyDim+keyDim] )
-            cipher_mat.append( cipherText[i*keyDim : i*keyDim+keyDim] )
-        
-        
-        # Converting the characters to their corresponding index values in ring Z26
-        for i in range(len(plain_mat)):
-            plain_mat[i] = list( map(lambda x: __char_index[x], plain_mat[i]) )
-            cipher_mat[i] = list( map(lambda x: __char_index[x], cipher_mat[i]) )
-        
-        # calculating plainText matrix inverse over ring Z26
-        plain_mat_inv = MatrixInverse.inverse(plain_mat)
-        
-        # plain matrix inverse was calculated successfully, so we can get the key
-        if plain_mat_inv:
-            key = np.array(plain_mat_inv) @ np.array(cipher_mat) % 26
-            return np.round_(key).astype(int).tolist()
+        # every block aligned window of the texts forms one row of the plain text and cipher text matrices
+        rows = len(plain_idx) // keyDim
+        plain_mat = plain_idx[: rows * keyDim].reshape(rows, keyDim)
+        cipher_mat = cipher_idx[: rows * keyDim].reshape(rows, keyDim)
+
+        # the solution satisfies every row, i.e., it is verified against the full text
+        key = MatrixInverse.solve(plain_mat, cipher_mat)
+
+        # the key must also be invertible for the cipher text to be decryptable
+        if key is not None and KeyIndex.isInvertible(key):
+            return key
         
     # key not found so we return none
     # this can be because the text was not long enough or the plainText - cipherText pair provided was invalid
     return None
 
 
-def encrypt(plainText: str, key: list[list[int]], padding:str='z') -> str:
+# number of candidate column vectors of the inverse key decrypted together, bounds the memory used by crack()
+__VECTOR_BATCH = 1 << 22
+
+
+def __scoreVectors(cipher_mat: np.ndarray, start: int, stop: int) -> np.ndarray:
+    # unigram chi-squared score of the plain text column decrypted by every candidate column vector with code in [start, stop)
+    # the code of the vector v is its base 26 value, i.e., v[0]*26^(n-1) + ... + v[n-1]
+    keyDim = cipher_mat.shape[1]
+    batch = max(1, __VECTOR_BATCH // len(cipher_mat))
+    powers = 26 ** np.arange(keyDim - 1, -1, -1)
+    scores = np.empty(stop - start)
+
+    for begin in range(start, stop, batch):
+        codes = np.arange(begin, min(begin + batch, stop))
+        vectors = codes[:, None] // powers % 26
+        columns = (vectors @ cipher_mat.T) % 26
+        counts = np.bincount((columns + 26 * np.arange(len(codes))[:, None]).ravel(), minlength=26 * len(codes)).reshape(-1, 26)
+        scores[begin - start: begin - start + len(codes)] = EnglishStatistics.chiSquared(counts)
+
+    return scores
+
+
+def crack(cipherText: str, keyDim: int=2, top: int=10, candidates: int=20, workers: int=1) -> list[tuple[list[list[int]], float, str]]:
+    """Performs ciphertext-only attack, ranking the keys of order keyDim by how english-like their decryption is.
+    - every column vector of the inverse key is tried, scoring the plain text column it decrypts with letter frequencies.
+    Vectors whose entries are all even or all multiples of 13 cannot be part of an invertible matrix and are skipped.
+    - the best 'candidates' vectors are arranged into inverse keys, and the invertible ones are scored on the complete
+    decryption using bigram frequencies.
+    - the search over the 26^keyDim vectors can be sharded across a process pool for the larger key dimensions.
+
+    Args:
+        cipherText (str): the text string to be decrypted
+        keyDim (int, optional): order of the key matrix. Defaults to 2.
+        top (int, optional): number of best keys to return. Defaults to 10.
+        candidates (int, optional): number of best column vectors combined into keys. Defaults to 20.
+        workers (int, optional): number of processes to search the column vectors with. Defaults to 1.
+
+    Returns:
+        list[tuple[list[list[int]], float, str]]: (key, score, plain text) tuples, best key first. Lower score is better.
+    """
+    # only the letters are decrypted, whitespace such as a trailing newline does not count
+    indices = Normalize.indices(cipherText)
+    if len(indices) == 0 or len(indices) % keyDim != 0:
+        print("crack: [Error]: number of letters in the cipher text is not a multiple of key dimension")
+        return None
+
+    cipher_mat = indices.astype(np.intp).reshape(-1, keyDim)
+    space = 26 ** keyDim
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        bounds = np.linspace(0, space, workers + 1).astype(int)
+        with ProcessPoolExecutor(workers) as pool:
+            scores = np.concatenate(list(pool.map(__scoreVectors, [cipher_mat] * workers, bounds[:-1], bounds[1:])))
+    else:
+        scores = __scoreVectors(cipher_mat, 0, space)
+
+    # a column with a common factor with 26 in all its entries makes the determinant share the factor
+    powers = 26 ** np.arange(keyDim - 1, -1, -1)
+    vectors = np.arange(space)[:, None] // powers % 26
+    usable = (np.bitwise_or.reduce(vectors % 2, axis=1) == 1) & ((vectors % 13).any(axis=1))
+    scores[~usable] = np.inf
+    best = np.argsort(scores, kind='stable')[:candidates]
+    best = best[np.isfinite(scores[best])]
+
+    # decrypted plain text column of each of the best vectors
+    columns = (vectors[best] @ cipher_mat.T) % 26
+
+    # every ordered choice of keyDim distinct vectors forms the columns of an inverse key
+    choices = np.array(list(permutations(range(len(best)), keyDim)), dtype=np.intp).reshape(-1, keyDim)
+    inverses = vectors[best][choices].transpose(0, 2, 1)
+    invertible = KeyIndex.invertibleBatch(inverses)
+    choices, inverses = choices[invertible], inverses[invertible]
+
+    # plain text of each choice, read row-wise from its columns
+    plains = columns[choices].transpose(0, 2, 1).reshape(len(choices), -1)
+    ranking = -EnglishStatistics.bigramLogLikelihood(plains)
+    order = np.argsort(ranking, kind='stable')[:top]
+
+    results = []
+    for i in order:
+        key = KeyIndex.inverse(inverses[i].tolist())
+        plainText = (plains[i] + 97).astype(np.uint8).tobytes().decode('ascii')
+        results.append( (key, float(ranking[i]), plainText) )
+    return results
+
+
+def bruteForce(cipherText: str, keyDim: int=2, top: int=10) -> list[tuple[list[list[int]], float, str]]:
+    """Performs exhaustive ciphertext-only attack, decrypting the text with every invertible inverse key of order keyDim
+    taken from the KeyIndex, so the singular matrices are never tried, and ranking the decryptions with bigram frequencies.
+    Unlike crack(), the best key cannot be missed, but only key dimensions up to KeyIndex.MAX_DIMENSION are searched.
+
+    Args:
+        cipherText (str): the text string to be decrypted
+        keyDim (int, optional): order of the key matrix, at most KeyIndex.MAX_DIMENSION. Defaults to 2.
+        top (int, optional): number of best keys to return. Defaults to 10.
+
+    Returns:
+        list[tuple[list[list[int]], float, str]]: (key, score, plain text) tuples, best key first. Lower score is better.
+    """
+    if not 0 < keyDim <= KeyIndex.MAX_DIMENSION:
+        print(f"bruteForce: [Error]: key dimension must be from 1 to {KeyIndex.MAX_DIMENSION}, use crack() for larger keys")
+        return None
+    indices = Normalize.indices(cipherText)
+    if len(indices) == 0 or len(indices) % keyDim != 0:
+        print("bruteForce: [Error]: number of letters in the cipher text is not a multiple of key dimension")
+        return None
+
+    cipher_mat = indices.astype(np.intp).reshape(-1, keyDim)
+    # plain text column decrypted by every column vector, the columns of an inverse key are looked up by their codes
+    powers = 26 ** np.arange(keyDim - 1, -1, -1)
+    columns = ((np.arange(26 ** keyDim)[:, None] // powers % 26) @ cipher_mat.T) % 26
+    inverses = KeyIndex.keys(keyDim)
+    batch = max(1, __VECTOR_BATCH // cipher_mat.size)
+
+    ranking = np.empty(len(inverses))
+    for begin in range(0, len(inverses), batch):
+        codes = inverses[begin: begin + batch].astype(np.intp).transpose(0, 2, 1) @ powers
+        plains = columns[codes].transpose(0, 2, 1).reshape(len(codes), -1)
+        ranking[begin: begin + len(codes)] = -EnglishStatistics.bigramLogLikelihood(plains)
+    order = np.argsort(ranking, kind='stable')[:top]
+
+    results = []
+    for i in order:
+        plain = (cipher_mat @ inverses[i]) % 26
+        plainText = (plain.ravel() + 97).astype(np.uint8).tobytes().decode('ascii')
+        results.append( (KeyIndex.inverse(inverses[i].tolist()), float(ranking[i]), plainText) )
+    return results
+
+
+class HillKey:
+    """Hill cipher key validated and inverted once, to encrypt and decrypt any number of texts.
+    The text is converted to a matrix of index values with a byte translation, multiplied with the key
+    (or its inverse) as a whole, and translated back to letters, without any per-character python code.
+    """
+    __slots__ = ('key', 'inverse', 'keyDim', '__key_mat', '__inv_mat')
+
+    def __init__(self, key: list[list[int]]) -> None:
+        """
+        Args:
+            key (list[list[int]]): the square encryption key matrix
+
+        Raises:
+            ValueError: Raises exception when the key is not a square matrix or is not invertible over Z26
+        """
+        self.keyDim = len(key)
+        if self.keyDim == 0 or any(len(row) != self.keyDim for row in key):
+            raise ValueError("HillKey: key must be a non-empty square matrix")
+        if not KeyIndex.isInvertible(key):
+            raise ValueError("HillKey: key is not invertible over Z26")
+
+        self.key = [[int(x) % 26 for x in row] for row in key]
+        self.inverse = KeyIndex.inverse(self.key)
+        self.__key_mat = np.array(self.key, dtype=np.int64)
+        self.__inv_mat = np.array(self.inverse, dtype=np.int64)
+
+    @staticmethod
+    def __multiply(letters: bytes, matrix: np.ndarray, call: Instrumentation.Call | Instrumentation.NullCall) -> bytes:
+        # letters form the rows of the text matrix, which is multiplied with the matrix over Z26
+        with call.stage('transform'):
+            text_mat = np.frombuffer(letters.translate(TranslateTable.LETTER_INDICES), dtype=np.uint8).reshape(-1, len(matrix))
+            text_mat = (text_mat @ matrix) % 26
+        with call.stage('output'):
+            return text_mat.astype(np.uint8).tobytes().translate(TranslateTable.INDEX_LETTERS)
+
+    def encrypt(self, plainText: str | bytes, padding: str='z') -> str | bytes:
+        """performs encryption on the text, padding it to a multiple of key dimension. Non-alphabet characters are removed.
+
+        Args:
+            plainText (str | bytes): the text to be encrypted
+            padding (str, optional): the character used to pad the last incomplete block. Defaults to 'z'.
+
+        Returns:
+            str | bytes: lower case cipher text, of the same type as plainText
+        """
+        with Instrumentation.call('HillKey.encrypt', len(plainText)) as call:
+            with call.stage('normalize'):
+                letters = Normalize.letters(plainText.encode('ascii', 'ignore') if isinstance(plainText, str) else plainText)
+                letters += padding.lower().encode('ascii') * (-len(letters) % self.keyDim)
+            cipher = self.__multiply(letters, self.__key_mat, call)
+            return cipher.decode('ascii') if isinstance(plainText, str) else cipher
+
+    def decrypt(self, cipherText: str | bytes) -> str | bytes:
+        """performs decryption on the text. Non-alphabet characters are removed.
+
+        Args:
+            cipherText (str | bytes): the text to be decrypted
+
+        Raises:
+            ValueError: Raises exception when the cipher text length is not a multiple of key dimension
+
+        Returns:
+            str | bytes: lower case plain text, of the same type as cipherText
+        """
+        with Instrumentation.call('HillKey.decrypt', len(cipherText)) as call:
+            with call.stage('normalize'):
+                letters = Normalize.letters(cipherText.encode('ascii', 'ignore') if isinstance(cipherText, str) else cipherText)
+            if len(letters) % self.keyDim != 0:
+                raise ValueError("HillKey: cipher text length is not a multiple of key dimension")
+            plain = self.__multiply(letters, self.__inv_mat, call)
+            return plain.decode('ascii') if isinstance(cipherText, str) else plain
+
+    def encrypt_many(self, plainTexts: list[str], padding: str='z') -> list[str]:
+        """Encrypts many messages at once. Every message is padded on its own, and all of them are
+        concatenated so that a single matrix multiplication encrypts all the messages.
+
+        Args:
+            plainTexts (list[str]): the messages to be encrypted
+            padding (str, optional): the character used to pad the last incomplete block of each message. Defaults to 'z'.
+
+        Returns:
+            list[str]: lower case cipher texts, in the same order as the messages
+        """
+        indices, offsets = Batch.pack(plainTexts)
+        indices, offsets = Batch.pad(indices, offsets, self.keyDim, ord(padding.lower()) - 97)
+        return Batch.unpack((indices.reshape(-1, self.keyDim) @ self.__key_mat % 26).ravel(), offsets)
+
+    def decrypt_many(self, cipherTexts: list[str]) -> list[str]:
+        """Decrypts many messages at once, using a single matrix multiplication for all the messages.
+
+        Args:
+            cipherTexts (list[str]): the messages to be decrypted
+
+        Raises:
+            ValueError: Raises exception when the length of any message is not a multiple of key dimension
+
+        Returns:
+            list[str]: lower case plain texts, in the same order as the messages
+        """
+        indices, offsets = Batch.pack(cipherTexts)
+        if np.any(offsets % self.keyDim):
+            raise ValueError("HillKey: cipher text length is not a multiple of key dimension")
+        return Batch.unpack((indices.reshape(-1, self.keyDim) @ self.__inv_mat % 26).ravel(), offsets)
+
+
+def encrypt(plainText: str, key: list[list[int]] | HillKey, padding:str='z') -> str:
     """performs encryption on the text 'plainText' using the square key matrix 'key' of order n.
 
     Args:
         plainText (str): the text string to be encryted
-        key (list[list[int]]): the encrytion key matrix
+        key (list[list[int]] | HillKey): the encrytion key matrix, or a HillKey to avoid validating the key again
         padding (str, optional): the character used to pad the text string if length is not suitable for matrix-multiplication. Defaults to 'z'.
 
     Returns:
@@ -73,74 +307,110 @@ def encrypt(plainText: str, key: list[list[int]], padding:str='z') -> str:
     """
     if (len(plainText) < 1):
         return None
-    plain_mat = []
-    keyDim = len(key)
-    
-    # if plaintext length is not a multiple of key dimension, then
-    # we cannot form a proper plain text matrix with row length == key dimension
-    # So we provide padding to the plain text matrix to fullfil the size mismatch
-    if len(plainText) % len(key) != 0:
-        missingLength = math.ceil(plainText / len(key)) * len(key) - len(plainText)
-        plainText += padding * missingLength
-        # padded with Zs
-        
-        
-    # need to convert the plain Text to a matrix in-order to perform matrix multiplication with the key
-    for i in range(len(plainText) // keyDim):
-        plain_mat.append( plainText[i*keyDim : i*keyDim+keyDim] )
+    with Instrumentation.call('HillCipher.encrypt', len(plainText)) as call:
+        try:
+            with call.stage('key setup'):
+                hillKey = key if isinstance(key, HillKey) else HillKey(key)
+        except ValueError:
+            return None
         
-    for i in range(len(plain_mat)):
-        plain_mat[i] = list( map(lambda x: __char_index[x], plain_mat[i]) )
-
-    # encryption process Cipher = Plain * Key
-    cipher_mat = np.array(plain_mat) @ np.array(key) % 26
-    cipher = ""
-    
-    # converting the cipher text matrix to string.
-    for row in cipher_mat:
-        for val in row:
-            cipher += __index_char[val]
-    
-    return cipher
+        # encryption process Cipher = Plain * Key
+        return hillKey.encrypt(plainText, padding)
 
 
-def decrypt(cipherText: str, key: list[list[int]]) -> str:
+def decrypt(cipherText: str, key: list[list[int]] | HillKey) -> str:
     """performs decryption process on the text 'cipherText' using the key matrix 'key' of order n.
 
     Args:
         cipherText (str): the text string to be decrypted
-        key (list[list[int]]): the key matrix
+        key (list[list[int]] | HillKey): the key matrix, or a HillKey to reuse its inverse
 
     Returns:
-        str: returns the decrypted text string.
+        str: returns the decrypted text string, None if the key is not invertible or the number of letters of the
+        cipher text is not a multiple of key dimension.
     """
-    cipher_mat = []
-    keyDim = len(key)
-    
-    # if the the cipher text is not a multiple of key dimension, cipher text matrix cannot be build
-    if (len(cipherText) % keyDim != 0):
-        return None
-    
-    # building text into matrix
-    for i in range(len(cipherText) // keyDim):
-        cipher_mat.append( cipherText[i*keyDim : i*keyDim+keyDim] )
+    # checking if key is invertible. If the key is not ivertible, decryption cannot be done
+    with Instrumentation.call('HillCipher.decrypt', len(cipherText)) as call:
+        try:
+            with call.stage('key setup'):
+                hillKey = key if isinstance(key, HillKey) else HillKey(key)
+            # Plain = Cipher * Key_Inv, None if the number of letters is not a multiple of key dimension
+            return hillKey.decrypt(cipherText)
+        except ValueError:
+            return None
         
-    for i in range(len(cipher_mat)):
-        cipher_mat[i] = list( map(lambda x: __char_index[x], cipher_mat[i]) )
 
-    # checking if key is invertible. If the key is not ivertible, encryption cannot be done
-    key_inv = MatrixInverse.inverse(key)
-    if key_inv is None:
+def encrypt_stream(source, key: list[list[int]] | HillKey, padding: str='z', chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """performs encryption chunk by chunk using the square key matrix 'key', holding only a single chunk in memory at a time.
+    Letters of an incomplete block at the end of a chunk are carried over to the next chunk.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        key (list[list[int]] | HillKey): the encryption key matrix, or a HillKey
+        padding (str, optional): the character used to pad the last incomplete block. Defaults to 'z'.
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str | bytes]: generator of the cipher text chunks, None if the key is not invertible
+    """
+    try:
+        hillKey = key if isinstance(key, HillKey) else HillKey(key)
+    except ValueError:
         return None
-    
-    # Plain = Cipher * Key_Inv
-    plain_mat = np.array(cipher_mat) @ np.array(key_inv) % 26
-    plain = ""
-    for row in plain_mat:
-        for val in row:
-            plain += __index_char[val]
-    
-    return plain
+
+    keyDim = hillKey.keyDim
+    partial = [b""]     # letters of the incomplete block
+
+    def transform(letters: bytes) -> bytes:
+        letters = partial[0] + letters
+        end = len(letters) - len(letters) % keyDim
+        partial[0] = letters[end:]
+        return hillKey.encrypt(letters[:end])
+
+    def flush() -> bytes:
+        if not partial[0]:
+            return b""
+        return hillKey.encrypt(partial[0], padding)
+
+    return Stream.pipe(source, transform, flush, chunkSize)
+
+
+def decrypt_stream(source, key: list[list[int]] | HillKey, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """performs decryption chunk by chunk using the key matrix 'key', holding only a single chunk in memory at a time.
+    Letters of an incomplete block at the end of a chunk are carried over to the next chunk.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        key (list[list[int]] | HillKey): the key matrix, or a HillKey to reuse its inverse
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Raises:
+        ValueError: raised at the end of the stream if the cipher text length is not a multiple of key dimension
+
+    Returns:
+        Iterator[str | bytes]: generator of the plain text chunks, None if the key is not invertible
+    """
+    # checking if key is invertible. If the key is not ivertible, decryption cannot be done
+    try:
+        hillKey = key if isinstance(key, HillKey) else HillKey(key)
+    except ValueError:
+        return None
+
+    keyDim = hillKey.keyDim
+    partial = [b""]     # letters of the incomplete block
+
+    def transform(letters: bytes) -> bytes:
+        letters = partial[0] + letters
+        end = len(letters) - len(letters) % keyDim
+        partial[0] = letters[end:]
+        return hillKey.decrypt(letters[:end])
+
+    def flush() -> bytes:
+        if partial[0]:
+            raise ValueError("HillCipher: decrypt_stream(): cipher text length is not a multiple of key dimension")
+        return b""
+
+    return Stream.pipe(source, transform, flush, chunkSize)
         
 
 def __main__():
@@ -148,6 +418,8 @@ def __main__():
     cipherText = "rupotentoifv"
     key = findKey(plainText, cipherText)
     print("\nKey:", key)
+    print("encrypted:", encrypt(plainText, key))
+    print("decrypted:", decrypt(cipherText, key))
     
     
 if __name__ == "__main__":
@@ -2,76 +2,181 @@
 '''
 Encryption and Decryption functions for Shift Cipher, also known as, Caeser Cipher, given the key is known.
 '''
+from __future__ import annotations
 
-from os import system
+import sys
+from typing import Iterator
+from Extras import TranslateTable, Stream, Batch, Normalize, Instrumentation, LazyImport
+np = LazyImport.module('numpy')
+EnglishStatistics = LazyImport.module('Extras.EnglishStatistics')
 
-# A-Z mapped to 0-25 over ring Z26
-__char_index = {chr(i+97): i for i in range(26)}
-__char_index[' '] = ' '
 
-
-def decrypt(cipher: str, key: int) -> str:
+def decrypt(cipher: str, key: int, preserve: bool = False) -> str:
     """Performs shift cipher decryption using given key. 
     Any non-alphabet character including whitespaces is removed from the text before processing.
 
     Args:
         cipher (str): text to be decrypted
         key (int): key to be used to decryt the text
+        preserve (bool, optional): keep the case and the non-alphabet characters in place. Defaults to False.
 
     Returns:
         str: decryted plain text
     """
-    cipher = list(cipher.replace(r'[^a-zA-Z]+', "").lower())
-    text = ""
-    for char in cipher:
-        index = __char_index[char]
-        text = text + chr(97 + (index - key) % 26)
-    return text
+    if preserve:
+        letters, layout = Normalize.split(cipher)
+        return layout.restore(decrypt(letters, key))
+
+    # decryption is shifting by -key, done through a precomputed translation table
+    with Instrumentation.call('ShiftCipher.decrypt', len(cipher)):
+        return TranslateTable.translate(cipher, TranslateTable.shiftTable(-key))
 
 
-def encrypt(text: str, key: int) -> str:
+def encrypt(text: str, key: int, preserve: bool = False) -> str:
     """Performs shift cipher encryption using given key. 
     Any non-alphabet character including whitespaces is removed from the text before processing.
 
     Args:
         text (str): text to be encrypted
         key (int): key to be used to encryt the text
+        preserve (bool, optional): keep the case and the non-alphabet characters in place. Defaults to False.
 
     Returns:
         str: encrypted cipher text
     """
-    text = list(text.replace(r'[^a-zA-Z]+', "").lower())
-    cipher = ""
-    for char in text:
-        index = __char_index[char]
-        cipher = cipher + chr(97 + (index + key) % 26)
-    return cipher
+    if preserve:
+        letters, layout = Normalize.split(text)
+        return layout.restore(encrypt(letters, key))
 
+    with Instrumentation.call('ShiftCipher.encrypt', len(text)):
+        return TranslateTable.translate(text, TranslateTable.shiftTable(key))
 
-def __isCorrectKey__(isSolution: bool):
-    if isSolution:
-        exit(0)
 
+def encrypt_many(texts: list[str], key: int | list[int]) -> list[str]:
+    """Performs shift cipher encryption on many messages at once, transforming all of them in a single pass.
+    Any non-alphabet character including whitespaces is removed from the texts before processing.
 
-def __main__():
-    system('cls')
+    Args:
+        texts (list[str]): texts to be encrypted
+        key (int | list[int]): key to be used for all the texts, or one key per text
+
+    Returns:
+        list[str]: encrypted cipher texts, in the same order as the texts
+    """
+    if np.isscalar(key):
+        return Batch.translateMany(texts, TranslateTable.shiftTable(key))
 
-    cipher = input("Enter Cipher Text: ").lower()
+    indices, offsets = Batch.pack(texts)
+    return Batch.unpack((indices + Batch.perLetter(key, offsets)) % 26, offsets)
+
+
+def decrypt_many(ciphers: list[str], key: int | list[int]) -> list[str]:
+    """Performs shift cipher decryption on many messages at once, transforming all of them in a single pass.
+    Any non-alphabet character including whitespaces is removed from the texts before processing.
+
+    Args:
+        ciphers (list[str]): texts to be decrypted
+        key (int | list[int]): key to be used for all the texts, or one key per text
+
+    Returns:
+        list[str]: decrypted plain texts, in the same order as the texts
+    """
+    # decryption is shifting by -key
+    return encrypt_many(ciphers, -int(key) if np.isscalar(key) else -np.asarray(key))
 
-    choice = input("1: Enter Key\n2: Exhaustive Key Search\nYour Choice: ")
 
-    if choice == '1':
-        key = int(input("Enter Key: "))
-        print("Plain Text:", decrypt(cipher, key))
-    elif choice == '2':
-        for key in range(26):
-            system('clear')
-            print(f'\n{key}', ":", decrypt(cipher, key), '\n')
-            __isCorrectKey__(
-                input("Enter for next key or any other key to exit..."))
-    else:
-        print("Invalid Choice")
+def encrypt_stream(source, key: int, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Performs shift cipher encryption chunk by chunk, holding only a single chunk in memory at a time.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        key (int): key to be used to encrypt the text
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str | bytes]: generator of the cipher text chunks
+    """
+    table = TranslateTable.shiftTable(key)
+    return Stream.pipe(source, lambda letters: letters.translate(table), chunkSize=chunkSize)
+
+
+def decrypt_stream(source, key: int, chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Performs shift cipher decryption chunk by chunk, holding only a single chunk in memory at a time.
+
+    Args:
+        source (str | bytes | Iterable | file object): text, iterable of text chunks or a binary file object
+        key (int): key to be used to decrypt the text
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Returns:
+        Iterator[str | bytes]: generator of the plain text chunks
+    """
+    table = TranslateTable.shiftTable(-key)
+    return Stream.pipe(source, lambda letters: letters.translate(table), chunkSize=chunkSize)
+
+
+def encrypt_file(source: str, destination: str | None, key: int, preserve: bool = False) -> int:
+    """Performs shift cipher encryption of a whole file through memory-maps, without reading it into memory.
+
+    Args:
+        source (str): path of the plain text file
+        destination (str | None): path of the cipher text file, None to encrypt the file in place (preserve mode only)
+        key (int): key to be used to encrypt the text
+        preserve (bool, optional): keep the case and the non-alphabet characters in place, so that the cipher text
+        file has the same size as the plain text file. Defaults to False.
+
+    Returns:
+        int: size of the cipher text file in bytes
+    """
+    return TranslateTable.translateFile(source, destination, TranslateTable.shiftTable(key), preserve)
+
+
+def decrypt_file(source: str, destination: str | None, key: int, preserve: bool = False) -> int:
+    """Performs shift cipher decryption of a whole file through memory-maps, without reading it into memory.
+
+    Args:
+        source (str): path of the cipher text file
+        destination (str | None): path of the plain text file, None to decrypt the file in place (preserve mode only)
+        key (int): key to be used to decrypt the text
+        preserve (bool, optional): keep the case and the non-alphabet characters in place. Defaults to False.
+
+    Returns:
+        int: size of the plain text file in bytes
+    """
+    return TranslateTable.translateFile(source, destination, TranslateTable.shiftTable(-key), preserve)
+
+
+def crack(cipher: str, top: int | None = None, method: str = 'chi-squared') -> list[tuple[int, float, str]]:
+    """Performs ciphertext-only exhaustive key search, ranking all 26 keys by how english-like their decryption is.
+    Decrypting with key k maps cipher letter (p + k) to plain letter p, so the letter counts of every decryption are
+    a rotation of the cipher text letter counts. All the keys are scored at once from those counts, and only the
+    'top' best keys are actually decrypted.
+
+    Args:
+        cipher (str): text to be decrypted
+        top (int | None, optional): number of best keys to return. Defaults to None, i.e., all the keys.
+        method (str, optional): 'chi-squared' or 'log-likelihood' scoring. Defaults to 'chi-squared'.
+
+    Returns:
+        list[tuple[int, float, str]]: (key, score, plain text) tuples, best key first. Lower score is better.
+    """
+    cipher = Normalize.letters(cipher)
+    counts = EnglishStatistics.letterCounts(cipher)
+
+    # plain_counts[k][p] = counts[(p + k) mod 26]
+    keys = np.arange(26)
+    plain_counts = counts[(keys[:, None] + keys[None, :]) % 26]
+    scores = EnglishStatistics.score(plain_counts, method)
+
+    ranking = np.argsort(scores, kind='stable')[:top]
+    return [ (int(key), float(scores[key]), decrypt(cipher, int(key))) for key in ranking ]
+
+
+def __main__():
+    # non-interactive, e.g., python ShiftCipher.py decrypt --key 3 < cipher.txt, or python ShiftCipher.py crack cipher.txt
+    from Extras import CLI
+    return CLI.main(['shift'] + sys.argv[1:])
 
 
 if __name__ == "__main__":
-    __main__()
+    sys.exit(__main__())
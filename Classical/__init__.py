@@ -0,0 +1,22 @@
+'''
+Classical ciphers over the letters a-z: shift, affine, autokey, hill and affine-hill.
+
+IMP points:
+
+- submodules are imported on first use, e.g., Classical.ShiftCipher imports Classical/ShiftCipher.py when
+accessed, and numpy is only loaded once a cipher needs it, so a short-lived process pays only for the ciphers it uses.
+- the ciphers are also registered by name in Extras.Registry.
+'''
+import importlib
+
+__all__ = ['AffineCipher', 'AffineHillCipher', 'AutoKeyCipher', 'HillCipher', 'ShiftCipher']
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,117 @@
+'''
+Helpers to process many short messages at once.
+
+IMP points:
+
+- for short messages, the python overhead of every call (normalizing, building lists, looking up tables) costs
+more than the actual cipher, so the messages are joined into a single buffer and transformed in one go.
+- the messages are joined with a NUL separator, which survives the translation while every other non-alphabet
+character is removed. The positions of the separators give the offsets of each message in the letter buffer.
+- messages[i] occupies letters[offsets[i] : offsets[i+1]], so per-message values (keys) are expanded to
+per-letter values with np.repeat over the message lengths.
+
+- required modules
+    - numpy
+'''
+from __future__ import annotations
+from Extras import LazyImport, TranslateTable
+np = LazyImport.module('numpy')
+
+SEPARATOR = '\0'
+
+# every non-alphabet byte except the separator is removed during translation
+__delete = TranslateTable.NON_LETTERS.replace(SEPARATOR.encode('ascii'), b'')
+
+
+def __join(messages: list[str]) -> bytes:
+    joined = SEPARATOR.join(messages)
+    # the separator must only appear between the messages
+    if joined.count(SEPARATOR) != max(len(messages) - 1, 0):
+        joined = SEPARATOR.join(message.replace(SEPARATOR, '') for message in messages)
+    return joined.encode('utf-8')
+
+
+def translateMany(messages: list[str], table: bytes) -> list[str]:
+    """Applies the same translation table on every message in a single pass. Any non-alphabet character is removed.
+
+    Args:
+        messages (list[str]): texts to be translated
+        table (bytes): translation table built using TranslateTable.buildTable()
+
+    Returns:
+        list[str]: the translated lower case texts, in the same order as the messages
+    """
+    if len(messages) == 0:
+        return []
+    return __join(messages).translate(table, __delete).decode('ascii').split(SEPARATOR)
+
+
+def pack(messages: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Converts the messages to a single array of letter index values in ring Z26. Any non-alphabet character is removed.
+
+    Args:
+        messages (list[str]): texts to be packed
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (indices, offsets) where indices is a uint8 array of all the letters and
+        message i is indices[offsets[i] : offsets[i+1]]
+    """
+    if len(messages) == 0:
+        return np.zeros(0, dtype=np.uint8), np.zeros(1, dtype=np.int64)
+
+    data = np.frombuffer(__join(messages).translate(TranslateTable.shiftTable(0), __delete), dtype=np.uint8)
+    letters = data != 0
+    separators = np.flatnonzero(~letters)
+
+    # every separator before a message shifts its start in the letter buffer by one
+    offsets = np.empty(len(messages) + 1, dtype=np.int64)
+    offsets[0] = 0
+    offsets[1:-1] = separators - np.arange(len(separators))
+    offsets[-1] = len(data) - len(separators)
+    return data[letters] - 97, offsets
+
+
+def unpack(indices: np.ndarray, offsets: np.ndarray) -> list[str]:
+    """Converts the array of letter index values back to the list of messages, reverse of pack()"""
+    if len(offsets) == 1:
+        return []
+    # separators are put back between the messages, so that a single split gives all the messages
+    letters = (np.asarray(indices) + 97).astype(np.uint8)
+    return np.insert(letters, offsets[1:-1], 0).tobytes().decode('ascii').split(SEPARATOR)
+
+
+def perLetter(values, offsets: np.ndarray) -> np.ndarray:
+    """Expands one value per message (or a single value for all messages) to one value per letter
+
+    Args:
+        values (int | array-like): value of each message in ring Z26, e.g., its key
+        offsets (np.ndarray): message offsets as returned by pack()
+
+    Returns:
+        np.ndarray: uint8 array of the length of the letter buffer, with the values reduced over Z26
+    """
+    lengths = np.diff(offsets)
+    values = (np.asarray(values, dtype=np.int64) % 26).astype(np.uint8)
+    return np.repeat(np.broadcast_to(values, lengths.shape), lengths)
+
+
+def pad(indices: np.ndarray, offsets: np.ndarray, blockSize: int, value: int) -> tuple[np.ndarray, np.ndarray]:
+    """Pads every message to a multiple of block size with the letter index value 'value'
+
+    Args:
+        indices (np.ndarray): letter index values as returned by pack()
+        offsets (np.ndarray): message offsets as returned by pack()
+        blockSize (int): the length of every message is made a multiple of blockSize
+        value (int): index value of the padding letter
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (indices, offsets) of the padded messages
+    """
+    lengths = np.diff(offsets)
+    padded = np.zeros(len(offsets), dtype=np.int64)
+    padded[1:] = np.cumsum(-(-lengths // blockSize) * blockSize)
+
+    # every letter keeps its position within its message
+    out = np.full(padded[-1], value, dtype=np.uint8)
+    out[np.arange(len(indices)) + np.repeat(padded[:-1] - offsets[:-1], lengths)] = indices
+    return out, padded
@@ -0,0 +1,258 @@
+'''
+Command line entry point streaming stdin or files through any of the ciphers, installed as the 'ciphers' command.
+
+IMP points:
+
+- usage: ciphers CIPHER ACTION [FILE ...] --key KEY, e.g.,
+    ciphers shift encrypt --key 3 < plain.txt > cipher.txt
+    ciphers hill decrypt --key "3,21,20;4,15,23;6,14,5" cipher.txt -o plain.txt
+    ciphers affine-hill encrypt --key "3,6,4;5,15,18;17,8,5" --offset 8,13,1 plain.txt
+    ciphers des encrypt --key 133457799BBCDFF1 --mode CTR --workers 4 a.bin b.bin c.bin
+    ciphers affine crack cipher.txt --top 5
+- input and output are buffered binary streams processed chunk by chunk, so the memory used does not depend on
+the input size and the command can sit in shell pipelines. Without files stdin is read, and the output goes to
+stdout unless -o is given.
+- classical ciphers keep only the letters of the input, lower cased, like the library functions. Block ciphers
+(spn, des) encrypt the raw bytes in the given mode of operation.
+- the ciphers are looked up by name in Extras.Registry, and only the module of the selected cipher is imported.
+- with several input files, every file is written to FILE + suffix (or into --output-dir), and the files are
+processed in parallel on a pool of --workers processes. With a single file of a block cipher, the workers shard
+the ECB / CTR blocks of every chunk instead.
+- key formats: shift / autokey 'k', affine 'a,b', hill and affine-hill matrices as rows separated by ';' (the
+affine-hill vector b given with --offset), spn a 32-bit seed key as 8 hex digits (with the S-box and P-box of
+SPN.py), des a 64-bit key as 16 hex digits.
+'''
+import argparse, os, sys
+from typing import Callable, Iterator
+from Extras import Registry
+
+# size of the buffered reads and writes, large enough for numpy to amortize the per-chunk overhead
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# S-box, P-box and number of rounds of the SPN cipher, as in SPN.py
+SPN_SBOX = {
+    '0000': '1110', '0001': '0100', '0010': '1101', '0011': '0001',
+    '0100': '0010', '0101': '1111', '0110': '1011', '0111': '1000',
+    '1000': '0011', '1001': '1010', '1010': '0110', '1011': '1100',
+    '1100': '0101', '1101': '1001', '1110': '0000', '1111': '0111'
+}
+SPN_PBOX = [0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15]
+SPN_ROUNDS = 4
+
+
+def parseInts(text: str) -> list[int]:
+    """'5,8' -> [5, 8]"""
+    return [int(x) for x in text.replace(' ', '').split(',') if x]
+
+
+def parseMatrix(text: str) -> list[list[int]]:
+    """'3,21,20;4,15,23;6,14,5' -> [[3, 21, 20], [4, 15, 23], [6, 14, 5]]"""
+    return [parseInts(row) for row in text.split(';') if row.strip()]
+
+
+def blockCipher(cipher: str, key: str):
+    """Builds the block cipher object from the hex key
+
+    Args:
+        cipher (str): 'spn' or 'des'
+        key (str): 8 hex digits for spn, 16 hex digits for des
+
+    Raises:
+        ValueError: Raises exception when the key is not valid
+
+    Returns:
+        SPNCipher | DESCipher: the cipher object
+    """
+    module = Registry.load(cipher)
+    if cipher == 'spn':
+        if len(key) != 8:
+            raise ValueError("spn key must be 8 hex digits")
+        seed = format(int(key, 16), '032b')
+        return module.SPNCipher(SPN_SBOX, SPN_PBOX, module.getKeySchedule(seed, N=SPN_ROUNDS))
+    if len(key) != 16:
+        raise ValueError("des key must be 16 hex digits")
+    return module.DESCipher(bytes.fromhex(key))
+
+
+def classicalKeys(cipher: str, key: str, offset: str | None = None) -> tuple:
+    """Parses the key of a classical cipher into the key arguments of its module functions
+
+    Args:
+        cipher (str): one of the classical cipher names
+        key (str): key in the command line format of the cipher
+        offset (str | None, optional): vector key b of the affine-hill cipher. Defaults to None.
+
+    Raises:
+        ValueError: Raises exception when the key is not valid for the cipher
+
+    Returns:
+        tuple: (k,) for shift / autokey, (a, b) for affine, (HillKey,) or (AffineHillKey,)
+    """
+    module = Registry.load(cipher)
+    if cipher in ('shift', 'autokey'):
+        return (int(key),)
+    if cipher == 'affine':
+        keys = tuple(parseInts(key))
+        if len(keys) != 2 or module.encrypt("", *keys) is None:
+            raise ValueError("affine key must be 'a,b' with gcd(a, 26) = 1")
+        return keys
+    if cipher == 'hill':
+        return (module.HillKey(parseMatrix(key)),)
+    if not offset:
+        raise ValueError("affine-hill needs the vector key b as --offset")
+    return (module.AffineHillKey(parseMatrix(key), parseInts(offset)),)
+
+
+def transformer(args: argparse.Namespace, workers: int = 1) -> Callable[[object], Iterator[bytes]]:
+    """Returns the function streaming a binary file object through the cipher, as selected by the arguments
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments (cipher, action, key, offset, mode, iv, ...)
+        workers (int, optional): number of processes to shard the ECB / CTR blocks of the block ciphers across. Defaults to 1.
+
+    Raises:
+        ValueError: Raises exception when the key is not valid for the cipher
+
+    Returns:
+        Callable[[object], Iterator[bytes]]: takes a binary file object, returns the generator of output chunks
+    """
+    encrypt = args.action == 'encrypt'
+
+    if Registry.get(args.cipher).kind == 'block':
+        from PrivateKey import Modes
+        cipher = blockCipher(args.cipher, args.key)
+        if args.iv and args.mode.upper() == 'ECB':
+            raise ValueError("--iv is not used in ECB mode")
+        if encrypt:
+            iv = bytes.fromhex(args.iv) if args.iv else None
+            Modes.encrypt_stream(b"", cipher, args.mode, iv)    # validates the mode and the iv length
+            return lambda file: Modes.encrypt_stream(file, cipher, args.mode, iv, workers, chunkSize=args.chunk_size)
+        Modes.decrypt_stream(b"", cipher, args.mode)
+        return lambda file: Modes.decrypt_stream(file, cipher, args.mode, workers, chunkSize=args.chunk_size)
+
+    module = Registry.load(args.cipher)
+    function = module.encrypt_stream if encrypt else module.decrypt_stream
+    keys = classicalKeys(args.cipher, args.key, args.offset)
+    return lambda file: function(file, *keys, chunkSize=args.chunk_size)
+
+
+def processFile(args: argparse.Namespace, source: str | None, destination: str | None, workers: int = 1) -> int:
+    """Streams the source file through the cipher into the destination file
+
+    Args:
+        args (argparse.Namespace): parsed command line arguments
+        source (str | None): input file path, stdin if None
+        destination (str | None): output file path, stdout if None
+        workers (int, optional): number of processes to shard the blocks of a block cipher across. Defaults to 1.
+
+    Returns:
+        int: number of bytes written
+    """
+    stream = transformer(args, workers)
+    written = 0
+    with (open(source, 'rb', buffering=args.chunk_size) if source else os.fdopen(sys.stdin.fileno(), 'rb', buffering=args.chunk_size, closefd=False)) as fin, \
+         (open(destination, 'wb', buffering=args.chunk_size) if destination else os.fdopen(sys.stdout.fileno(), 'wb', buffering=args.chunk_size, closefd=False)) as fout:
+        for chunk in stream(fin):
+            fout.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def __crack(args: argparse.Namespace) -> int:
+    # ciphertext-only attacks need the whole text, and print the best keys
+    module = Registry.load(args.cipher)
+    if args.files:
+        with open(args.files[0], 'rb') as file:
+            text = file.read()
+    else:
+        text = sys.stdin.buffer.read()
+    text = text.decode('ascii', 'ignore')
+
+    results = module.crack(text, keyDim=args.dim, top=args.top) if args.cipher == 'hill' else module.crack(text, top=args.top)
+    # the cipher modules print the reason and return None when the text cannot be attacked
+    if not results:
+        print(f"ciphers: error: no {args.cipher} key found for the cipher text", file=sys.stderr)
+        return 1
+    for (key, score, plain) in results:
+        print(f"{key} (score {score:.2f}) : {plain}")
+    return 0
+
+
+def __destination(args: argparse.Namespace, source: str) -> str:
+    suffix = args.suffix if args.suffix is not None else ('.enc' if args.action == 'encrypt' else '.dec')
+    if args.output_dir:
+        return os.path.join(args.output_dir, os.path.basename(source) + suffix)
+    return source + suffix
+
+
+def parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='ciphers', description="stream stdin or files through any of the ciphers")
+    parser.add_argument('cipher', choices=Registry.names())
+    parser.add_argument('action', choices=('encrypt', 'decrypt', 'crack'))
+    parser.add_argument('files', nargs='*', help="input files, stdin if none")
+    parser.add_argument('--key', '-k', help="cipher key, format depends on the cipher")
+    parser.add_argument('--offset', help="vector key b of the affine-hill cipher, e.g., 8,13,1")
+    parser.add_argument('--mode', default='CBC', help="mode of operation of the block ciphers: ECB, CBC or CTR. Defaults to CBC.")
+    parser.add_argument('--iv', help="initialization vector (initial counter for CTR) in hex, random if not given")
+    parser.add_argument('--output', '-o', help="output file for a single input, stdout if not given")
+    parser.add_argument('--output-dir', help="directory to write the outputs of the input files to")
+    parser.add_argument('--suffix', help="suffix appended to the input file names, defaults to .enc / .dec")
+    parser.add_argument('--workers', '-j', type=int, default=1, help="number of worker processes")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="bytes read and written at once")
+    parser.add_argument('--top', type=int, default=5, help="number of keys printed by crack")
+    parser.add_argument('--dim', type=int, default=2, help="key dimension for crack of the hill cipher")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Runs the command line, e.g., main(['shift', 'encrypt', '--key', '3', 'plain.txt'])
+
+    Returns:
+        int: exit status
+    """
+    from PrivateKey import Modes
+
+    argParser = parser()
+    args = argParser.parse_intermixed_args(argv)
+
+    if args.action == 'crack':
+        if not Registry.get(args.cipher).crackable:
+            crackable = [name for name in Registry.names() if Registry.get(name).crackable]
+            argParser.error(f"crack is supported for {', '.join(crackable)}")
+        return __crack(args)
+
+    if args.key is None:
+        argParser.error("--key is required to encrypt or decrypt")
+    if args.output and len(args.files) > 1:
+        argParser.error("--output takes a single input file, use --output-dir or --suffix for many")
+    try:
+        transformer(args)
+    except ValueError as e:
+        argParser.error(str(e))
+
+    try:
+        if len(args.files) <= 1:
+            processFile(args, args.files[0] if args.files else None, args.output, args.workers)
+            return 0
+
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+        destinations = [__destination(args, source) for source in args.files]
+        if args.workers <= 1:
+            for (source, destination) in zip(args.files, destinations):
+                processFile(args, source, destination)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(min(args.workers, len(args.files))) as pool:
+                list(pool.map(processFile, [args] * len(args.files), args.files, destinations))
+    except BrokenPipeError:
+        # the reading end of the pipeline was closed, e.g., by head
+        return 0
+    except (ValueError, OSError, Modes.PaddingError) as e:
+        print(f"ciphers: error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+'''
+Statistics of english text used to score candidate decryptions.
+
+IMP points:
+
+- a decryption is scored on its letter counts only, so a candidate key can be scored without decrypting the text:
+for substitution ciphers, the letter counts of the decryption are a permutation of the letter counts of the cipher text.
+- chi-squared statistic: sum over letters of (observed - expected)^2 / expected. Lower is more english-like.
+- log-likelihood: sum over letters of observed * log(probability of letter). Higher is more english-like.
+- all scoring functions work on arrays of counts of shape (..., 26) to score many candidates at once.
+- bigram log-likelihood: sum over adjacent letter pairs of log(probability of pair). It is used when a decryption
+is not a simple substitution of the cipher text, e.g., for the Hill cipher, where letter counts are not enough.
+
+- required modules
+    - numpy
+'''
+import numpy as np
+
+# relative frequencies of the letters a-z in english text
+LETTER_FREQUENCIES = np.array([
+    0.08167, 0.01492, 0.02782, 0.04253, 0.12702, 0.02228, 0.02015, 0.06094, 0.06966,
+    0.00153, 0.00772, 0.04025, 0.02406, 0.06749, 0.07507, 0.01929, 0.00095, 0.05987,
+    0.06327, 0.09056, 0.02758, 0.00978, 0.02360, 0.00150, 0.01974, 0.00074,
+])
+LETTER_FREQUENCIES = LETTER_FREQUENCIES / LETTER_FREQUENCIES.sum()
+LETTER_LOG_PROBABILITIES = np.log(LETTER_FREQUENCIES)
+
+# relative frequencies (in percent) of the 50 most common english bigrams
+__common_bigrams = {
+    'th': 3.56, 'he': 3.07, 'in': 2.43, 'er': 2.05, 'an': 1.99, 're': 1.85, 'on': 1.76, 'at': 1.49, 'en': 1.45, 'nd': 1.35,
+    'ti': 1.34, 'es': 1.34, 'or': 1.28, 'te': 1.20, 'of': 1.17, 'ed': 1.17, 'is': 1.13, 'it': 1.12, 'al': 1.09, 'ar': 1.07,
+    'st': 1.05, 'to': 1.04, 'nt': 1.04, 'ng': 0.95, 'se': 0.93, 'ha': 0.93, 'as': 0.87, 'ou': 0.87, 'io': 0.83, 'le': 0.83,
+    've': 0.83, 'co': 0.79, 'me': 0.79, 'de': 0.76, 'hi': 0.76, 'ri': 0.73, 'ro': 0.73, 'ic': 0.70, 'ne': 0.69, 'ea': 0.69,
+    'ra': 0.69, 'ce': 0.65, 'li': 0.62, 'ch': 0.60, 'll': 0.58, 'be': 0.58, 'ma': 0.57, 'si': 0.55, 'om': 0.55, 'ur': 0.54,
+}
+
+
+def __bigramFrequencies() -> np.ndarray:
+    # the remaining bigrams share the leftover probability in proportion to the product of their letter frequencies
+    common = np.zeros((26, 26), dtype=bool)
+    frequencies = np.outer(LETTER_FREQUENCIES, LETTER_FREQUENCIES)
+    for (bigram, percent) in __common_bigrams.items():
+        common[ord(bigram[0]) - 97, ord(bigram[1]) - 97] = True
+        frequencies[ord(bigram[0]) - 97, ord(bigram[1]) - 97] = percent / 100
+    frequencies[~common] *= (1 - frequencies[common].sum()) / frequencies[~common].sum()
+    return frequencies
+
+
+# BIGRAM_FREQUENCIES[a][b] is the relative frequency of letter a followed by letter b
+BIGRAM_FREQUENCIES = __bigramFrequencies()
+BIGRAM_LOG_PROBABILITIES = np.log(BIGRAM_FREQUENCIES)
+
+
+def letterIndices(text: str | bytes) -> np.ndarray:
+    """Converts lower case letters a-z to their index values in ring Z26"""
+    if isinstance(text, str):
+        text = text.encode('ascii')
+    return np.frombuffer(text, dtype=np.uint8).astype(np.intp) - 97
+
+
+def letterCounts(text: str | bytes) -> np.ndarray:
+    """Counts of each letter a-z in the lower case text, as an array of length 26"""
+    return np.bincount(letterIndices(text), minlength=26)
+
+
+def chiSquared(counts: np.ndarray) -> np.ndarray:
+    """Chi-squared statistic of the letter counts against english letter frequencies. Lower is better.
+
+    Args:
+        counts (np.ndarray): letter counts of shape (..., 26)
+
+    Returns:
+        np.ndarray: scores of shape (...)
+    """
+    counts = np.asarray(counts, dtype=float)
+    total = counts.sum(axis=-1, keepdims=True)
+    # an empty text has nothing to deviate from the expectation, so its expected counts are replaced by 1 to get 0
+    expected = np.where(total == 0, 1.0, total * LETTER_FREQUENCIES)
+    return ((np.where(total == 0, 1.0, counts) - expected) ** 2 / expected).sum(axis=-1)
+
+
+def logLikelihood(counts: np.ndarray) -> np.ndarray:
+    """Log-likelihood of the letter counts under english letter frequencies. Higher is better.
+
+    Args:
+        counts (np.ndarray): letter counts of shape (..., 26)
+
+    Returns:
+        np.ndarray: scores of shape (...)
+    """
+    return np.asarray(counts, dtype=float) @ LETTER_LOG_PROBABILITIES
+
+
+def bigramLogLikelihood(indices: np.ndarray) -> np.ndarray:
+    """Log-likelihood of the texts under english bigram frequencies. Higher is better.
+
+    Args:
+        indices (np.ndarray): letter index values in ring Z26 of shape (..., L), one text of length L per row
+
+    Returns:
+        np.ndarray: scores of shape (...)
+    """
+    indices = np.asarray(indices)
+    return BIGRAM_LOG_PROBABILITIES[indices[..., :-1], indices[..., 1:]].sum(axis=-1)
+
+
+def score(counts: np.ndarray, method: str = 'chi-squared') -> np.ndarray:
+    """Scores the letter counts using the given method such that lower is always better.
+
+    Args:
+        counts (np.ndarray): letter counts of shape (..., 26)
+        method (str, optional): 'chi-squared' or 'log-likelihood'. Defaults to 'chi-squared'.
+
+    Raises:
+        ValueError: Raises exception on unknown method
+
+    Returns:
+        np.ndarray: scores of shape (...), the chi-squared statistic or the negative log-likelihood
+    """
+    if method == 'chi-squared':
+        return chiSquared(counts)
+    if method == 'log-likelihood':
+        return -logLikelihood(counts)
+    raise ValueError("scoring method must be either 'chi-squared' or 'log-likelihood'")
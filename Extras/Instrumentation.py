@@ -0,0 +1,175 @@
+'''
+Opt-in instrumentation of the cipher hot paths.
+
+IMP points:
+
+- every instrumented entry point opens a call, e.g., call('HillCipher.decrypt', len(text)), and times its stages
+(normalize, key setup, transform, output) within it. Per call name, the number of calls, the bytes processed,
+the total time and the time spent in each stage are accumulated.
+- instrumentation is disabled by default. A disabled call() returns a shared null object whose stages do nothing,
+so every instrumented call or stage costs a few hundred nanoseconds, no timing and no locking.
+- caches (key schedules, translation tables) register a function returning their statistics, which are included
+in the report along with the calls.
+
+usage:
+    Instrumentation.enable()
+    HillCipher.decrypt(cipherText, key)
+    Instrumentation.report()
+'''
+from threading import Lock
+from time import perf_counter
+from typing import Callable
+
+__state = {'enabled': False}
+__lock = Lock()
+__records = {}
+__caches = {}
+
+
+class Record:
+    """Accumulated counters and timers of all the calls of a single name"""
+    __slots__ = ('calls', 'bytes', 'seconds', 'stages', 'lock')
+
+    def __init__(self, lock: Lock) -> None:
+        self.calls = self.bytes = 0
+        self.seconds = 0.0
+        self.stages = {}    # stage name -> [count, seconds]
+        self.lock = lock
+
+    def asDict(self) -> dict:
+        with self.lock:
+            return {'calls': self.calls, 'bytes': self.bytes, 'seconds': self.seconds,
+                    'stages': {name: {'count': count, 'seconds': seconds} for (name, (count, seconds)) in self.stages.items()}}
+
+
+class Stage:
+    """Context manager timing a single stage of a call"""
+    __slots__ = ('record', 'name', 'start')
+
+    def __init__(self, record: Record, name: str) -> None:
+        self.record, self.name = record, name
+
+    def __enter__(self) -> 'Stage':
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = perf_counter() - self.start
+        with self.record.lock:
+            stage = self.record.stages.setdefault(self.name, [0, 0.0])
+            stage[0] += 1
+            stage[1] += elapsed
+
+
+class Call:
+    """Context manager timing a call of an instrumented function, and giving access to its stages"""
+    __slots__ = ('record', 'size', 'start')
+
+    def __init__(self, record: Record, size: int) -> None:
+        self.record, self.size = record, size
+
+    def stage(self, name: str) -> Stage:
+        """Returns the context manager timing the stage 'name' of this call"""
+        return Stage(self.record, name)
+
+    def __enter__(self) -> 'Call':
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = perf_counter() - self.start
+        with self.record.lock:
+            self.record.calls += 1
+            self.record.bytes += self.size
+            self.record.seconds += elapsed
+
+
+class NullCall:
+    """Stand-in for Call and Stage while instrumentation is disabled, doing nothing at all"""
+    __slots__ = ()
+
+    def stage(self, name: str) -> 'NullCall':
+        return self
+
+    def __enter__(self) -> 'NullCall':
+        return self
+
+    def __exit__(self, excType, excValue, traceback) -> None:
+        pass
+
+
+__null = NullCall()
+
+
+def enable() -> None:
+    """Starts recording the instrumented calls"""
+    __state['enabled'] = True
+
+
+def disable() -> None:
+    """Stops recording the instrumented calls. The recorded values are kept until reset()"""
+    __state['enabled'] = False
+
+
+def isEnabled() -> bool:
+    return __state['enabled']
+
+
+def reset() -> None:
+    """Removes all the recorded calls"""
+    with __lock:
+        __records.clear()
+
+
+def call(name: str, size: int = 0) -> Call | NullCall:
+    """Returns the context manager recording a call of the instrumented function 'name'
+
+    Args:
+        name (str): name of the instrumented function, e.g., 'HillCipher.decrypt'
+        size (int, optional): number of bytes (or letters) processed by the call. Defaults to 0.
+
+    Returns:
+        Call | NullCall: context manager, whose stage(name) method times the stages within the call
+    """
+    if not __state['enabled']:
+        return __null
+    record = __records.get(name)
+    if record is None:
+        with __lock:
+            record = __records.setdefault(name, Record(Lock()))
+    return Call(record, size)
+
+
+def registerCache(name: str, stats: Callable[[], dict]) -> None:
+    """Registers a cache whose statistics (hits, misses, hit rate, ...) are reported along with the calls
+
+    Args:
+        name (str): name of the cache in the report
+        stats (Callable[[], dict]): function returning the current statistics of the cache
+    """
+    __caches[name] = stats
+
+
+def lruCacheStats(function) -> Callable[[], dict]:
+    """Statistics function of a functools.lru_cache decorated function, to be used with registerCache()"""
+    def stats() -> dict:
+        info = function.cache_info()
+        lookups = info.hits + info.misses
+        return {'size': info.currsize, 'maxSize': info.maxsize, 'hits': info.hits, 'misses': info.misses,
+                'hitRate': info.hits / lookups if lookups else 0.0}
+    return stats
+
+
+def report() -> dict:
+    """Returns the recorded values
+
+    Returns:
+        dict: 'calls' mapping every call name to its calls, bytes, seconds and per stage count and seconds,
+        and 'caches' mapping every registered cache to its statistics
+    """
+    with __lock:
+        records = dict(__records)
+    return {
+        'calls': {name: record.asDict() for (name, record) in sorted(records.items())},
+        'caches': {name: stats() for (name, stats) in sorted(__caches.items())},
+    }
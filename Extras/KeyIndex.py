@@ -0,0 +1,196 @@
+'''
+Persistent index of the Hill cipher keys of small order: every invertible d x d matrix over Z26 along with its inverse.
+
+IMP points:
+
+- a d x d matrix is identified by its code, the base 26 value of its entries read row by row, i.e.,
+code = A[0][0] * 26^(d*d - 1) + ... + A[d-1][d-1].
+- for every order d <= MAX_DIMENSION two packed uint8 arrays are stored as .npy files:
+    - inverses: (26^(d*d), d, d) table of the inverse of the matrix of every code, filled with SINGULAR for the
+    matrices which are not invertible. Validating and inverting a key is a single lookup.
+    - keys: (N, d, d) array of the N invertible matrices in code order, so that attacks iterate over the valid keys
+    only, e.g., 157248 of the 456976 2 x 2 matrices.
+- the files are only written by an explicit build(), e.g., python -m Extras.KeyIndex, into INDEX_DIR (the
+CIPHERS_KEY_INDEX environment variable, else ~/.cache/ciphers). They are memory-mapped on load, so the processes
+using the index share its pages.
+- without index files, validating and inverting a single key falls back to MatrixInverse, and keys() builds the
+index in memory for the process, never writing it.
+- the table for d = 3 would hold 26^9 matrices, larger orders always use MatrixInverse.
+
+- required modules
+    - numpy
+'''
+from __future__ import annotations
+import math, os
+from threading import Lock
+from Extras import LazyImport, MatrixInverse
+np = LazyImport.module('numpy')
+
+# largest order of the indexed matrices, the index of order 2 takes 2.4 MB
+MAX_DIMENSION = 2
+# entry of the inverses table of the matrices which are not invertible
+SINGULAR = 255
+INDEX_DIR = os.environ.get('CIPHERS_KEY_INDEX', os.path.join(os.path.expanduser('~'), '.cache', 'ciphers'))
+
+__indexes = {}    # order -> (keys, inverses)
+__missing = set()    # orders without index files in INDEX_DIR, looked up once per process
+__lock = Lock()
+
+
+def __indexed(matrix) -> bool:
+    dim = len(matrix)
+    return 0 < dim <= MAX_DIMENSION and all(len(row) == dim for row in matrix)
+
+
+def __paths(dim: int, directory: str) -> tuple[str, str]:
+    return os.path.join(directory, f"hill{dim}.keys.npy"), os.path.join(directory, f"hill{dim}.inverses.npy")
+
+
+def __compute(dim: int) -> tuple[np.ndarray, np.ndarray]:
+    # every matrix of order dim decoded from its code, all of them inverted at once
+    powers = 26 ** np.arange(dim * dim - 1, -1, -1)
+    matrices = (np.arange(26 ** (dim * dim))[:, None] // powers % 26).reshape(-1, dim, dim)
+    inverses, invertible = MatrixInverse.inverseBatch(matrices)
+    inverses = inverses.astype(np.uint8)
+    inverses[~invertible] = SINGULAR
+    return matrices[invertible].astype(np.uint8), inverses
+
+
+def __save(path: str, array: np.ndarray) -> None:
+    # written to a temporary file first, so that a concurrent process never maps a partial index
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as file:
+        np.save(file, array)
+    os.replace(temporary, path)
+
+
+def __write(dim: int, directory: str, keys: np.ndarray, inverses: np.ndarray) -> None:
+    os.makedirs(directory, exist_ok=True)
+    keysPath, inversesPath = __paths(dim, directory)
+    __save(inversesPath, inverses)
+    __save(keysPath, keys)
+
+
+def build(dim: int, directory: str | None = None) -> int:
+    """Builds the index of the matrices of order dim and writes it to the directory, replacing any existing one.
+    This is the only function writing index files.
+
+    Args:
+        dim (int): order of the matrices, at most MAX_DIMENSION
+        directory (str | None, optional): directory of the index files. Defaults to INDEX_DIR.
+
+    Raises:
+        ValueError: Raises exception when dim is not in [1, MAX_DIMENSION]
+        OSError: Raises exception when the files cannot be written
+
+    Returns:
+        int: number of invertible matrices
+    """
+    if not 0 < dim <= MAX_DIMENSION:
+        raise ValueError(f"KeyIndex: only matrices of order 1 to {MAX_DIMENSION} are indexed")
+    keys, inverses = __compute(dim)
+    __write(dim, directory or INDEX_DIR, keys, inverses)
+    with __lock:
+        __missing.discard(dim)
+    return len(keys)
+
+
+def __mapped(dim: int) -> tuple[np.ndarray, np.ndarray] | None:
+    # index of order dim if it is loaded or saved in INDEX_DIR, None otherwise
+    index = __indexes.get(dim)
+    if index is not None or dim in __missing:
+        return index
+    with __lock:
+        if dim not in __indexes and dim not in __missing:
+            keysPath, inversesPath = __paths(dim, INDEX_DIR)
+            try:
+                keys, inverses = np.load(keysPath, mmap_mode='r'), np.load(inversesPath, mmap_mode='r')
+                if inverses.shape != (26 ** (dim * dim), dim, dim) or inverses.dtype != np.uint8 or keys.dtype != np.uint8:
+                    raise ValueError(f"KeyIndex: {inversesPath} is not an index of order {dim}")
+                # plain views of the mappings, indexing a np.memmap is slower
+                __indexes[dim] = (keys.view(np.ndarray), inverses.view(np.ndarray))
+            except (OSError, ValueError):
+                __missing.add(dim)    # missing or damaged files
+    return __indexes.get(dim)
+
+
+def load(dim: int) -> tuple[np.ndarray, np.ndarray]:
+    """Memory-maps the index of the matrices of order dim from INDEX_DIR. If it was not saved there by build(),
+    the index is built in memory, and kept for the process only. The index is loaded once per process.
+
+    Args:
+        dim (int): order of the matrices, at most MAX_DIMENSION
+
+    Raises:
+        ValueError: Raises exception when dim is not in [1, MAX_DIMENSION]
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: read-only (keys, inverses) uint8 arrays as described in the module documentation
+    """
+    if not 0 < dim <= MAX_DIMENSION:
+        raise ValueError(f"KeyIndex: only matrices of order 1 to {MAX_DIMENSION} are indexed")
+    index = __mapped(dim)
+    if index is not None:
+        return index
+    with __lock:
+        if dim not in __indexes:
+            __indexes[dim] = __compute(dim)
+    return __indexes[dim]
+
+
+def code(matrix) -> int:
+    """Base 26 code of the square matrix, its entries reduced modulo 26 and read row by row"""
+    value = 0
+    for row in matrix:
+        for x in row:
+            value = value * 26 + int(x) % 26
+    return value
+
+
+def keys(dim: int) -> np.ndarray:
+    """(N, dim, dim) uint8 array of every invertible matrix of order dim over Z26, in code order, see load()"""
+    return load(dim)[0]
+
+
+def inverse(matrix) -> list[list[int]] | None:
+    """Inverse of the square matrix over Z26, with a single lookup for the orders up to MAX_DIMENSION when
+    the index is loaded or saved, using MatrixInverse.inverse() otherwise.
+
+    Args:
+        matrix (array-like): square matrix of integers
+
+    Returns:
+        list[list[int]] | None: the inverse, None if the matrix is not invertible over Z26
+    """
+    index = __mapped(len(matrix)) if __indexed(matrix) else None
+    if index is None:
+        return MatrixInverse.inverse(matrix)
+    entries = index[1][code(matrix)]
+    return None if entries[0, 0] == SINGULAR else entries.tolist()
+
+
+def isInvertible(matrix) -> bool:
+    """Whether the square matrix is invertible over Z26, i.e., is a valid Hill cipher key.
+    A single lookup when the index of its order is loaded or saved, gcd(det(A), 26) = 1 otherwise."""
+    index = __mapped(len(matrix)) if __indexed(matrix) else None
+    if index is None:
+        det = MatrixInverse.determinant(matrix)
+        return det is not None and math.gcd(det, 26) == 1
+    return bool(index[1][code(matrix), 0, 0] != SINGULAR)
+
+
+def invertibleBatch(matrices) -> np.ndarray:
+    """Boolean mask of the matrices invertible over Z26 in a stack of matrices of shape (N, n, n)"""
+    A = np.asarray(matrices, dtype=np.int64)
+    n = A.shape[-1]
+    index = __mapped(n) if 0 < n <= MAX_DIMENSION else None
+    if index is None:
+        return np.gcd(MatrixInverse.determinantBatch(A), 26) == 1
+    codes = (A % 26).reshape(len(A), -1) @ (26 ** np.arange(n * n - 1, -1, -1))
+    return index[1][codes, 0, 0] != SINGULAR
+
+
+if __name__ == "__main__":
+    # python -m Extras.KeyIndex builds the index of every order ahead of its first use
+    for dim in range(1, MAX_DIMENSION + 1):
+        print(f"order {dim}: {build(dim)} invertible matrices indexed in {INDEX_DIR}")
@@ -0,0 +1,45 @@
+'''
+Lazy module imports, to keep the import of the cipher modules cheap.
+
+IMP points:
+
+- module(name) returns a module object right away, which is executed on the first access to any of its attributes,
+e.g., np = LazyImport.module('numpy') costs nothing until np.array(...) is called.
+- once executed, the module is an ordinary module, and attribute accesses cost the same as with a plain import.
+- modules using a lazy numpy need "from __future__ import annotations", so that annotations such as np.ndarray
+are not evaluated when the functions are defined.
+'''
+import importlib.util, sys
+from types import ModuleType
+
+
+def module(name: str) -> ModuleType:
+    """Returns the module, executed on the first access to one of its attributes.
+    A module which is already imported is returned as it is.
+
+    Args:
+        name (str): absolute module name, e.g., 'numpy' or 'Extras.EnglishStatistics'
+
+    Raises:
+        ModuleNotFoundError: Raises exception when the module cannot be found
+
+    Returns:
+        ModuleType: the (lazy) module
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    lazy = importlib.util.module_from_spec(spec)
+    sys.modules[name] = lazy
+    loader.exec_module(lazy)
+
+    # submodules are bound on their package, as a plain import does
+    parent, _, child = name.rpartition('.')
+    if parent:
+        setattr(sys.modules[parent], child, lazy)
+    return lazy
@@ -0,0 +1,64 @@
+'''
+Memory-mapped files as numpy uint8 arrays, for the file-level encryption functions.
+
+IMP points:
+
+- the input file is mapped read-only and the output file is created at its final size and mapped for writing,
+so the ciphers read and write the files through numpy views without reading them into python objects.
+- the pages of a mapping are loaded and written back by the operating system as they are accessed, so files
+larger than the memory can be processed as long as the cipher walks over them in chunks.
+- empty files cannot be memory-mapped, an empty array stands in for them.
+- creating the output file truncates it, so the output must never be the input file mapped for reading, see sameFile().
+
+- required modules
+    - numpy
+'''
+from __future__ import annotations
+import os
+from Extras import LazyImport
+np = LazyImport.module('numpy')
+
+
+def load(path: str, writable: bool = False) -> np.ndarray:
+    """Maps the whole file as a uint8 array
+
+    Args:
+        path (str): path of an existing file
+        writable (bool, optional): map for reading and writing, to transform the file in place. Defaults to False.
+
+    Returns:
+        np.ndarray: memory-mapped uint8 array of the file content
+    """
+    with open(path, 'rb') as file:
+        empty = file.seek(0, 2) == 0
+    if empty:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r+' if writable else 'r')
+
+
+def sameFile(source: str, destination: str | None) -> bool:
+    """Whether destination is the existing source file, under the same or another path"""
+    return destination is not None and os.path.exists(destination) and os.path.samefile(source, destination)
+
+
+def create(path: str, size: int) -> np.ndarray:
+    """Creates (or truncates) the file with the given size, and maps it for writing
+
+    Args:
+        path (str): path of the file to be written
+        size (int): size of the file in bytes
+
+    Returns:
+        np.ndarray: memory-mapped uint8 array of 'size' bytes
+    """
+    with open(path, 'wb') as file:
+        file.truncate(size)
+    if size == 0:
+        return np.empty(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode='r+', shape=(size,))
+
+
+def flush(array: np.ndarray) -> None:
+    """Writes the modified pages of a mapping created by create() or load() back to the file"""
+    if isinstance(array, np.memmap):
+        array.flush()
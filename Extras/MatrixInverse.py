@@ -6,11 +6,100 @@ IMP points:
 - inverse of matrix A: A ^ -1 = adj(A) / det(A).
 - ring: a set of integers inverible over addition but not neccesarily ove multiplication --> Zm.
 - inverse exists for a in Zm iff gcd(a, m) = 1
+- inverse of A over Zm exists iff gcd(det(A), m) = 1, i.e., iff A is invertible over Z(p^e) for every prime power p^e of m.
+
+- the inverse is computed exactly with integers, without any floating point operation:
+    - over Z(p^e), any element not divisible by p is invertible, so Gauss-Jordan elimination works
+    when such an element is chosen as the pivot. If a column has no such element, A is singular mod p.
+    - the inverses over the prime powers of m are combined into the inverse over Zm using the
+    chinese remainder theorem (CRT).
+- stacks of matrices of shape (N, n, n) are inverted together by running each elimination step on all of them at once.
+Stacks of matrices of order 3 or less directly use the closed form adjugate and determinant instead.
 
 - required modules
     - numpy
 '''
-import numpy as np
+from __future__ import annotations
+from Extras import LazyImport
+np = LazyImport.module('numpy')
+
+
+def __factorize(m: int) -> list[tuple[int, int]]:
+    # prime factorization of m as a list of (p, p^e) pairs
+    factors = []
+    p = 2
+    while p * p <= m:
+        if m % p == 0:
+            q = 1
+            while m % p == 0:
+                m //= p
+                q *= p
+            factors.append((p, q))
+        p += 1
+    if m > 1:
+        factors.append((m, m))
+    return factors
+
+
+def __dtype(m: int):
+    # products of two elements of Zm must fit in int64, else python integers are used
+    return np.int64 if m < 2**31 else object
+
+
+def __inversePrimePower(A: np.ndarray, p: int, q: int) -> np.ndarray | None:
+    # Gauss-Jordan elimination over Z(q) with q = p^e, on the augmented matrix [A | I]
+    n = len(A)
+    aug = np.concatenate( (A % q, np.identity(n, dtype=int).astype(A.dtype)), axis=1 )
+
+    for col in range(n):
+        # any element not divisible by p is a unit of Z(q) and can be used as pivot
+        candidates = np.nonzero(aug[col:, col] % p)[0]
+        if len(candidates) == 0:
+            return None
+        pivot = col + int(candidates[0])
+        if pivot != col:
+            aug[[col, pivot]] = aug[[pivot, col]]
+
+        aug[col] = aug[col] * pow(int(aug[col, col]), -1, q) % q
+        factors = aug[:, col].copy()
+        factors[col] = 0
+        aug = (aug - np.outer(factors, aug[col])) % q
+
+    return aug[:, n:]
+
+
+def __isSquare(matrix) -> bool:
+    return all(len(row) == len(matrix) for row in matrix)
+
+
+def determinant(matrix: list[list], m: int | None = 26) -> int | None:
+    """
+    - Calculates the exact integer determinant using fraction-free (Bareiss) elimination.
+    - the determinant is reduced over the ring of size m, unless m is None.
+    - the function returns None while printing error string if matrix is not square.
+    """
+    if not __isSquare(matrix):
+        print(f"matrixInverse.py: determinant: [Error]: matrix A is not a square matrix and so determinant cannot be calculated")
+        return None
+
+    A = [[int(x) for x in row] for row in matrix]
+    n, sign, previous = len(A), 1, 1
+    for k in range(n - 1):
+        if A[k][k] == 0:
+            swap = next((i for i in range(k + 1, n) if A[i][k] != 0), None)
+            if swap is None:
+                return 0
+            A[k], A[swap] = A[swap], A[k]
+            sign = -sign
+        for i in range(k + 1, n):
+            for j in range(k + 1, n):
+                # exact division as per Bareiss algorithm
+                A[i][j] = (A[i][j] * A[k][k] - A[i][k] * A[k][j]) // previous
+        previous = A[k][k]
+
+    det = sign * A[-1][-1] if n > 0 else 1
+    return det if m is None else det % m
+
 
 def inverse(matrix: list[list], m: int=26) -> list[list] | None:
     '''
@@ -19,34 +108,243 @@ def inverse(matrix: list[list], m: int=26) -> list[list] | None:
     - the function returns none while printing error string if matrix inverse is not calculated
     else it returns the inverse of the matrix
     '''
-    A = np.array(matrix)
-    
-    dim = len(A)
-    for row in A:
-        if len(row) != dim:
-            print(f"matrixInverse.py: inverse: [Error]: matrix A is not a square matrix and so inverse cannot be calculated")
-            return None
-            
-    # matrix adjoint = matrix inverse * matrix determinant
-    inv_A = np.linalg.inv(A)
-    det_A = round(np.linalg.det(A))
-    adj_A = inv_A * det_A
-    
-    if np.gcd(det_A, m) != 1:
-        print(f"matrixInverse.py: inverse: [Error]: gcd(det(A), m) != 1 for det(A)={det_A} and m={m}")
+    if not __isSquare(matrix):
+        print(f"matrixInverse.py: inverse: [Error]: matrix A is not a square matrix and so inverse cannot be calculated")
         return None
-    
-    detA_inv_Zm = pow(round(np.linalg.det(A)), -1, m)
-    inv_A_Zm = np.round_(detA_inv_Zm * adj_A) % m
-    inv_A_Zm = inv_A_Zm.astype(int) # converting the matrix from float to integer
-    
+
+    A = np.array([[int(x) for x in row] for row in matrix], dtype=__dtype(m)).reshape(len(matrix), len(matrix))
+
+    # inverse over each prime power q of m, combined with CRT as sum of X_q * (m/q) * ((m/q)^-1 mod q)
+    inv_A_Zm = np.zeros_like(A)
+    for (p, q) in __factorize(m):
+        inv_A_Zq = __inversePrimePower(A, p, q)
+        if inv_A_Zq is None:
+            det_A = determinant(matrix, m)
+            print(f"matrixInverse.py: inverse: [Error]: gcd(det(A), m) != 1 for det(A)={det_A} and m={m}")
+            return None
+        coefficient = (m // q) * pow(m // q, -1, q) % m
+        inv_A_Zm = (inv_A_Zm + inv_A_Zq * coefficient) % m
+
     return inv_A_Zm.tolist()
-    
-    
+
+
+def __solvePrimePower(A: np.ndarray, B: np.ndarray, p: int, q: int) -> np.ndarray | None:
+    # Gauss-Jordan elimination over Z(q) with q = p^e on the augmented matrix [A | B] where A has at least as many rows as columns
+    r, n = A.shape
+    aug = np.concatenate( (A % q, B % q), axis=1 )
+
+    for col in range(n):
+        # any row at or below the diagonal having a unit in this column can be used as pivot
+        candidates = np.nonzero(aug[col:, col] % p)[0]
+        if len(candidates) == 0:
+            return None
+        pivot = col + int(candidates[0])
+        if pivot != col:
+            aug[[col, pivot]] = aug[[pivot, col]]
+
+        aug[col] = aug[col] * pow(int(aug[col, col]), -1, q) % q
+        factors = aug[:, col].copy()
+        factors[col] = 0
+        aug = (aug - np.outer(factors, aug[col])) % q
+
+    # the remaining equations are reduced to 0 = B', which must hold for the system to be consistent
+    if aug[n:, n:].any():
+        return None
+    return aug[:n, n:]
+
+
+def solve(A, B, m: int=26) -> list[list] | None:
+    """Solves the linear system A * X = B over ring of size m.
+
+    - A can have more rows (equations) than columns. The pivots are picked from any of the rows, so the system is
+    solved as long as the rows of A span the whole space over every prime power of m, even if no square block of A is invertible.
+    - all the equations are verified, so the solution returned satisfies every row of the system.
+
+    Args:
+        A (array-like): integer matrix of shape (r, n) with r >= n
+        B (array-like): integer matrix of shape (r, k)
+        m (int, optional): ring size. Defaults to 26.
+
+    Returns:
+        list[list] | None: the unique solution X of shape (n, k), None if the system is inconsistent or does not have a unique solution
+    """
+    A = np.array(A, dtype=__dtype(m)).reshape(len(A), -1)
+    B = np.array(B, dtype=__dtype(m)).reshape(len(B), -1)
+    if len(A) != len(B) or A.shape[0] < A.shape[1]:
+        return None
+
+    # solution over each prime power q of m, combined with CRT as in inverse()
+    X = np.zeros((A.shape[1], B.shape[1]), dtype=A.dtype)
+    for (p, q) in __factorize(m):
+        X_q = __solvePrimePower(A, B, p, q)
+        if X_q is None:
+            return None
+        coefficient = (m // q) * pow(m // q, -1, q) % m
+        X = (X + X_q * coefficient) % m
+
+    return X.tolist()
+
+
+def __unitInverses(p: int, q: int, values: np.ndarray) -> np.ndarray:
+    # inverse over Z(q) of each unit in values, 0 for non-units
+    if q <= 1 << 20:
+        table = np.zeros(q, dtype=np.int64)
+        units = np.arange(q)[np.arange(q) % p != 0]
+        table[units] = [pow(int(u), -1, q) for u in units]
+        return table[values]
+    return np.array([pow(int(v), -1, q) if v % p else 0 for v in values.ravel()], dtype=np.int64).reshape(values.shape)
+
+
+def __inversePrimePowerBatch(A: np.ndarray, p: int, q: int) -> tuple[np.ndarray, np.ndarray]:
+    # Gauss-Jordan elimination over Z(q) with q = p^e, on every augmented matrix [A_i | I] together
+    N, n = A.shape[0], A.shape[1]
+    rows = np.arange(N)
+    aug = np.concatenate( (A % q, np.broadcast_to(np.identity(n, dtype=np.int64), (N, n, n))), axis=2 )
+    invertible = np.ones(N, dtype=bool)
+
+    for col in range(n):
+        # first element of the column, on or below the diagonal, which is not divisible by p is the pivot
+        units = aug[:, col:, col] % p != 0
+        invertible &= units.any(axis=1)
+        pivot = col + units.argmax(axis=1)
+
+        pivot_rows = aug[rows, pivot].copy()
+        aug[rows, pivot] = aug[:, col]
+        aug[:, col] = pivot_rows
+
+        aug[:, col] = aug[:, col] * __unitInverses(p, q, aug[:, col, col])[:, None] % q
+        factors = aug[:, :, col].copy()
+        factors[:, col] = 0
+        aug = (aug - factors[:, :, None] * aug[:, col][:, None, :]) % q
+
+    return aug[:, :, n:], invertible
+
+
+def __adjugateSmall(A: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    # closed form determinants and adjugates of a stack of 1x1, 2x2 or 3x3 matrices, adj(A) = det(A) * A^-1
+    n = A.shape[1]
+    if n == 1:
+        return A[:, 0, 0].copy(), np.ones_like(A)
+    if n == 2:
+        a, b, c, d = A[:, 0, 0], A[:, 0, 1], A[:, 1, 0], A[:, 1, 1]
+        return a*d - b*c, np.stack( (np.stack((d, -b), axis=1), np.stack((-c, a), axis=1)), axis=1 )
+
+    # cofactor C[i][j] uses the rows other than i and the columns other than j, taken cyclically to get the sign
+    adj = np.empty_like(A)
+    for i in range(3):
+        for j in range(3):
+            r1, r2, c1, c2 = (i + 1) % 3, (i + 2) % 3, (j + 1) % 3, (j + 2) % 3
+            adj[:, j, i] = A[:, r1, c1] * A[:, r2, c2] - A[:, r1, c2] * A[:, r2, c1]
+    return (A[:, 0, :] * adj[:, :, 0]).sum(axis=1), adj
+
+
+def __ringInverses(m: int) -> np.ndarray:
+    # table of the inverse of each element of Zm, 0 for elements which are not invertible
+    table = np.zeros(m, dtype=np.int64)
+    for a in range(1, m):
+        if np.gcd(a, m) == 1:
+            table[a] = pow(a, -1, m)
+    return table
+
+
+def inverseBatch(matrices, m: int=26) -> tuple[np.ndarray, np.ndarray]:
+    """Calculates the inverses over ring of size m of a stack of square matrices at once.
+
+    Args:
+        matrices (array-like): integer array of shape (N, n, n)
+        m (int, optional): ring size, must be less than 2^31. Defaults to 26.
+
+    Raises:
+        ValueError: Raises exception when the matrices are not square or m is too large
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (N, n, n) array of inverses, containing zero matrices for the matrices
+        which are not invertible, and the (N,) boolean mask of the invertible matrices
+    """
+    A = np.asarray(matrices, dtype=np.int64)
+    if A.ndim != 3 or A.shape[1] != A.shape[2]:
+        raise ValueError("matrixInverse.py: inverseBatch: matrices must be of shape (N, n, n)")
+    if m >= 2**31:
+        raise ValueError("matrixInverse.py: inverseBatch: ring size must be less than 2^31")
+
+    A = A % m
+    # small matrices use inv(A) = det(A)^-1 * adj(A), which only takes a few operations on the whole stack
+    if A.shape[1] <= 3 and m <= 1 << 16:
+        det, adj = __adjugateSmall(A)
+        det_inv = __ringInverses(m)[det % m]
+        return adj * det_inv[:, None, None] % m, det_inv != 0
+
+    inv_A_Zm = np.zeros_like(A)
+    invertible = np.ones(len(A), dtype=bool)
+    for (p, q) in __factorize(m):
+        inv_A_Zq, invertible_Zq = __inversePrimePowerBatch(A, p, q)
+        invertible &= invertible_Zq
+        coefficient = (m // q) * pow(m // q, -1, q) % m
+        inv_A_Zm = (inv_A_Zm + inv_A_Zq * coefficient) % m
+
+    inv_A_Zm[~invertible] = 0
+    return inv_A_Zm, invertible
+
+
+def determinantBatch(matrices, m: int=26) -> np.ndarray:
+    """Calculates the determinants over ring of size m of a stack of square matrices at once,
+    using fraction-free (Bareiss) elimination on all the matrices together.
+
+    Args:
+        matrices (array-like): integer array of shape (N, n, n)
+        m (int, optional): ring size. Defaults to 26.
+
+    Raises:
+        ValueError: Raises exception when the matrices are not square
+
+    Returns:
+        np.ndarray: (N,) array of the determinants reduced over Zm
+    """
+    A = np.asarray(matrices)
+    if A.ndim != 3 or A.shape[1] != A.shape[2]:
+        raise ValueError("matrixInverse.py: determinantBatch: matrices must be of shape (N, n, n)")
+    N, n = A.shape[0], A.shape[1]
+    if 0 < n <= 3 and m < 2**20:
+        return __adjugateSmall(np.asarray(A, dtype=np.int64) % m)[0] % m
+
+    # the intermediate values are minors of the reduced matrix, bounded by ((m-1) * sqrt(n))^n (Hadamard's inequality)
+    # and their products must fit in int64, else python integers are used
+    dtype = np.int64 if ((m - 1) * n**0.5) ** n < 2**31 else object
+    A = (A.astype(object) % m).astype(dtype)
+    rows = np.arange(N)
+    sign = np.ones(N, dtype=dtype)
+    previous = np.ones(N, dtype=dtype)
+    singular = np.zeros(N, dtype=bool)
+
+    for k in range(n - 1):
+        nonzero = A[:, k:, k] != 0
+        singular |= ~nonzero.any(axis=1)
+        pivot = k + nonzero.argmax(axis=1)
+        sign[pivot != k] *= -1
+
+        pivot_rows = A[rows, pivot].copy()
+        A[rows, pivot] = A[:, k]
+        A[:, k] = pivot_rows
+
+        A[:, k+1:, k+1:] = (A[:, k+1:, k+1:] * A[:, k, k][:, None, None]
+                            - A[:, k+1:, k][:, :, None] * A[:, k, k+1:][:, None, :]) // previous[:, None, None]
+        # singular matrices have a zero pivot, which must not be used as divisor in the next step
+        previous = np.where(singular, 1, A[:, k, k]).astype(dtype)
+
+    det = sign * A[:, n-1, n-1] if n > 0 else np.ones(N, dtype=dtype)
+    det[singular] = 0
+    return (det % m).astype(np.int64)
+
+
 if __name__ == "__main__":
     P = [[1,17,4],[0,19,7],[19,0,10]]
     C = [[17,20,15],[14,19,4],[13,19,14]]
-    
+
     P_inv = inverse(P)
     print(P_inv)
-    print(np.matmul(P_inv, C) % 26)
\ No newline at end of file
+    print(np.matmul(P_inv, C) % 26)
+
+    # all 26^4 2x2 matrices over Z26, checked for invertibility at once
+    keys = np.indices((26,) * 4).reshape(4, -1).T.reshape(-1, 2, 2)
+    keys_inv, invertible = inverseBatch(keys)
+    print(f"{invertible.sum()} of {len(keys)} 2x2 matrices are invertible over Z26")
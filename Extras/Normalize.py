@@ -0,0 +1,95 @@
+'''
+Input normalization shared by all the classical ciphers.
+
+IMP points:
+
+- the ciphers work on lower case letters a-z only. A single bytes.translate call lower-cases the letters
+and deletes every other character, instead of a regular expression substitution followed by lower().
+- characters outside ascii can never be letters of a-z A-Z, so they are dropped while encoding.
+- in preserve mode, the text is split into its letters and a Layout holding the position and case of every letter.
+The cipher works on the letters only, and the Layout puts the output letters back in place, restoring
+the case and every non-alphabet character (whitespace, punctuation, digits, ...).
+
+- required modules
+    - numpy
+'''
+from __future__ import annotations
+from Extras import LazyImport, TranslateTable
+np = LazyImport.module('numpy')
+
+# identity mapping of Z26, i.e., only lower-cases the letters, every other byte is deleted with NON_LETTERS
+LOWER_TABLE = TranslateTable.buildTable(list(range(26)))
+
+
+def letters(text: str | bytes) -> str | bytes:
+    """Lower-cases the letters of the text and removes every other character, in a single pass.
+
+    Args:
+        text (str | bytes): text to be normalized
+
+    Returns:
+        str | bytes: lower case letters a-z of the text, of the same type as text
+    """
+    if isinstance(text, str):
+        return text.encode('ascii', 'ignore').translate(LOWER_TABLE, TranslateTable.NON_LETTERS).decode('ascii')
+    return bytes(text).translate(LOWER_TABLE, TranslateTable.NON_LETTERS)
+
+
+def indices(text: str | bytes) -> np.ndarray:
+    """Normalizes the text and converts the letters to their index values in ring Z26, as a uint8 array"""
+    normalized = letters(text)
+    if isinstance(normalized, str):
+        normalized = normalized.encode('ascii')
+    return np.frombuffer(normalized.translate(TranslateTable.LETTER_INDICES), dtype=np.uint8)
+
+
+class Layout:
+    """Position and case of the letters of a text, to put transformed letters back in the original text"""
+    __slots__ = ('codes', 'isLetter', 'isUpper')
+
+    def __init__(self, text: str) -> None:
+        """
+        Args:
+            text (str): the original text
+        """
+        # one code point per character, so that non-ascii characters keep their positions too
+        self.codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        self.isUpper = (self.codes >= 65) & (self.codes <= 90)
+        self.isLetter = self.isUpper | ((self.codes >= 97) & (self.codes <= 122))
+
+    def letters(self) -> str:
+        """Lower case letters of the original text, in order"""
+        return (self.codes[self.isLetter] | 32).astype(np.uint8).tobytes().decode('ascii')
+
+    def restore(self, letters: str) -> str:
+        """Puts the lower case letters back at the letter positions of the original text, in the original case.
+
+        Args:
+            letters (str): transformed letters, exactly as many as the letters of the original text
+
+        Raises:
+            ValueError: Raises exception when the number of letters does not match the original text
+
+        Returns:
+            str: the original text with every letter replaced
+        """
+        new = np.frombuffer(letters.encode('ascii'), dtype=np.uint8).astype(np.uint32)
+        if len(new) != np.count_nonzero(self.isLetter):
+            raise ValueError("Normalize: number of letters does not match the original text")
+
+        codes = self.codes.copy()
+        codes[self.isLetter] = new - 32 * self.isUpper[self.isLetter]
+        return codes.tobytes().decode('utf-32-le')
+
+
+def split(text: str) -> tuple[str, Layout]:
+    """Splits the text into its lower case letters and the Layout to restore the rest of the text.
+
+    Args:
+        text (str): text to be normalized
+
+    Returns:
+        tuple[str, Layout]: (letters, layout), where layout.restore(letters) gives back the text
+    """
+    layout = Layout(text)
+    return layout.letters(), layout
@@ -0,0 +1,87 @@
+'''
+Registry of the ciphers by name.
+
+IMP points:
+
+- every cipher is registered with the name of its module, which is only imported when the cipher is loaded,
+so listing or looking up the ciphers imports none of them.
+- 'classical' ciphers work on the letters a-z and their modules provide encrypt / decrypt, encrypt_stream /
+decrypt_stream and encrypt_many / decrypt_many. 'block' cipher modules provide a cipher class to be used with
+PrivateKey.Modes.
+- the key format is the one used by the command line (Extras/CLI.py) and the service (Extras/Service.py).
+
+usage:
+    Registry.names()                 # ['shift', 'affine', ...]
+    Registry.load('hill').HillKey    # imports Classical.HillCipher
+'''
+import importlib
+from types import ModuleType
+
+
+class Cipher:
+    """Registered cipher: its name, module, kind and key format"""
+    __slots__ = ('name', 'module', 'kind', 'crackable', 'keyFormat')
+
+    def __init__(self, name: str, module: str, kind: str, crackable: bool, keyFormat: str) -> None:
+        self.name, self.module, self.kind = name, module, kind
+        self.crackable, self.keyFormat = crackable, keyFormat
+
+    def load(self) -> ModuleType:
+        """Imports the module of the cipher"""
+        return importlib.import_module(self.module)
+
+
+CIPHERS: dict[str, Cipher] = {}
+
+
+def register(name: str, module: str, kind: str = 'classical', crackable: bool = False, keyFormat: str = '') -> Cipher:
+    """Registers a cipher, replacing any cipher registered with the same name
+
+    Args:
+        name (str): name of the cipher, e.g., 'shift'
+        module (str): absolute name of the module implementing it, e.g., 'Classical.ShiftCipher'
+        kind (str, optional): 'classical' or 'block'. Defaults to 'classical'.
+        crackable (bool, optional): the module provides a ciphertext-only crack(). Defaults to False.
+        keyFormat (str, optional): description of the key format. Defaults to ''.
+
+    Raises:
+        ValueError: Raises exception on an unknown kind
+
+    Returns:
+        Cipher: the registered cipher
+    """
+    if kind not in ('classical', 'block'):
+        raise ValueError("Registry: kind must be 'classical' or 'block'")
+    CIPHERS[name] = Cipher(name, module, kind, crackable, keyFormat)
+    return CIPHERS[name]
+
+
+def get(name: str) -> Cipher:
+    """Returns the registered cipher
+
+    Raises:
+        ValueError: Raises exception when no cipher is registered with the name
+    """
+    cipher = CIPHERS.get(name)
+    if cipher is None:
+        raise ValueError(f"Registry: unknown cipher '{name}', one of {', '.join(CIPHERS)}")
+    return cipher
+
+
+def names(kind: str | None = None) -> list[str]:
+    """Names of the registered ciphers, of the given kind only if not None"""
+    return [name for (name, cipher) in CIPHERS.items() if kind is None or cipher.kind == kind]
+
+
+def load(name: str) -> ModuleType:
+    """Imports and returns the module of the registered cipher"""
+    return get(name).load()
+
+
+register('shift', 'Classical.ShiftCipher', crackable=True, keyFormat="k")
+register('affine', 'Classical.AffineCipher', crackable=True, keyFormat="a,b")
+register('autokey', 'Classical.AutoKeyCipher', crackable=True, keyFormat="k")
+register('hill', 'Classical.HillCipher', crackable=True, keyFormat="matrix rows separated by ';'")
+register('affine-hill', 'Classical.AffineHillCipher', keyFormat="matrix rows separated by ';', vector b as offset")
+register('spn', 'PrivateKey.SPN', 'block', keyFormat="32-bit seed key as 8 hex digits")
+register('des', 'PrivateKey.DES', 'block', keyFormat="64-bit key as 16 hex digits")
@@ -0,0 +1,394 @@
+'''
+Asyncio encryption service, exposing encrypt / decrypt of every cipher over TCP or a Unix socket.
+
+IMP points:
+
+- frames: 4 byte big-endian length of the rest of the frame, 4 byte big-endian length of the header, the JSON
+header and the payload bytes. Requests carry the header {"cipher", "action", "key", and "offset", "mode", "iv"
+where needed}, with keys in the command line format of Extras/CLI.py. Responses carry {"ok": true} and the output
+bytes, or {"ok": false, "error": message}. An "id" given in the request header is echoed in the response.
+- requests of a connection can be pipelined, the responses are written in the order of the requests.
+- the ciphers run on a bounded pool of worker processes, so the event loop never runs CPU-bound work. Every
+worker caches the parsed keys (HillKey, SPNCipher, ...) so a key is set up once per worker, not once per request.
+- concurrent small requests sharing the cipher, action and key are coalesced into a batch for a short delay and
+processed by a single worker task with encrypt_many / decrypt_many. Large requests are dispatched on their own.
+- backpressure: at most 'maxPending' requests are in flight across all the connections. Once reached, the server
+stops reading frames until responses are written, and the sockets' buffers push back on the clients.
+
+usage:
+    python -m Extras.Service --port 8765 --workers 4
+
+    async with CipherClient('127.0.0.1', 8765) as client:
+        await client.request('hill', 'encrypt', b"attack at dawn", key="3,21,20;4,15,23;6,14,5")
+'''
+import argparse, asyncio, json, os, struct
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from Extras import CLI, Registry
+
+# frames longer than this are rejected and the connection is closed
+MAX_FRAME_SIZE = 64 << 20
+
+DEFAULT_MAX_PENDING = 1024
+DEFAULT_MAX_BATCH = 256
+DEFAULT_BATCH_DELAY = 0.002    # seconds
+DEFAULT_SMALL_SIZE = 4096      # bytes, requests at least this long are not batched
+
+__length = struct.Struct('>I')
+
+
+class ServiceError(Exception):
+    """Custom error raised by the client when the service responds with an error
+
+    Args:
+        Exception (_type_): Extends class Exception
+    """
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+
+def encodeFrame(header: dict, payload: bytes = b"") -> bytes:
+    """Builds a frame from the header and the payload"""
+    head = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    return __length.pack(4 + len(head) + len(payload)) + __length.pack(len(head)) + head + payload
+
+
+async def readFrame(reader: asyncio.StreamReader) -> tuple[dict, bytes] | None:
+    """Reads the next frame of the stream
+
+    Raises:
+        ValueError: Raises exception when the frame is too long or malformed
+
+    Returns:
+        tuple[dict, bytes] | None: (header, payload), None when the stream is closed between frames
+    """
+    try:
+        (size,) = __length.unpack(await reader.readexactly(4))
+    except asyncio.IncompleteReadError:
+        return None
+    if size < 4 or size > MAX_FRAME_SIZE:
+        raise ValueError(f"invalid frame size {size}")
+    frame = await reader.readexactly(size)
+    (headSize,) = __length.unpack_from(frame)
+    if headSize > size - 4:
+        raise ValueError(f"invalid header size {headSize}")
+    return json.loads(frame[4 : 4 + headSize]), frame[4 + headSize:]
+
+
+@lru_cache(maxsize=256)
+def cipherKeys(cipher: str, key: str, offset: str | None) -> tuple:
+    """Parsed key of the cipher, cached in every worker process: the block cipher object for spn and des,
+    else the key arguments of the classical cipher functions (see CLI.classicalKeys())"""
+    if Registry.get(cipher).kind == 'block':
+        return (CLI.blockCipher(cipher, key),)
+    return CLI.classicalKeys(cipher, key, offset)
+
+
+def processBatch(spec: tuple, payloads: list[bytes]) -> list[tuple[bool, bytes | str]]:
+    """Encrypts or decrypts a batch of payloads sharing the cipher and key, in a worker process
+
+    Args:
+        spec (tuple): (cipher, action, key, offset, mode, iv) of the requests
+        payloads (list[bytes]): payload of every request
+
+    Returns:
+        list[tuple[bool, bytes | str]]: (True, output) or (False, error message) for every payload
+    """
+    (cipher, action, key, offset, mode, iv) = spec
+    encrypt = action == 'encrypt'
+    try:
+        keys = cipherKeys(cipher, key, offset)
+    except (ValueError, TypeError) as e:
+        return [(False, str(e))] * len(payloads)
+
+    if Registry.get(cipher).kind == 'block':
+        from PrivateKey import Modes
+        results = []
+        for payload in payloads:
+            try:
+                output = Modes.encrypt(payload, keys[0], mode, bytes.fromhex(iv) if iv else None) if encrypt \
+                    else Modes.decrypt(payload, keys[0], mode)
+                results.append((True, output))
+            except (ValueError, Modes.PaddingError) as e:
+                results.append((False, str(e)))
+        return results
+
+    texts = [payload.decode('ascii', 'ignore') for payload in payloads]
+    if cipher in ('hill', 'affine-hill'):
+        cipherKey = keys[0]
+        many, single = (cipherKey.encrypt_many, cipherKey.encrypt) if encrypt else (cipherKey.decrypt_many, cipherKey.decrypt)
+        try:
+            return [(True, text.encode('ascii')) for text in many(texts)]
+        except ValueError:
+            # some cipher text is not a multiple of the key dimension, every message is processed on its own
+            results = []
+            for text in texts:
+                try:
+                    results.append((True, single(text).encode('ascii')))
+                except ValueError as e:
+                    results.append((False, str(e)))
+            return results
+
+    module = Registry.load(cipher)
+    many = module.encrypt_many if encrypt else module.decrypt_many
+    return [(True, text.encode('ascii')) for text in many(texts, *keys)]
+
+
+class CipherService:
+    """Asyncio server dispatching the requests to a process pool, in batches of requests sharing the key"""
+
+    def __init__(self, workers: int | None = None, maxPending: int = DEFAULT_MAX_PENDING, maxBatch: int = DEFAULT_MAX_BATCH,
+                 batchDelay: float = DEFAULT_BATCH_DELAY, smallSize: int = DEFAULT_SMALL_SIZE) -> None:
+        """
+        Args:
+            workers (int | None, optional): number of worker processes. Defaults to None, i.e., the number of CPUs.
+            maxPending (int, optional): maximum number of requests in flight. Defaults to DEFAULT_MAX_PENDING.
+            maxBatch (int, optional): a batch is dispatched as soon as it holds these many requests. Defaults to DEFAULT_MAX_BATCH.
+            batchDelay (float, optional): seconds a batch waits for more requests. Defaults to DEFAULT_BATCH_DELAY.
+            smallSize (int, optional): requests with a payload at least this long are not batched. Defaults to DEFAULT_SMALL_SIZE.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.maxPending, self.maxBatch = maxPending, maxBatch
+        self.batchDelay, self.smallSize = batchDelay, smallSize
+        self.pool = None
+        self.server = None
+        self.__pending = None
+        self.__batches = {}    # spec -> [(payload, future)]
+        self.__connections = {}    # handler task -> (reader, writer) of its connection
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0, path: str | None = None) -> asyncio.AbstractServer:
+        """Starts the worker pool and listens on the TCP address, or on the Unix socket 'path' if given
+
+        Returns:
+            asyncio.AbstractServer: the listening server, e.g., server.sockets[0].getsockname() gives the port
+        """
+        self.pool = ProcessPoolExecutor(self.workers)
+        self.__pending = asyncio.Semaphore(self.maxPending)
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self.handle, path)
+        else:
+            self.server = await asyncio.start_server(self.handle, host, port)
+        return self.server
+
+    async def close(self) -> None:
+        """Stops listening, closes the connections once the requests already read are answered, and shuts the worker pool down"""
+        if self.server is not None:
+            self.server.close()
+            # the handlers are not awaited by the server, ending their input lets them finish instead of being cancelled
+            for (reader, writer) in self.__connections.values():
+                writer.transport.pause_reading()
+                reader.feed_eof()
+            if self.__connections:
+                await asyncio.gather(*self.__connections, return_exceptions=True)
+            await self.server.wait_closed()
+        for spec in list(self.__batches):
+            self.__flush(spec)
+        if self.pool is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.pool.shutdown)
+
+    async def __aenter__(self) -> 'CipherService':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def submit(self, spec: tuple, payload: bytes) -> asyncio.Future:
+        """Queues a request, returns the future of its (ok, output or error message) result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if len(payload) >= self.smallSize:
+            self.__dispatch(spec, [(payload, future)])
+            return future
+
+        batch = self.__batches.setdefault(spec, [])
+        batch.append((payload, future))
+        if len(batch) >= self.maxBatch:
+            self.__flush(spec)
+        elif len(batch) == 1:
+            loop.call_later(self.batchDelay, self.__flush, spec)
+        return future
+
+    def __flush(self, spec: tuple) -> None:
+        batch = self.__batches.pop(spec, None)
+        if batch:
+            self.__dispatch(spec, batch)
+
+    def __dispatch(self, spec: tuple, batch: list) -> None:
+        task = asyncio.get_running_loop().run_in_executor(self.pool, processBatch, spec, [payload for (payload, _) in batch])
+
+        def done(task: asyncio.Future) -> None:
+            if task.exception() is not None:
+                results = [(False, f"{type(task.exception()).__name__}: {task.exception()}")] * len(batch)
+            else:
+                results = task.result()
+            for ((_, future), result) in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+        task.add_done_callback(done)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serves a connection: reads the request frames and writes the responses in the same order"""
+        responses = asyncio.Queue()
+        sender = asyncio.create_task(self.__send(responses, writer))
+        self.__connections[asyncio.current_task()] = (reader, writer)
+        try:
+            while True:
+                # waits for a free slot before reading, so a saturated service stops reading from the sockets
+                await self.__pending.acquire()
+                try:
+                    frame = await readFrame(reader)
+                except (ValueError, ConnectionError, asyncio.IncompleteReadError):
+                    frame = None
+                if frame is None:
+                    self.__pending.release()
+                    break
+                (header, payload) = frame
+                await responses.put((header.get('id'), self.__request(header, payload)))
+        finally:
+            await responses.put(None)
+            await sender
+            self.__connections.pop(asyncio.current_task(), None)
+
+    def __request(self, header: dict, payload: bytes) -> asyncio.Future:
+        cipher, action = header.get('cipher'), header.get('action')
+        if cipher not in Registry.CIPHERS or action not in ('encrypt', 'decrypt') or not isinstance(header.get('key'), str):
+            future = asyncio.get_running_loop().create_future()
+            future.set_result((False, "request needs a known 'cipher', 'action' encrypt or decrypt, and a 'key' string"))
+            return future
+        spec = (cipher, action, header['key'], header.get('offset'), header.get('mode', 'CBC'), header.get('iv'))
+        return self.submit(spec, payload)
+
+    async def __send(self, responses: asyncio.Queue, writer: asyncio.StreamWriter) -> None:
+        broken = False
+        while (item := await responses.get()) is not None:
+            (requestId, future) = item
+            (ok, output) = await future
+            self.__pending.release()
+            if broken:
+                continue
+            header = {'ok': ok} if ok else {'ok': ok, 'error': output}
+            if requestId is not None:
+                header['id'] = requestId
+            try:
+                writer.write(encodeFrame(header, output if ok else b""))
+                await writer.drain()
+            except ConnectionError:
+                broken = True
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+class CipherClient:
+    """Asyncio client of the CipherService. Requests may be issued concurrently, they are pipelined on the connection."""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, path: str | None = None) -> None:
+        self.host, self.port, self.path = host, port, path
+        self.reader = self.writer = None
+        self.__waiting = None    # futures of the responses, in the order of the requests
+        self.__receiver = None
+
+    async def connect(self) -> 'CipherClient':
+        if self.path is not None:
+            self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+        else:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.__waiting = asyncio.Queue()
+        self.__receiver = asyncio.create_task(self.__receive())
+        return self
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.__receiver.cancel()
+
+    async def __aenter__(self) -> 'CipherClient':
+        return await self.connect()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def __receive(self) -> None:
+        while True:
+            future = await self.__waiting.get()
+            try:
+                frame = await readFrame(self.reader)
+            except (ValueError, ConnectionError, asyncio.IncompleteReadError) as e:
+                frame, error = None, e
+            else:
+                error = ConnectionError("connection closed by the service")
+            if frame is None:
+                future.set_exception(error)
+                while not self.__waiting.empty():
+                    self.__waiting.get_nowait().set_exception(error)
+                return
+            future.set_result(frame)
+
+    async def request(self, cipher: str, action: str, payload: bytes | str, key: str, offset: str | None = None,
+                      mode: str = 'CBC', iv: bytes | None = None) -> bytes:
+        """Encrypts or decrypts the payload on the service
+
+        Args:
+            cipher (str): cipher name, as in Registry.names()
+            action (str): 'encrypt' or 'decrypt'
+            payload (bytes | str): text (or bytes for the block ciphers) to be transformed
+            key (str): key in the command line format of the cipher
+            offset (str | None, optional): vector key b of the affine-hill cipher. Defaults to None.
+            mode (str, optional): mode of operation of the block ciphers. Defaults to 'CBC'.
+            iv (bytes | None, optional): initialization vector of the block ciphers, random if None. Defaults to None.
+
+        Raises:
+            ServiceError: Raises exception when the service could not process the request
+
+        Returns:
+            bytes: the output of the cipher
+        """
+        header = {'cipher': cipher, 'action': action, 'key': key, 'mode': mode}
+        if offset is not None:
+            header['offset'] = offset
+        if iv is not None:
+            header['iv'] = bytes(iv).hex()
+        if isinstance(payload, str):
+            payload = payload.encode('ascii', 'ignore')
+
+        future = asyncio.get_running_loop().create_future()
+        await self.__waiting.put(future)
+        self.writer.write(encodeFrame(header, payload))
+        await self.writer.drain()
+        (response, output) = await future
+        if not response.get('ok'):
+            raise ServiceError(response.get('error'))
+        return output
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, path: str | None = None, **options) -> None:
+    """Runs the service until cancelled. options are passed on to CipherService."""
+    async with CipherService(**options) as service:
+        server = await service.start(host, port, path)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="asyncio encryption service")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="listen on this Unix socket path instead of TCP")
+    parser.add_argument('--workers', type=int, help="number of worker processes, defaults to the number of CPUs")
+    parser.add_argument('--max-pending', type=int, default=DEFAULT_MAX_PENDING, help="maximum number of requests in flight")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help="maximum number of requests in a batch")
+    parser.add_argument('--batch-delay', type=float, default=DEFAULT_BATCH_DELAY, help="seconds a batch waits for more requests")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, workers=args.workers, maxPending=args.max_pending,
+                          maxBatch=args.max_batch, batchDelay=args.batch_delay))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+'''
+Chunked processing of large texts for the classical ciphers.
+
+IMP points:
+
+- the source can be a single string / bytes object, any iterable of string or bytes chunks, or a file object
+opened in binary (or text) mode.
+- every chunk is normalized to lower case letters only before being handed to the cipher transform, so the
+cipher only ever holds one chunk (plus whatever state it carries across chunks) in memory.
+- the output chunks are strings when the source yields strings, and bytes otherwise.
+'''
+from typing import Callable, Iterable, Iterator
+from Extras import Normalize
+
+# number of bytes read at once from a file object
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def readChunks(source, chunkSize: int = DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Yields the chunks of the source as they are.
+
+    Args:
+        source (str | bytes | Iterable | file object): the source to read the chunks from
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to DEFAULT_CHUNK_SIZE.
+
+    Yields:
+        str | bytes: the next chunk of the source
+    """
+    if hasattr(source, 'read'):
+        while chunk := source.read(chunkSize):
+            yield chunk
+    elif isinstance(source, (str, bytes, bytearray, memoryview)):
+        yield source
+    else:
+        yield from source
+
+
+def pipe(source: Iterable, transform: Callable[[bytes], bytes], flush: Callable[[], bytes] | None = None,
+         chunkSize: int = DEFAULT_CHUNK_SIZE) -> Iterator[str | bytes]:
+    """Normalizes each chunk of the source and passes it through the transform.
+
+    Args:
+        source (Iterable): the source of chunks, as accepted by readChunks()
+        transform (Callable[[bytes], bytes]): takes lower case ascii letters, returns the output letters.
+        Stateful ciphers keep their state between the calls themselves.
+        flush (Callable[[], bytes], optional): called once the source is exhausted to produce the trailing
+        output, e.g., a padded last block. Defaults to None.
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to DEFAULT_CHUNK_SIZE.
+
+    Yields:
+        str | bytes: non-empty output chunks. str if the source yields str, else bytes.
+    """
+    asText = False
+    for chunk in readChunks(source, chunkSize):
+        if isinstance(chunk, str):
+            asText = True
+            chunk = chunk.encode('ascii', 'ignore')
+        output = transform(Normalize.letters(chunk))
+        if output:
+            yield output.decode('ascii') if asText else output
+
+    if flush is not None:
+        output = flush()
+        if output:
+            yield output.decode('ascii') if asText else output
@@ -0,0 +1,178 @@
+'''
+Precomputed translation tables for letter substitution ciphers over Z26.
+
+IMP points:
+
+- any cipher which maps every letter to a fixed letter (shift, affine) is fully described by a 26 entry mapping.
+- the mapping is expanded once per key to a 256 entry byte table so that both cases of a letter map to the
+same lower case cipher letter.
+- bytes.translate applies the table and removes non-alphabet characters in a single pass, without any
+per-character python code.
+- large uint8 buffers (numpy arrays, memory-maps) are translated chunk by chunk into a preallocated numpy array.
+- translateFile() memory-maps the input and output files. In preserve mode the translation is length preserving,
+every byte is looked up in a case preserving table and written straight into the output mapping (or in place).
+
+- required modules
+    - numpy
+'''
+from __future__ import annotations
+import os
+from functools import lru_cache
+from Extras import Instrumentation, LazyImport, MappedFile
+np = LazyImport.module('numpy')
+
+# every byte which is not in a-z or A-Z is removed during translation
+NON_LETTERS = bytes(i for i in range(256) if not (65 <= i <= 90 or 97 <= i <= 122))
+
+# maps both 'a'+i and 'A'+i to index value i in ring Z26, and back from index value i to lower case letter 'a'+i
+LETTER_INDICES = bytes(i - 97 if 97 <= i <= 122 else i - 65 if 65 <= i <= 90 else i for i in range(256))
+INDEX_LETTERS = bytes(97 + i if i < 26 else i for i in range(256))
+
+# number of bytes translated at once by translateArray()
+CHUNK_SIZE = 1 << 20
+
+
+def buildTable(mapping: list[int]) -> bytes:
+    """Builds a byte translation table from a mapping of the ring Z26 onto itself.
+
+    Args:
+        mapping (list[int]): 26 values where letter i is mapped to letter mapping[i]
+
+    Returns:
+        bytes: 256 byte long table mapping both 'a'+i and 'A'+i to lower case letter 'a'+mapping[i]
+    """
+    table = bytearray(range(256))
+    for i in range(26):
+        table[97 + i] = table[65 + i] = 97 + mapping[i] % 26
+    return bytes(table)
+
+
+@lru_cache(maxsize=None)
+def affineTable(key_a: int, key_b: int) -> bytes:
+    """Translation table for the letter mapping x -> a * x + b (mod 26).
+    There are only 26 * 26 possible tables so every table is built once and cached.
+
+    Args:
+        key_a (int): multiplicative part of the mapping
+        key_b (int): additive part of the mapping
+
+    Returns:
+        bytes: translation table to be used with translate(), translateBytes() or translateArray()
+    """
+    return buildTable([(key_a * x + key_b) % 26 for x in range(26)])
+
+
+Instrumentation.registerCache("TranslateTable.affineTable", Instrumentation.lruCacheStats(affineTable))
+
+
+def preservingTable(table: bytes) -> bytes:
+    """Case preserving version of a table built using buildTable(): upper case letters map to the upper case
+    cipher letters, and every non-alphabet byte maps to itself (instead of being removed by NON_LETTERS).
+
+    Args:
+        table (bytes): translation table built using buildTable()
+
+    Returns:
+        bytes: 256 byte long table mapping 'a'+i to table['a'+i] and 'A'+i to its upper case
+    """
+    preserving = bytearray(table)
+    for i in range(26):
+        preserving[65 + i] = table[65 + i] - 32
+    return bytes(preserving)
+
+
+def shiftTable(key: int) -> bytes:
+    """Translation table for the letter mapping x -> x + key (mod 26)."""
+    return affineTable(1, key % 26)
+
+
+def translate(text: str, table: bytes) -> str:
+    """Applies the translation table on the text. Any non-alphabet character is removed from the text.
+
+    Args:
+        text (str): text to be translated
+        table (bytes): translation table built using buildTable()
+
+    Returns:
+        str: the translated lower case text
+    """
+    # non-ascii characters can never be letters of a-z A-Z, so they are dropped while encoding
+    return text.encode('ascii', 'ignore').translate(table, NON_LETTERS).decode('ascii')
+
+
+def translateBytes(data: bytes, table: bytes) -> bytes:
+    """Applies the translation table on the ascii encoded bytes, removing any non-alphabet byte."""
+    return bytes(data).translate(table, NON_LETTERS)
+
+
+def translateArray(buffer, table: bytes, out: np.ndarray | None = None) -> np.ndarray:
+    """Applies the translation table on a large uint8 buffer, e.g. a memory-mapped file.
+    The buffer is processed in cache sized chunks, each chunk translated using bytes.translate and written
+    directly into the output array, so that no copy of the complete buffer is ever made.
+
+    Args:
+        buffer (bytes-like | np.ndarray): ascii encoded input buffer
+        table (bytes): translation table built using buildTable()
+        out (np.ndarray, optional): preallocated uint8 output array, at least as long as the number of letters
+        in the buffer. Can be the input array itself for in-place translation. Defaults to None.
+
+    Returns:
+        np.ndarray: uint8 array (a view of 'out') containing the translated letters only
+    """
+    buffer = np.frombuffer(buffer, dtype=np.uint8) if not isinstance(buffer, np.ndarray) else buffer.reshape(-1)
+    if out is None:
+        out = np.empty(len(buffer), dtype=np.uint8)
+
+    # translated chunk is never longer than the input chunk, hence writing in-place never overtakes the reading
+    length = 0
+    for start in range(0, len(buffer), CHUNK_SIZE):
+        chunk = buffer[start : start + CHUNK_SIZE].tobytes().translate(table, NON_LETTERS)
+        out[length : length + len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+        length += len(chunk)
+
+    return out[:length]
+
+
+def translateFile(source: str, destination: str | None, table: bytes, preserve: bool = False) -> int:
+    """Applies the translation table on a file through memory-maps of the input and output files.
+    The output file is created with the size of the input file, which is its final size in preserve mode.
+    Otherwise the non-alphabet bytes are removed and the file is truncated to the number of letters written.
+
+    Args:
+        source (str): path of the input file, ascii encoded
+        destination (str | None): path of the output file. None to translate the source file in place, which
+        is only possible in preserve mode.
+        table (bytes): translation table built using buildTable()
+        preserve (bool, optional): keep the case and the non-alphabet bytes in place. Defaults to False.
+
+    Raises:
+        ValueError: Raises exception on in-place translation without preserve mode, also when destination is the source file
+
+    Returns:
+        int: size of the output file in bytes
+    """
+    if MappedFile.sameFile(source, destination):
+        # creating the destination would truncate the mapped source, the in-place path handles it
+        destination = None
+    if destination is None and not preserve:
+        raise ValueError("TranslateTable: translateFile(): in-place translation changes the file length, use preserve=True")
+
+    if destination is None:
+        buffer = out = MappedFile.load(source, writable=True)
+    else:
+        buffer = MappedFile.load(source)
+        out = MappedFile.create(destination, len(buffer))
+
+    if preserve:
+        lookup = np.frombuffer(preservingTable(table), dtype=np.uint8)
+        for start in range(0, len(buffer), CHUNK_SIZE):
+            np.take(lookup, buffer[start : start + CHUNK_SIZE], out=out[start : start + CHUNK_SIZE], mode='clip')
+        MappedFile.flush(out)
+        return len(out)
+
+    size = len(translateArray(buffer, table, out))
+    MappedFile.flush(out)
+    # the mapping is released before the file is truncated
+    del buffer, out
+    os.truncate(destination, size)
+    return size
@@ -0,0 +1,23 @@
+'''
+Helper modules shared by the ciphers: text normalization, translate tables, batching, streaming, statistics,
+matrix inversion over Zm, instrumentation, the registry of the ciphers, the command line and the service.
+
+IMP points:
+
+- submodules are imported on first use, e.g., Extras.Registry imports Extras/Registry.py when accessed, so
+importing the package costs nothing.
+'''
+import importlib
+
+__all__ = ['Batch', 'CLI', 'EnglishStatistics', 'Instrumentation', 'KeyIndex', 'LazyImport', 'MappedFile', 'MatrixInverse',
+           'Normalize', 'Registry', 'Service', 'Stream', 'TranslateTable']
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
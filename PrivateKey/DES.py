@@ -4,7 +4,315 @@
 Data Encryption Standard (DES) cipher implementation.
 Contains function to perform DES encryption and decryption on bit-streams.
 Also contains a key scheduling function to generate the round keys from the seed key
+
+- DES is a 16 round Feistel cipher on 64-bit blocks, with 48-bit round keys derived from a 56-bit key (64 bits with parity).
+- Each round computes L[i] = R[i-1], R[i] = L[i-1] XOR f(R[i-1], K[i]) where f(R, K) = P(S(E(R) XOR K)).
+- Decryption is the same process with the round keys in reverse order.
+
+The hot path works on integers with precomputed tables:
+- the substitution of each of the 8 S-boxes is combined with the P permutation into a single SP table of 64 entries.
+- the initial and final permutations are performed by 8 lookups, one per byte of the block.
+- the key schedule of a seed key is computed once and cached.
 '''
+from __future__ import annotations
+from array import array
+from functools import lru_cache
+from PrivateKey import KeySchedule
+from Extras import Instrumentation, LazyImport
+np = LazyImport.module('numpy')
+
+# all the tables use 1-based bit positions counted from the most significant bit, as in the standard
+IP = [58, 50, 42, 34, 26, 18, 10, 2,
+      60, 52, 44, 36, 28, 20, 12, 4,
+      62, 54, 46, 38, 30, 22, 14, 6,
+      64, 56, 48, 40, 32, 24, 16, 8,
+      57, 49, 41, 33, 25, 17, 9,  1,
+      59, 51, 43, 35, 27, 19, 11, 3,
+      61, 53, 45, 37, 29, 21, 13, 5,
+      63, 55, 47, 39, 31, 23, 15, 7]
+
+# final permutation is the inverse of the initial permutation
+FP = [IP.index(i) + 1 for i in range(1, 65)]
+
+# expansion of the 32-bit half block to 48 bits
+E = [32, 1,  2,  3,  4,  5,
+     4,  5,  6,  7,  8,  9,
+     8,  9,  10, 11, 12, 13,
+     12, 13, 14, 15, 16, 17,
+     16, 17, 18, 19, 20, 21,
+     20, 21, 22, 23, 24, 25,
+     24, 25, 26, 27, 28, 29,
+     28, 29, 30, 31, 32, 1]
+
+# permutation of the S-box outputs
+P = [16, 7,  20, 21, 29, 12, 28, 17,
+     1,  15, 23, 26, 5,  18, 31, 10,
+     2,  8,  24, 14, 32, 27, 3,  9,
+     19, 13, 30, 6,  22, 11, 4,  25]
+
+# S-boxes: the outer bits of the 6-bit input select the row and the inner 4 bits select the column
+S = [
+    [[14, 4, 13, 1, 2, 15, 11, 8, 3, 10, 6, 12, 5, 9, 0, 7],
+     [0, 15, 7, 4, 14, 2, 13, 1, 10, 6, 12, 11, 9, 5, 3, 8],
+     [4, 1, 14, 8, 13, 6, 2, 11, 15, 12, 9, 7, 3, 10, 5, 0],
+     [15, 12, 8, 2, 4, 9, 1, 7, 5, 11, 3, 14, 10, 0, 6, 13]],
+    [[15, 1, 8, 14, 6, 11, 3, 4, 9, 7, 2, 13, 12, 0, 5, 10],
+     [3, 13, 4, 7, 15, 2, 8, 14, 12, 0, 1, 10, 6, 9, 11, 5],
+     [0, 14, 7, 11, 10, 4, 13, 1, 5, 8, 12, 6, 9, 3, 2, 15],
+     [13, 8, 10, 1, 3, 15, 4, 2, 11, 6, 7, 12, 0, 5, 14, 9]],
+    [[10, 0, 9, 14, 6, 3, 15, 5, 1, 13, 12, 7, 11, 4, 2, 8],
+     [13, 7, 0, 9, 3, 4, 6, 10, 2, 8, 5, 14, 12, 11, 15, 1],
+     [13, 6, 4, 9, 8, 15, 3, 0, 11, 1, 2, 12, 5, 10, 14, 7],
+     [1, 10, 13, 0, 6, 9, 8, 7, 4, 15, 14, 3, 11, 5, 2, 12]],
+    [[7, 13, 14, 3, 0, 6, 9, 10, 1, 2, 8, 5, 11, 12, 4, 15],
+     [13, 8, 11, 5, 6, 15, 0, 3, 4, 7, 2, 12, 1, 10, 14, 9],
+     [10, 6, 9, 0, 12, 11, 7, 13, 15, 1, 3, 14, 5, 2, 8, 4],
+     [3, 15, 0, 6, 10, 1, 13, 8, 9, 4, 5, 11, 12, 7, 2, 14]],
+    [[2, 12, 4, 1, 7, 10, 11, 6, 8, 5, 3, 15, 13, 0, 14, 9],
+     [14, 11, 2, 12, 4, 7, 13, 1, 5, 0, 15, 10, 3, 9, 8, 6],
+     [4, 2, 1, 11, 10, 13, 7, 8, 15, 9, 12, 5, 6, 3, 0, 14],
+     [11, 8, 12, 7, 1, 14, 2, 13, 6, 15, 0, 9, 10, 4, 5, 3]],
+    [[12, 1, 10, 15, 9, 2, 6, 8, 0, 13, 3, 4, 14, 7, 5, 11],
+     [10, 15, 4, 2, 7, 12, 9, 5, 6, 1, 13, 14, 0, 11, 3, 8],
+     [9, 14, 15, 5, 2, 8, 12, 3, 7, 0, 4, 10, 1, 13, 11, 6],
+     [4, 3, 2, 12, 9, 5, 15, 10, 11, 14, 1, 7, 6, 0, 8, 13]],
+    [[4, 11, 2, 14, 15, 0, 8, 13, 3, 12, 9, 7, 5, 10, 6, 1],
+     [13, 0, 11, 7, 4, 9, 1, 10, 14, 3, 5, 12, 2, 15, 8, 6],
+     [1, 4, 11, 13, 12, 3, 7, 14, 10, 15, 6, 8, 0, 5, 9, 2],
+     [6, 11, 13, 8, 1, 4, 10, 7, 9, 5, 0, 15, 14, 2, 3, 12]],
+    [[13, 2, 8, 4, 6, 15, 11, 1, 10, 9, 3, 14, 5, 0, 12, 7],
+     [1, 15, 13, 8, 10, 3, 7, 4, 12, 5, 6, 11, 0, 14, 9, 2],
+     [7, 11, 4, 1, 9, 12, 14, 2, 0, 6, 10, 13, 15, 3, 5, 8],
+     [2, 1, 14, 7, 4, 10, 8, 13, 15, 12, 9, 0, 3, 5, 6, 11]],
+]
+
+# permuted choice 1 selects 56 bits of the 64-bit key, dropping the parity bits
+PC1 = [57, 49, 41, 33, 25, 17, 9,
+       1,  58, 50, 42, 34, 26, 18,
+       10, 2,  59, 51, 43, 35, 27,
+       19, 11, 3,  60, 52, 44, 36,
+       63, 55, 47, 39, 31, 23, 15,
+       7,  62, 54, 46, 38, 30, 22,
+       14, 6,  61, 53, 45, 37, 29,
+       21, 13, 5,  28, 20, 12, 4]
+
+# permuted choice 2 selects the 48-bit round key from the 56-bit C, D registers
+PC2 = [14, 17, 11, 24, 1,  5,
+       3,  28, 15, 6,  21, 10,
+       23, 19, 12, 4,  26, 8,
+       16, 7,  27, 20, 13, 2,
+       41, 52, 31, 37, 47, 55,
+       30, 40, 51, 45, 33, 48,
+       44, 49, 39, 56, 34, 53,
+       46, 42, 50, 36, 29, 32]
+
+# left rotations of the C, D registers before each round
+SHIFTS = [1, 1, 2, 2, 2, 2, 2, 2, 1, 2, 2, 2, 2, 2, 2, 1]
+
+
+def __permute(x: int, table: list[int], n: int) -> int:
+    # bit i of the output is bit table[i] of the n-bit input x
+    y = 0
+    for position in table:
+        y = (y << 1) | ((x >> (n - position)) & 1)
+    return y
+
+
+def __byteTables(table: list[int]) -> list[array]:
+    # T[b][v] is the permuted 64-bit block when byte b of the input is v and all other bytes are 0
+    return [ array('Q', [__permute(v << (56 - 8*b), table, 64) for v in range(256)]) for b in range(8) ]
+
+
+def __spTables() -> list[array]:
+    # SP[i][a] is P applied on the output of S-box i for the 6-bit input a, with all other S-box outputs 0
+    tables = []
+    for i in range(8):
+        table = array('I')
+        for a in range(64):
+            row, col = ((a >> 4) & 2) | (a & 1), (a >> 1) & 15
+            table.append( __permute(S[i][row][col] << (28 - 4*i), P, 32) )
+        tables.append(table)
+    return tables
+
+
+IP_TABLES = __byteTables(IP)
+FP_TABLES = __byteTables(FP)
+SP_TABLES = __spTables()
+
+
+def __expandKey(key: int) -> tuple[int]:
+    # 16 round keys of 48 bits for the 64-bit key
+    cd = __permute(key, PC1, 64)
+    c, d = cd >> 28, cd & 0xFFFFFFF
+
+    roundKeys = []
+    for shift in SHIFTS:
+        c = ((c << shift) | (c >> (28 - shift))) & 0xFFFFFFF
+        d = ((d << shift) | (d >> (28 - shift))) & 0xFFFFFFF
+        roundKeys.append( __permute((c << 28) | d, PC2, 56) )
+
+    return tuple(roundKeys)
+
+
+def keySchedule(key: int) -> tuple[int]:
+    """16 round keys of 48 bits for the 64-bit key given as integer. Computed once and cached per key."""
+    return KeySchedule.CACHES['DES'].get(key, __expandKey)
+
+
+class DESCipher:
+    """DES cipher for a fixed key, with the round keys expanded once at construction.
+    Has the same block interface as the SPNCipher, so it can be used with the modes of operation.
+    """
+    __slots__ = ('blockLength', 'blockSize', '__encK', '__decK')
+
+    # messages with at least these many blocks are encrypted with the batched numpy rounds
+    BATCH_THRESHOLD = 64
+
+    def __init__(self, key: bytes | str | list[str]) -> None:
+        """
+        Args:
+            key (bytes | str | list[str]): 8 byte key, 64-bit seed key bit sequence, or the 16 round keys list
+
+        Raises:
+            ValueError: Raises exception when the key is None or not of valid length
+        """
+        roundKeys = self.__expand(key)
+        self.blockLength, self.blockSize = 64, 8
+        # round keys are split into the 6-bit groups matching the S-boxes
+        split = lambda k: tuple( (k >> (42 - 6*i)) & 63 for i in range(8) )
+        self.__encK = tuple( split(k) for k in roundKeys )
+        self.__decK = self.__encK[::-1]
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def __batchTables() -> tuple[list[np.ndarray]]:
+        # numpy copies of the permutation and SP tables, built on first use of the batched rounds
+        as_arrays = lambda tables: [np.array(t, dtype=np.uint64) for t in tables]
+        return as_arrays(IP_TABLES), as_arrays(FP_TABLES), as_arrays(SP_TABLES)
+
+    @staticmethod
+    def __expand(key: bytes | str | list[str]) -> tuple[int]:
+        # round keys from an 8 byte key, a 64-bit bitstream key or the list of 48-bit round keys
+        if key is None:
+            # getKeySchedule() of a seed key which is not 64 bits long
+            raise ValueError("DES requires 16 round keys, got None")
+        if isinstance(key, (list, tuple)):
+            if len(key) != 16 or any(len(k) != 48 for k in key):
+                raise ValueError("DES requires 16 round keys of 48 bits")
+            return tuple(int(k, 2) for k in key)
+        if isinstance(key, str):
+            if len(key) != 64:
+                raise ValueError("DES seed key must be 64 bits long")
+            return keySchedule(int(key, 2))
+        if len(key) != 8:
+            raise ValueError("DES key must be 8 bytes long")
+        return keySchedule(int.from_bytes(key, 'big'))
+
+
+    @staticmethod
+    def __feistel(block: int, roundKeys: tuple[tuple[int]]) -> int:
+        # initial permutation, 16 rounds, swap of the halves and final permutation on a 64-bit integer block
+        ip, fp, sp = IP_TABLES, FP_TABLES, SP_TABLES
+
+        x = 0
+        for b in range(8):
+            x |= ip[b][(block >> (56 - 8*b)) & 0xFF]
+        l, r = x >> 32, x & 0xFFFFFFFF
+
+        for k in roundKeys:
+            # E(R) as a 34-bit value R[32] R[1] ... R[32] R[1], its 6-bit groups are 4 bits apart
+            e = ((r & 1) << 33) | (r << 1) | (r >> 31)
+            f = ( sp[0][((e >> 28) & 63) ^ k[0]] | sp[1][((e >> 24) & 63) ^ k[1]]
+                | sp[2][((e >> 20) & 63) ^ k[2]] | sp[3][((e >> 16) & 63) ^ k[3]]
+                | sp[4][((e >> 12) & 63) ^ k[4]] | sp[5][((e >> 8) & 63) ^ k[5]]
+                | sp[6][((e >> 4) & 63) ^ k[6]] | sp[7][(e & 63) ^ k[7]] )
+            l, r = r, l ^ f
+
+        x = (r << 32) | l
+        y = 0
+        for b in range(8):
+            y |= fp[b][(x >> (56 - 8*b)) & 0xFF]
+        return y
+
+
+    @staticmethod
+    def __feistelBatch(blocks: np.ndarray, roundKeys: tuple[tuple[int]]) -> np.ndarray:
+        # same as __feistel() with every operation applied on all the blocks at once
+        ip, fp, sp = DESCipher.__batchTables()
+        u = np.uint64
+
+        blocks = np.asarray(blocks).astype(np.uint64)
+        x = np.zeros_like(blocks)
+        for b in range(8):
+            x |= ip[b].take( ((blocks >> u(56 - 8*b)) & u(0xFF)).astype(np.intp) )
+        l, r = x >> u(32), x & u(0xFFFFFFFF)
+
+        for k in roundKeys:
+            e = ((r & u(1)) << u(33)) | (r << u(1)) | (r >> u(31))
+            f = np.zeros_like(r)
+            for i in range(8):
+                f |= sp[i].take( (((e >> u(28 - 4*i)) & u(63)) ^ u(k[i])).astype(np.intp) )
+            l, r = r, l ^ f
+
+        x = (r << u(32)) | l
+        y = np.zeros_like(x)
+        for b in range(8):
+            y |= fp[b].take( ((x >> u(56 - 8*b)) & u(0xFF)).astype(np.intp) )
+        return y
+
+
+    def encrypt_block(self, x: int) -> int:
+        """Encrypts a single 64-bit block given as integer"""
+        return self.__feistel(x, self.__encK)
+
+    def decrypt_block(self, y: int) -> int:
+        """Decrypts a single 64-bit block given as integer"""
+        return self.__feistel(y, self.__decK)
+
+    def encrypt_batch(self, x: np.ndarray) -> np.ndarray:
+        """Encrypts an array of 64-bit blocks, processing all the blocks in each round at once"""
+        return self.__feistelBatch(x, self.__encK)
+
+    def decrypt_batch(self, y: np.ndarray) -> np.ndarray:
+        """Decrypts an array of 64-bit blocks, processing all the blocks in each round at once"""
+        return self.__feistelBatch(y, self.__decK)
+
+    def encrypt(self, x: str | bytes) -> str | bytes:
+        """Encrypts a bit-stream string or a byte string block by block.
+        If length is not a multiple of 64 bits, message is padded with 0s at beginning.
+        """
+        if isinstance(x, str):
+            x = "0" * (-len(x) % 64) + x
+            return self.__bits(x, self.__encK)
+        return self.__bytes(bytes(-len(x) % 8) + bytes(x), self.__encK, 'DESCipher.encrypt')
+
+    def decrypt(self, y: str | bytes) -> str | bytes:
+        """Decrypts a bit-stream string or a byte string block by block.
+
+        Raises:
+            ValueError: Raises exception when the message is not made of complete 64-bit blocks
+        """
+        if len(y) % (64 if isinstance(y, str) else 8) != 0:
+            raise ValueError("DES encrypted message length must be a multiple of 64 bits")
+        if isinstance(y, str):
+            return self.__bits(y, self.__decK)
+        return self.__bytes(bytes(y), self.__decK, 'DESCipher.decrypt')
+
+    def __bits(self, x: str, roundKeys: tuple) -> str:
+        return ''.join( format(self.__feistel(int(x[i : i + 64], 2), roundKeys), "064b") for i in range(0, len(x), 64) )
+
+    def __bytes(self, x: bytes, roundKeys: tuple, name: str) -> bytes:
+        with Instrumentation.call(name, len(x)) as call:
+            if len(x) >= 8 * self.BATCH_THRESHOLD:
+                with call.stage('normalize'):
+                    blocks = np.frombuffer(x, dtype='>u8')
+                with call.stage('transform'):
+                    blocks = self.__feistelBatch(blocks, roundKeys)
+                with call.stage('output'):
+                    return blocks.astype('>u8').tobytes()
+
+            with call.stage('transform'):
+                return b''.join( self.__feistel(int.from_bytes(x[i : i + 8], 'big'), roundKeys).to_bytes(8, 'big') for i in range(0, len(x), 8) )
 
 
 def getKeySchedule(seedKey: str) -> list[str] | None:
@@ -16,7 +324,9 @@ def getKeySchedule(seedKey: str) -> list[str] | None:
     Returns:
         list[str]: returns the list of round keys generated by the key schedule
     """
-    pass
+    if len(seedKey) != 64:
+        return None
+    return [ format(k, "048b") for k in keySchedule(int(seedKey, 2)) ]
 
 
 def encrypt(x: str, Kr: list[str]) -> str:
@@ -26,10 +336,17 @@ def encrypt(x: str, Kr: list[str]) -> str:
         x (str): bitstream to perform encryption on
         Kr (list[str]): The list of the round keys
 
+    Raises:
+        ValueError: Raises exception when Kr is not a list of 16 round keys of 48 bits, e.g., None from getKeySchedule()
+
     Returns:
         str: returns encrypted bitstream on success
     """
-    pass
+    with Instrumentation.call('DES.encrypt', len(x)) as call:
+        with call.stage('key setup'):
+            cipher = DESCipher(Kr)
+        with call.stage('transform'):
+            return cipher.encrypt(x)
 
 
 def decrypt(y: str, Kr: list[str]) -> str:
@@ -39,15 +356,60 @@ def decrypt(y: str, Kr: list[str]) -> str:
         y (str): bitstream to perform decryption on
         Kr (list[str]): The list of the round keys
 
+    Raises:
+        ValueError: Raises exception when Kr is not a list of 16 round keys of 48 bits, e.g., None from getKeySchedule()
+
     Returns:
         str: returns decrypted bitstream on success
     """
-    pass
+    with Instrumentation.call('DES.decrypt', len(y)) as call:
+        with call.stage('key setup'):
+            cipher = DESCipher(Kr)
+        with call.stage('transform'):
+            return cipher.decrypt(y)
+
+
+def encryptBytes(x: bytes, key: bytes) -> bytes:
+    """performs the DES encryption operation block by block on the bytes x using the 8 byte key"""
+    with Instrumentation.call('DES.encryptBytes', len(x)) as call:
+        with call.stage('key setup'):
+            cipher = DESCipher(key)
+        return cipher.encrypt(bytes(x))
+
+
+def decryptBytes(y: bytes, key: bytes) -> bytes:
+    """performs the DES decryption operation block by block on the bytes y using the 8 byte key"""
+    with Instrumentation.call('DES.decryptBytes', len(y)) as call:
+        with call.stage('key setup'):
+            cipher = DESCipher(key)
+        return cipher.decrypt(bytes(y))
 
 
 def __main__():
-    pass
-    
+    # published test vectors: (key, plain text, cipher text)
+    vectors = [
+        ("133457799BBCDFF1", "0123456789ABCDEF", "85E813540F0AB405"),
+        ("0123456789ABCDEF", "4E6F772069732074", "3FA40E8A984D4815"),
+        ("0E329232EA6D0D73", "8787878787878787", "0000000000000000"),
+        ("0101010101010101", "8000000000000000", "95F8A5E5DD31D900"),
+    ]
+
+    for (key, x, y_expected) in vectors:
+        Kr = getKeySchedule(format(int(key, 16), "064b"))
+        y = format(int(encrypt(format(int(x, 16), "064b"), Kr), 2), "016X")
+        print("x  :", x)
+        print("y* :", y_expected)
+        print("y  :", y)
+        assert y == y_expected, f"DES: E({x}) under key {key} is {y}, expected {y_expected}"
+        assert decrypt(format(int(y, 16), "064b"), Kr) == format(int(x, 16), "064b"), f"DES: D({y}) under key {key} is not {x}"
+
+        # byte interface and cipher object, encrypting the same block
+        cipher = DESCipher(bytes.fromhex(key))
+        assert encryptBytes(bytes.fromhex(x), bytes.fromhex(key)).hex().upper() == y_expected, f"DES: encryptBytes({x}) under key {key}"
+        assert decryptBytes(bytes.fromhex(y_expected), bytes.fromhex(key)).hex().upper() == x, f"DES: decryptBytes({y_expected}) under key {key}"
+        assert cipher.encrypt(bytes.fromhex(x)).hex().upper() == y_expected, f"DES: DESCipher.encrypt({x}) under key {key}"
+    print("DES: all test vectors passed")
+
 
 if __name__ == "__main__":
     __main__()
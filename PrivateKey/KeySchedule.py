@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+'''
+Cached key schedules for the private key ciphers.
+- Expanding a seed key into the round keys is deterministic, so the round keys of frequently used seed keys are
+kept in a bounded least-recently-used (LRU) cache instead of being recomputed on every call.
+- Each cipher has its own cache. The caches count hits, misses and evictions to tell how effective they are.
+'''
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Hashable
+from Extras import Instrumentation
+
+# number of key schedules kept per cipher by default
+DEFAULT_MAX_SIZE = 4096
+
+
+class KeyScheduleCache:
+    """Bounded LRU cache mapping a seed key to its key schedule.
+    Once the cache is full, the least recently used schedule is evicted to make space for the new one.
+    """
+    __slots__ = ('maxSize', 'hits', 'misses', 'evictions', '__schedules', '__lock')
+
+    def __init__(self, maxSize: int = DEFAULT_MAX_SIZE) -> None:
+        """
+        Args:
+            maxSize (int, optional): maximum number of schedules kept. Defaults to DEFAULT_MAX_SIZE.
+
+        Raises:
+            ValueError: Raises exception when maxSize is not positive
+        """
+        if maxSize < 1:
+            raise ValueError("key schedule cache must be able to hold at least one schedule")
+        self.maxSize = maxSize
+        self.hits = self.misses = self.evictions = 0
+        self.__schedules = OrderedDict()
+        self.__lock = Lock()
+
+    def get(self, seedKey: Hashable, expand: Callable):
+        """Returns the key schedule of the seed key, computing it with expand(seedKey) if it is not cached.
+
+        Args:
+            seedKey (Hashable): the seed key, along with any parameter of the schedule
+            expand (Callable): function generating the key schedule from the seed key
+
+        Returns:
+            the key schedule returned by expand
+        """
+        with self.__lock:
+            schedule = self.__schedules.get(seedKey)
+            if schedule is not None:
+                self.hits += 1
+                self.__schedules.move_to_end(seedKey)
+                return schedule
+            self.misses += 1
+
+        # expanding outside the lock, so that other keys can be looked up meanwhile
+        schedule = expand(seedKey)
+
+        with self.__lock:
+            self.__schedules[seedKey] = schedule
+            self.__schedules.move_to_end(seedKey)
+            while len(self.__schedules) > self.maxSize:
+                self.__schedules.popitem(last=False)
+                self.evictions += 1
+        return schedule
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns the size of the cache along with the hit, miss and eviction counts and the hit rate"""
+        with self.__lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self.__schedules), 'maxSize': self.maxSize, 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'hitRate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self) -> None:
+        """Removes all the cached schedules and resets the counters"""
+        with self.__lock:
+            self.__schedules.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.__schedules)
+
+
+# caches of the key schedules of each cipher, by cipher name
+CACHES = {
+    'SPN': KeyScheduleCache(),
+    'DES': KeyScheduleCache(),
+}
+for (name, cache) in CACHES.items():
+    Instrumentation.registerCache(f"KeySchedule.{name}", cache.stats)
+
+
+def __main__():
+    cache = KeyScheduleCache(maxSize=2)
+    for seedKey in [1, 2, 1, 3, 2]:
+        cache.get(seedKey, lambda key: [key] * 4)
+    print(cache.stats())
+
+
+if __name__ == "__main__":
+    __main__()
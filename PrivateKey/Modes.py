@@ -0,0 +1,528 @@
+#!/usr/bin/env python
+
+'''
+Block cipher modes of operation over the byte oriented block ciphers (SPN, DES).
+- ECB: every block is encrypted independently. Identical plain blocks give identical cipher blocks.
+- CBC: every plain block is XORed with the previous cipher block before encryption, i.e., c[i] = E(p[i] XOR c[i-1]).
+- CTR: the cipher encrypts successive counter blocks and the result is XORed with the message, i.e., c[i] = p[i] XOR E(iv + i).
+
+- ECB and CBC messages are padded as per PKCS#7, i.e., with n bytes of value n, so that the padding can always be removed.
+- CBC and CTR prepend the initialization vector (or initial counter) to the cipher text.
+- The block cipher is any object with 'blockSize' (in bytes, at most 8), 'encrypt_block', 'decrypt_block',
+'encrypt_batch' and 'decrypt_batch' like the SPNCipher. Its 'blockLength' in bits, if given, must be 8 * blockSize.
+
+Every step except CBC encryption works on independent blocks, and so large inputs can be split into shards
+and processed on multiple cores using a process (or thread) pool.
+
+encrypt_stream() and decrypt_stream() produce the same output as encrypt() and decrypt() chunk by chunk,
+carrying the chaining value (CBC) or the counter (CTR) across the chunks, so inputs of any size can be processed.
+encrypt_file() and decrypt_file() do the same on memory-mapped files. The output size is known before anything is
+written (the padding of ECB / CBC cipher text is read from its last block first), so the output file is created
+at its final size and the blocks are read from and written to the mappings through numpy views.
+'''
+from __future__ import annotations
+import os
+from typing import Iterator
+from Extras import LazyImport, MappedFile, Stream
+np = LazyImport.module('numpy')
+
+MODES = ('ECB', 'CBC', 'CTR')
+
+# inputs are sharded across the pool only when every worker gets at least these many blocks
+MIN_SHARD_BLOCKS = 1 << 14
+
+# number of blocks of a memory-mapped file transformed at once by encrypt_file() and decrypt_file()
+FILE_CHUNK_BLOCKS = 1 << 17
+
+# big-endian integer types, to view the bytes of a file as blocks without copying them
+BLOCK_DTYPES = {1: '>u1', 2: '>u2', 4: '>u4', 8: '>u8'}
+
+
+class PaddingError(Exception):
+    """Custom error raised when the decrypted message does not end with valid PKCS#7 padding
+
+    Args:
+        Exception (_type_): Extends class Exception
+    """
+    def __init__(self, *args: object) -> None:
+        super().__init__(*args)
+
+
+def pad(x: bytes, blockSize: int) -> bytes:
+    """Pads the message to a multiple of block size with n bytes of value n (PKCS#7). A full block is added if already aligned."""
+    n = blockSize - len(x) % blockSize
+    return bytes(x) + bytes([n]) * n
+
+
+def unpad(x: bytes, blockSize: int) -> bytes:
+    """Removes the PKCS#7 padding from the message
+
+    Raises:
+        PaddingError: Raises exception when the message is not correctly padded
+    """
+    if len(x) == 0 or len(x) % blockSize != 0:
+        raise PaddingError("padded message length must be a non-zero multiple of the block size")
+    n = x[-1]
+    if n < 1 or n > blockSize or x[-n:] != bytes([n]) * n:
+        raise PaddingError("message does not end with a valid padding")
+    return x[:-n]
+
+
+def toBlocks(x: bytes, blockSize: int) -> np.ndarray:
+    """Converts the message to an array of big-endian integer blocks. Length of x must be a multiple of block size."""
+    data = np.frombuffer(x, dtype=np.uint8).reshape(-1, blockSize).astype(np.uint64)
+    blocks = np.zeros(len(data), dtype=np.uint64)
+    for i in range(blockSize):
+        blocks = (blocks << np.uint64(8)) | data[:, i]
+    return blocks
+
+
+def fromBlocks(blocks: np.ndarray, blockSize: int) -> bytes:
+    """Converts an array of integer blocks back to the big-endian byte string"""
+    shifts = np.arange(8 * (blockSize - 1), -1, -8, dtype=np.uint64)
+    return ((blocks.astype(np.uint64)[:, None] >> shifts) & np.uint64(0xFF)).astype(np.uint8).tobytes()
+
+
+def __apply(cipher, blocks: np.ndarray, decrypt: bool) -> np.ndarray:
+    return cipher.decrypt_batch(blocks) if decrypt else cipher.encrypt_batch(blocks)
+
+
+def __parallel(cipher, blocks: np.ndarray, decrypt: bool, workers: int, threads: bool) -> np.ndarray:
+    # splits the blocks into one contiguous shard per worker, and puts the results back together in order
+    if workers <= 1 or len(blocks) < workers * MIN_SHARD_BLOCKS:
+        return __apply(cipher, blocks, decrypt)
+
+    from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+    shards = np.array_split(blocks, workers)
+    pool: Executor = ThreadPoolExecutor(workers) if threads else ProcessPoolExecutor(workers)
+    with pool:
+        results = pool.map(__apply, [cipher] * workers, shards, [decrypt] * workers)
+        return np.concatenate(list(results))
+
+
+def __counters(iv: bytes, count: int, blockSize: int, offset: int = 0) -> np.ndarray:
+    # counter blocks iv + offset, iv + offset + 1, ... wrapping around modulo 2^(8 * blockSize)
+    start = np.uint64((int.from_bytes(iv, 'big') + offset) % 2**(8 * blockSize))
+    counters = np.arange(count, dtype=np.uint64) + start
+    if blockSize < 8:
+        counters &= np.uint64(2**(8 * blockSize) - 1)
+    return counters
+
+
+def __ctr(cipher, x: bytes, iv: bytes, offset: int, workers: int, threads: bool) -> bytes:
+    # XORs the message with the keystream E(iv + offset), E(iv + offset + 1), ... (same for encryption and decryption)
+    n = cipher.blockSize
+    keystream = __parallel(cipher, __counters(iv, -(-len(x) // n), n, offset), False, workers, threads)
+    return (np.frombuffer(x, dtype=np.uint8) ^ np.frombuffer(fromBlocks(keystream, n), dtype=np.uint8)[: len(x)]).tobytes()
+
+
+def __cbcEncrypt(cipher, blocks: np.ndarray, previous: int) -> np.ndarray:
+    # CBC encryption is inherently sequential as each block depends on the previous cipher block
+    blocks = blocks.tolist()
+    for i in range(len(blocks)):
+        previous = blocks[i] = cipher.encrypt_block(blocks[i] ^ previous)
+    return np.array(blocks, dtype=np.uint64)
+
+
+def __checkMode(mode: str) -> str:
+    mode = mode.upper()
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    return mode
+
+
+def __checkCipher(cipher) -> int:
+    # block size in bytes, the blocks are read from and written to whole bytes so no bit of a block may be left over
+    n = cipher.blockSize
+    if getattr(cipher, 'blockLength', 8 * n) != 8 * n:
+        raise ValueError("block length of the cipher must be a multiple of 8 bits")
+    return n
+
+
+def encrypt(x: bytes, cipher, mode: str = 'CBC', iv: bytes | None = None, workers: int = 1, threads: bool = False) -> bytes:
+    """Encrypts the message using the block cipher in the given mode of operation
+
+    Args:
+        x (bytes): message to be encrypted
+        cipher: block cipher object, e.g., SPNCipher
+        mode (str, optional): one of 'ECB', 'CBC' and 'CTR'. Defaults to 'CBC'.
+        iv (bytes | None, optional): initialization vector (initial counter for CTR) of block size. Randomly generated if None.
+        workers (int, optional): number of workers to shard ECB and CTR encryption across. Defaults to 1.
+        threads (bool, optional): use a thread pool instead of a process pool. Defaults to False.
+
+    Raises:
+        ValueError: Raises exception on unknown mode, block length not a multiple of 8 bits, or invalid initialization vector length
+
+    Returns:
+        bytes: cipher text, preceded by the initialization vector for CBC and CTR
+    """
+    mode = __checkMode(mode)
+    n = __checkCipher(cipher)
+    if mode == 'ECB':
+        blocks = toBlocks(pad(x, n), n)
+        return fromBlocks(__parallel(cipher, blocks, False, workers, threads), n)
+
+    iv = os.urandom(n) if iv is None else bytes(iv)
+    if len(iv) != n:
+        raise ValueError("initialization vector must be of block size")
+
+    if mode == 'CTR':
+        return iv + __ctr(cipher, x, iv, 0, workers, threads)
+
+    return iv + fromBlocks(__cbcEncrypt(cipher, toBlocks(pad(x, n), n), int.from_bytes(iv, 'big')), n)
+
+
+def decrypt(y: bytes, cipher, mode: str = 'CBC', workers: int = 1, threads: bool = False) -> bytes:
+    """Decrypts the cipher text produced by encrypt() using the same block cipher and mode of operation
+
+    Args:
+        y (bytes): cipher text, preceded by the initialization vector for CBC and CTR
+        cipher: block cipher object, e.g., SPNCipher
+        mode (str, optional): one of 'ECB', 'CBC' and 'CTR'. Defaults to 'CBC'.
+        workers (int, optional): number of workers to shard the decryption across. Defaults to 1.
+        threads (bool, optional): use a thread pool instead of a process pool. Defaults to False.
+
+    Raises:
+        ValueError: Raises exception on unknown mode, block length not a multiple of 8 bits, or cipher text of invalid length
+        PaddingError: Raises exception when the decrypted message is not correctly padded (ECB, CBC)
+
+    Returns:
+        bytes: decrypted message
+    """
+    mode = __checkMode(mode)
+    n = __checkCipher(cipher)
+    if mode != 'ECB':
+        if len(y) < n:
+            raise ValueError("cipher text is too short to contain the initialization vector")
+        iv, y = y[:n], y[n:]
+
+    if mode == 'CTR':
+        return __ctr(cipher, y, iv, 0, workers, threads)
+
+    if len(y) % n != 0:
+        raise ValueError("cipher text length must be a multiple of the block size")
+    blocks = toBlocks(y, n)
+    x = __parallel(cipher, blocks, True, workers, threads)
+
+    if mode == 'CBC':
+        # p[i] = D(c[i]) XOR c[i-1], all the cipher blocks are known so every block is independent
+        previous = np.concatenate( (toBlocks(iv, n), blocks[:-1]) )
+        x ^= previous
+
+    return unpad(fromBlocks(x, n), n)
+
+
+def encrypt_stream(source, cipher, mode: str = 'CBC', iv: bytes | None = None, workers: int = 1, threads: bool = False,
+                   chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encrypts the message chunk by chunk, holding only a single chunk in memory at a time.
+    The concatenated output is the same as encrypt() of the whole message.
+
+    Args:
+        source (bytes | Iterable[bytes] | file object): message, iterable of message chunks or a binary file object
+        cipher: block cipher object, e.g., SPNCipher
+        mode (str, optional): one of 'ECB', 'CBC' and 'CTR'. Defaults to 'CBC'.
+        iv (bytes | None, optional): initialization vector (initial counter for CTR) of block size. Randomly generated if None.
+        workers (int, optional): number of workers to shard ECB and CTR encryption of every chunk across. Defaults to 1.
+        threads (bool, optional): use a thread pool instead of a process pool. Defaults to False.
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Raises:
+        ValueError: Raises exception on unknown mode, block length not a multiple of 8 bits, or invalid initialization vector length
+
+    Returns:
+        Iterator[bytes]: generator of the cipher text chunks, the initialization vector first for CBC and CTR
+    """
+    mode = __checkMode(mode)
+    n = __checkCipher(cipher)
+    if mode == 'ECB':
+        iv = None    # ignored as in encrypt(), nothing is written ahead of the cipher text
+    else:
+        iv = os.urandom(n) if iv is None else bytes(iv)
+        if len(iv) != n:
+            raise ValueError("initialization vector must be of block size")
+    return __encryptChunks(source, cipher, mode, iv, workers, threads, chunkSize)
+
+
+def __encryptChunks(source, cipher, mode: str, iv: bytes | None, workers: int, threads: bool, chunkSize: int) -> Iterator[bytes]:
+    n = cipher.blockSize
+    if iv is not None:
+        yield iv
+    previous = int.from_bytes(iv, 'big') if mode == 'CBC' else 0
+    offset, pending = 0, b""    # offset of the next CTR counter, bytes of the incomplete block
+
+    for chunk in Stream.readChunks(source, chunkSize):
+        x = pending + bytes(chunk)
+        end = len(x) - len(x) % n
+        x, pending = x[:end], x[end:]
+        if not x:
+            continue
+        if mode == 'CTR':
+            yield __ctr(cipher, x, iv, offset, workers, threads)
+            offset += end // n
+        elif mode == 'CBC':
+            blocks = __cbcEncrypt(cipher, toBlocks(x, n), previous)
+            previous = int(blocks[-1])
+            yield fromBlocks(blocks, n)
+        else:
+            yield fromBlocks(__parallel(cipher, toBlocks(x, n), False, workers, threads), n)
+
+    # the last incomplete block is padded (ECB, CBC) or XORed with a truncated keystream block (CTR)
+    if mode == 'CTR':
+        if pending:
+            yield __ctr(cipher, pending, iv, offset, 1, threads)
+    elif mode == 'CBC':
+        yield fromBlocks(__cbcEncrypt(cipher, toBlocks(pad(pending, n), n), previous), n)
+    else:
+        yield fromBlocks(__apply(cipher, toBlocks(pad(pending, n), n), False), n)
+
+
+def decrypt_stream(source, cipher, mode: str = 'CBC', workers: int = 1, threads: bool = False,
+                   chunkSize: int = Stream.DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Decrypts the cipher text produced by encrypt() or encrypt_stream() chunk by chunk, holding only a single chunk
+    in memory at a time. The last block is held back until the end of the source so that its padding can be removed.
+
+    Args:
+        source (bytes | Iterable[bytes] | file object): cipher text, iterable of cipher text chunks or a binary file object
+        cipher: block cipher object, e.g., SPNCipher
+        mode (str, optional): one of 'ECB', 'CBC' and 'CTR'. Defaults to 'CBC'.
+        workers (int, optional): number of workers to shard the decryption of every chunk across. Defaults to 1.
+        threads (bool, optional): use a thread pool instead of a process pool. Defaults to False.
+        chunkSize (int, optional): size of the chunks read from a file object. Defaults to Stream.DEFAULT_CHUNK_SIZE.
+
+    Raises:
+        ValueError: Raises exception on unknown mode or block length not a multiple of 8 bits, and at the end of the stream on cipher text of invalid length
+        PaddingError: Raises exception at the end of the stream when the message is not correctly padded (ECB, CBC)
+
+    Returns:
+        Iterator[bytes]: generator of the message chunks
+    """
+    mode = __checkMode(mode)
+    __checkCipher(cipher)
+    return __decryptChunks(source, cipher, mode, workers, threads, chunkSize)
+
+
+def __decryptChunks(source, cipher, mode: str, workers: int, threads: bool, chunkSize: int) -> Iterator[bytes]:
+    n = cipher.blockSize
+    iv, previous = None, None
+    offset, pending = 0, b""
+
+    for chunk in Stream.readChunks(source, chunkSize):
+        y = pending + bytes(chunk)
+        if mode != 'ECB' and iv is None:
+            if len(y) < n:
+                pending = y
+                continue
+            iv, y = y[:n], y[n:]
+            previous = toBlocks(iv, n)
+
+        end = len(y) - len(y) % n
+        if mode != 'CTR' and end == len(y):
+            end -= n    # the last complete block may be the padded one
+        if end <= 0:
+            pending = y
+            continue
+        y, pending = y[:end], y[end:]
+
+        if mode == 'CTR':
+            yield __ctr(cipher, y, iv, offset, workers, threads)
+            offset += end // n
+            continue
+        blocks = toBlocks(y, n)
+        x = __parallel(cipher, blocks, True, workers, threads)
+        if mode == 'CBC':
+            x ^= np.concatenate( (previous, blocks[:-1]) )
+            previous = blocks[-1:]
+        yield fromBlocks(x, n)
+
+    if mode != 'ECB' and iv is None:
+        raise ValueError("cipher text is too short to contain the initialization vector")
+    if mode == 'CTR':
+        if pending:
+            yield __ctr(cipher, pending, iv, offset, 1, threads)
+        return
+
+    if len(pending) % n != 0:
+        raise ValueError("cipher text length must be a multiple of the block size")
+    blocks = toBlocks(pending, n)
+    x = __apply(cipher, blocks, True)
+    if mode == 'CBC' and len(blocks):
+        x ^= previous
+    yield unpad(fromBlocks(x, n), n)
+
+
+def __viewBlocks(data: np.ndarray, blockSize: int) -> np.ndarray:
+    # bytes of a mapping (a multiple of block size) as integer blocks, a view for the numpy integer sizes
+    dtype = BLOCK_DTYPES.get(blockSize)
+    if dtype is None:
+        return toBlocks(data.tobytes(), blockSize)
+    return np.asarray(data).view(dtype)
+
+
+def __writeBlocks(out: np.ndarray, blocks: np.ndarray, blockSize: int) -> None:
+    dtype = BLOCK_DTYPES.get(blockSize)
+    if dtype is None:
+        out[:] = np.frombuffer(fromBlocks(blocks, blockSize), dtype=np.uint8)
+    else:
+        out.view(dtype)[:] = blocks
+
+
+def __chunks(size: int, blockSize: int):
+    # (start, stop) byte ranges of FILE_CHUNK_BLOCKS blocks covering the first 'size' bytes
+    step = FILE_CHUNK_BLOCKS * blockSize
+    return ( (start, min(start + step, size)) for start in range(0, size, step) )
+
+
+def __ctrFile(cipher, x: np.ndarray, y: np.ndarray, iv: bytes, workers: int, threads: bool) -> None:
+    # y = x XOR keystream, one chunk of counter blocks at a time, the last incomplete block with a truncated keystream block
+    n = cipher.blockSize
+    full = len(x) - len(x) % n
+    for (start, stop) in __chunks(full, n):
+        keystream = __parallel(cipher, __counters(iv, (stop - start) // n, n, start // n), False, workers, threads)
+        __writeBlocks(y[start:stop], __viewBlocks(x[start:stop], n) ^ keystream, n)
+    if full < len(x):
+        y[full:] = np.frombuffer(__ctr(cipher, x[full:].tobytes(), iv, full // n, 1, threads), dtype=np.uint8)
+
+
+def encrypt_file(source: str, destination: str, cipher, mode: str = 'CBC', iv: bytes | None = None,
+                 workers: int = 1, threads: bool = False) -> int:
+    """Encrypts a whole file through memory-maps, without reading it into memory.
+    The cipher text file is the same as the output of encrypt() on the content of the file.
+
+    Args:
+        source (str): path of the message file
+        destination (str): path of the cipher text file, created at its final size
+        cipher: block cipher object, e.g., SPNCipher
+        mode (str, optional): one of 'ECB', 'CBC' and 'CTR'. Defaults to 'CBC'.
+        iv (bytes | None, optional): initialization vector (initial counter for CTR) of block size. Randomly generated if None.
+        workers (int, optional): number of workers to shard ECB and CTR encryption of every chunk across. Defaults to 1.
+        threads (bool, optional): use a thread pool instead of a process pool. Defaults to False.
+
+    Raises:
+        ValueError: Raises exception on unknown mode, block length not a multiple of 8 bits, invalid initialization vector length, or destination being the source file
+
+    Returns:
+        int: size of the cipher text file in bytes
+    """
+    mode = __checkMode(mode)
+    if MappedFile.sameFile(source, destination):
+        raise ValueError("destination is the source file, the cipher text cannot be written in place")
+    n = __checkCipher(cipher)
+    head = 0
+    if mode != 'ECB':
+        iv = os.urandom(n) if iv is None else bytes(iv)
+        if len(iv) != n:
+            raise ValueError("initialization vector must be of block size")
+        head = n
+
+    x = MappedFile.load(source)
+    size = len(x) if mode == 'CTR' else len(x) + n - len(x) % n
+    y = MappedFile.create(destination, head + size)
+    if head:
+        y[:head] = np.frombuffer(iv, dtype=np.uint8)
+
+    if mode == 'CTR':
+        __ctrFile(cipher, x, y[head:], iv, workers, threads)
+        MappedFile.flush(y)
+        return len(y)
+
+    full = len(x) - len(x) % n
+    previous = int.from_bytes(iv, 'big') if mode == 'CBC' else 0
+    for (start, stop) in __chunks(full, n):
+        blocks = __viewBlocks(x[start:stop], n)
+        if mode == 'CBC':
+            blocks = __cbcEncrypt(cipher, blocks, previous)
+            previous = int(blocks[-1])
+        else:
+            blocks = __parallel(cipher, blocks, False, workers, threads)
+        __writeBlocks(y[head + start : head + stop], blocks, n)
+
+    last = toBlocks(pad(x[full:].tobytes(), n), n)
+    last = __cbcEncrypt(cipher, last, previous) if mode == 'CBC' else __apply(cipher, last, False)
+    __writeBlocks(y[head + full:], last, n)
+    MappedFile.flush(y)
+    return len(y)
+
+
+def decrypt_file(source: str, destination: str, cipher, mode: str = 'CBC', workers: int = 1, threads: bool = False) -> int:
+    """Decrypts a whole file produced by encrypt_file() or encrypt() through memory-maps, without reading it into memory.
+
+    Args:
+        source (str): path of the cipher text file
+        destination (str): path of the message file, created at its final size
+        cipher: block cipher object, e.g., SPNCipher
+        mode (str, optional): one of 'ECB', 'CBC' and 'CTR'. Defaults to 'CBC'.
+        workers (int, optional): number of workers to shard the decryption of every chunk across. Defaults to 1.
+        threads (bool, optional): use a thread pool instead of a process pool. Defaults to False.
+
+    Raises:
+        ValueError: Raises exception on unknown mode, block length not a multiple of 8 bits, cipher text of invalid length, or destination being the source file
+        PaddingError: Raises exception when the message is not correctly padded (ECB, CBC), before the output file is created
+
+    Returns:
+        int: size of the message file in bytes
+    """
+    mode = __checkMode(mode)
+    if MappedFile.sameFile(source, destination):
+        raise ValueError("destination is the source file, the message cannot be written in place")
+    n = __checkCipher(cipher)
+    y = MappedFile.load(source)
+    head = 0 if mode == 'ECB' else n
+    if len(y) < head:
+        raise ValueError("cipher text is too short to contain the initialization vector")
+    iv, y = y[:head].tobytes(), y[head:]
+
+    if mode == 'CTR':
+        x = MappedFile.create(destination, len(y))
+        __ctrFile(cipher, y, x, iv, workers, threads)
+        MappedFile.flush(x)
+        return len(x)
+
+    if len(y) % n != 0:
+        raise ValueError("cipher text length must be a multiple of the block size")
+
+    # the last block is decrypted first, its padding gives the size of the message
+    full = len(y) - n
+    previous = toBlocks(iv, n) if full == 0 or mode == 'ECB' else __viewBlocks(y[full - n : full], n).astype(np.uint64)
+    last = __apply(cipher, toBlocks(y[full:].tobytes(), n), True)
+    if mode == 'CBC':
+        last ^= previous
+    last = unpad(fromBlocks(last, n), n)
+
+    x = MappedFile.create(destination, full + len(last))
+    previous = toBlocks(iv, n)
+    for (start, stop) in __chunks(full, n):
+        blocks = __viewBlocks(y[start:stop], n)
+        plain = __parallel(cipher, blocks, True, workers, threads)
+        if mode == 'CBC':
+            # p[i] = D(c[i]) XOR c[i-1]
+            plain ^= np.concatenate( (previous, blocks[:-1].astype(np.uint64)) )
+            previous = blocks[-1:].astype(np.uint64)
+        __writeBlocks(x[start:stop], plain, n)
+    x[full:] = np.frombuffer(last, dtype=np.uint8)
+
+    MappedFile.flush(x)
+    return len(x)
+
+
+def __main__():
+    from PrivateKey.SPN import SPNCipher
+
+    Ps = {
+        '0000': '1110', '0001': '0100', '0010': '1101', '0011': '0001',
+        '0100': '0010', '0101': '1111', '0110': '1011', '0111': '1000',
+        '1000': '0011', '1001': '1010', '1010': '0110', '1011': '1100',
+        '1100': '0101', '1101': '1001', '1110': '0000', '1111': '0111'
+    }
+    Pp = [0, 4, 8, 12, 1, 5, 9, 13, 2 ,6 ,10, 14, 3, 7, 11, 15]
+    k = '00111010100101001101011000111111'
+    cipher = SPNCipher(Ps, Pp, [k[0:16], k[4:20], k[8:24], k[12:28], k[16:32]])
+
+    message = b"Substitution-Permutation Network in modes of operation"
+    for mode in MODES:
+        y = encrypt(message, cipher, mode)
+        print(f"{mode}: {y.hex()}")
+        print(f"{mode}: {decrypt(y, cipher, mode)}")
+
+
+if __name__ == "__main__":
+    __main__()
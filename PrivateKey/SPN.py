@@ -8,6 +8,11 @@ Substituition - Permutation Network (SPN) Cipher.
 
 Contains function to perform SPN encryption
 '''
+from __future__ import annotations
+from array import array
+from PrivateKey import KeySchedule
+from Extras import Instrumentation, LazyImport
+np = LazyImport.module('numpy')
 
 # defining custom exception handling classes
 class SubstitutionBoxMappingError(Exception):
@@ -29,12 +34,318 @@ class SubstitutionBoxLengthError(Exception):
         super().__init__(*args)
         
 
-def __xor(s1: str, s2: str) -> str:
-    s = ""
-    for (i, j) in zip(s1, s2):
-        s += str((int(i) + int(j)) % 2)
+class SPNCipher:
+    """SPN cipher compiled for fixed boxes and round keys.
     
-    return s
+    - The boxes are validated, inverted and compiled into lookup tables only once, at construction.
+    - Each round of substitution followed by permutation is precomputed into M tables of size 2^L where,
+    T[j][a] is the permuted output of the round when the jth L-bit group of the input is 'a' and all others are 0.
+    As the permutation only moves bits around, P(S(u)) = T[0][u_0] | T[1][u_1] | ... | T[M-1][u_M-1].
+    - Decryption is performed with the same round function, using the tables of the inverse boxes.
+    As P^-1 is linear over XOR, P^-1(S^-1(u) XOR k) can be rewritten as P^-1(S^-1(u)) XOR P^-1(k).
+    So the round keys for decryption are reversed, and all except the first and the last one are permuted by P^-1.
+    - For bulk data, the same tables are used as numpy arrays to run each round on all the blocks at once.
+    """
+    __slots__ = ('L', 'M', 'N', 'blockLength', 'blockSize', '__lanes', '__mask',
+                 '__encT', '__encF', '__encK', '__decT', '__decF', '__decK', '__batch')
+    
+    # numpy dtype of the blocks when they are read from bytes, indexed by the block size in bytes
+    __dtypes = {1: '>u1', 2: '>u2', 4: '>u4', 8: '>u8'}
+    # messages with at least these many blocks are encrypted with the batched numpy rounds
+    BATCH_THRESHOLD = 64
+    
+    def __init__(self, Ps: dict[str, str], Pp: list[int], k: list[str]) -> None:
+        """
+        Args:
+            Ps (dict[str, str]): The Substitution Box of size 2^L consisting of all permutation of all L-bit long strings
+            Pp (list[int]): The Permutation Box of size L * M used to permute the bitstream
+            k (list[str]): N+1 round keys list
+
+        Raises:
+            SubstitutionBoxLengthError: Raises exception when Substitution-Box dimensions are not satisfied
+            SubstitutionBoxMappingError: Raises exception when Substitution-Box does not contain L-bit to L-bit mapping
+        """
+        L = len( list(Ps.keys())[0] )
+        
+        ########################################## performing input sanity checks ##########################################
+        for (key, val) in Ps.items():
+            if len(key) != L or len(val) != L:
+                raise SubstitutionBoxMappingError("Substitution-Box must map L-bit sequence to another L-bit sequence")
+        
+        if len(Ps) != 2**L:
+            raise SubstitutionBoxLengthError("Substitution-Box must contain mapping for all 2^L combinations")
+        ###################################### performing input sanity checks complete ######################################
+        
+        self.L, self.M, self.N = L, len(Pp) // L, len(k) - 1
+        self.blockLength = len(Pp)                      # block length in bits
+        self.blockSize = (len(Pp) + 7) // 8             # block length in bytes
+        self.__mask = 2**L - 1
+        # (shift, offset) of each L-bit group of the block and of its table in the flattened table arrays
+        self.__lanes = tuple( (len(Pp) - L * (j + 1), j << L) for j in range(self.M) )
+        
+        #################################### inverting Substitution and Permutation Boxes ###################################
+        S = [0] * 2**L
+        for (key, val) in Ps.items():
+            S[int(key, 2)] = int(val, 2)
+        S_inv = [0] * 2**L
+        for (a, b) in enumerate(S):
+            S_inv[b] = a
+            
+        Pp_inv = [0]*len(Pp)
+        for i in range(len(Pp)):
+            Pp_inv[Pp[i]] = i
+        #################################### inverting Substitution and Permutation Boxes ###################################
+        
+        kr = [int(key, 2) for key in k]
+        self.__encT, self.__encF = self.__tables(S, Pp)
+        self.__decT, self.__decF = self.__tables(S_inv, Pp_inv)
+        self.__encK = tuple(kr)
+        self.__decK = tuple( [kr[-1]] + [self.__permute(key, Pp_inv) for key in kr[-2:0:-1]] + [kr[0]] )
+        self.__batch = None     # numpy copies of the tables, built on first use of the batched rounds
+        
+    @staticmethod
+    def __permute(x: int, Pp: list[int]) -> int:
+        # bit i of the output (counted from the most significant bit) is bit Pp[i] of the input, same as w[i] = v[Pp[i]]
+        n = len(Pp)
+        w = 0
+        for i in range(n):
+            w |= ((x >> (n - 1 - Pp[i])) & 1) << (n - 1 - i)
+        return w
+    
+    def __tables(self, S: list[int], Pp: list[int]) -> tuple[array, array]:
+        # flattened tables T of the substitution-permutation rounds and F of the final substitution-only round
+        T, F = [], []
+        for (shift, _) in self.__lanes:
+            T += [self.__permute(S[a] << shift, Pp) for a in range(2**self.L)]
+            F += [S[a] << shift for a in range(2**self.L)]
+        
+        if self.blockLength > 64:
+            return T, F
+        typecode = 'H' if self.blockLength <= 16 else 'I' if self.blockLength <= 32 else 'Q'
+        return array(typecode, T), array(typecode, F)
+    
+    def __rounds(self, x: int, T: array, F: array, k: tuple[int]) -> int:
+        # N-1 rounds of key addition followed by combined substitution-permutation, then last substitution and key addition
+        lanes, mask = self.__lanes, self.__mask
+        
+        w = x
+        for r in range(len(k) - 2):
+            u = w ^ k[r]
+            w = 0
+            for (shift, offset) in lanes:
+                w |= T[offset + ((u >> shift) & mask)]
+        
+        u = w ^ k[-2]
+        v = 0
+        for (shift, offset) in lanes:
+            v |= F[offset + ((u >> shift) & mask)]
+            
+        return v ^ k[-1]
+    
+    def __batchTables(self) -> tuple:
+        if self.blockLength > 64:
+            raise ValueError("batched SPN rounds support block lengths of at most 64 bits")
+        if self.__batch is None:
+            # neighbouring L-bit groups are merged into lanes of up to 16 bits, so that a round needs fewer lookups.
+            # table of a merged lane holds the OR of the tables of its groups for every combination of their inputs.
+            group = max(1, 16 // self.L)
+            lanes = [ list(range(j, min(j + group, self.M))) for j in range(0, self.M, group) ]
+            
+            def merge(table: array) -> list[np.ndarray]:
+                merged = []
+                for lane in lanes:
+                    values = np.zeros(1, dtype=np.uint64)
+                    for j in lane:
+                        part = np.array(table[j << self.L : (j + 1) << self.L], dtype=np.uint64)
+                        values = (values[:, None] | part[None, :]).ravel()
+                    merged.append(values)
+                return merged
+            
+            shifts = [ (np.uint64(self.__lanes[lane[-1]][0]), np.uint64(2**(self.L * len(lane)) - 1)) for lane in lanes ]
+            self.__batch = (shifts,
+                            (merge(self.__encT), merge(self.__encF), np.array(self.__encK, dtype=np.uint64)),
+                            (merge(self.__decT), merge(self.__decF), np.array(self.__decK, dtype=np.uint64)))
+        return self.__batch
+    
+    def __batchRounds(self, x: np.ndarray, decrypt: bool) -> np.ndarray:
+        # same rounds as __rounds(), each operation applied on all the blocks simultaneously
+        shifts, encryption, decryption = self.__batchTables()
+        T, F, k = decryption if decrypt else encryption
+        
+        w = np.asarray(x).astype(np.uint64)
+        for r in range(len(k) - 2):
+            u = w ^ k[r]
+            w = np.zeros_like(u)
+            for (table, (shift, mask)) in zip(T, shifts):
+                w |= table.take( ((u >> shift) & mask).astype(np.intp) )
+        
+        u = w ^ k[-2]
+        v = np.zeros_like(u)
+        for (table, (shift, mask)) in zip(F, shifts):
+            v |= table.take( ((u >> shift) & mask).astype(np.intp) )
+            
+        return v ^ k[-1]
+    
+    def encrypt_batch(self, x: np.ndarray) -> np.ndarray:
+        """Encrypts an array of L * M bit long blocks, with L * M <= 64, processing all the blocks in each round at once.
+
+        Args:
+            x (np.ndarray): array of integer blocks
+
+        Raises:
+            ValueError: Raises exception when block length is more than 64 bits
+
+        Returns:
+            np.ndarray: uint64 array of encrypted blocks
+        """
+        return self.__batchRounds(x, False)
+    
+    def decrypt_batch(self, y: np.ndarray) -> np.ndarray:
+        """Decrypts an array of L * M bit long blocks, with L * M <= 64, processing all the blocks in each round at once.
+
+        Args:
+            y (np.ndarray): array of integer blocks
+
+        Raises:
+            ValueError: Raises exception when block length is more than 64 bits
+
+        Returns:
+            np.ndarray: uint64 array of decrypted blocks
+        """
+        return self.__batchRounds(y, True)
+    
+    def encrypt_block(self, x: int) -> int:
+        """Encrypts a single L * M bit long block given as integer"""
+        return self.__rounds(x, self.__encT, self.__encF, self.__encK)
+    
+    def decrypt_block(self, y: int) -> int:
+        """Decrypts a single L * M bit long block given as integer"""
+        return self.__rounds(y, self.__decT, self.__decF, self.__decK)
+    
+    def encrypt(self, x: str | bytes) -> str | bytes:
+        """Encrypts a bit-stream string or a byte string.
+        If length is not a multiple of block length, message is padded with 0s at beginning.
+
+        Args:
+            x (str | bytes): The message to be encoded. Bytes can only be encoded if L * M is a multiple of 8.
+
+        Raises:
+            ValueError: Raises exception when bytes are given and L * M is not a multiple of 8
+
+        Returns:
+            str | bytes: encrypted message of the same type as x
+        """
+        if isinstance(x, str):
+            x = "0" * (-len(x) % self.blockLength) + x
+            return self.__bits(x, self.encrypt_block)
+        
+        x = bytes(-len(x) % self.blockSize) + bytes(x)
+        return self.__bytes(x, False)
+    
+    def decrypt(self, y: str | bytes) -> str | bytes:
+        """Decrypts a bit-stream string or a byte string.
+        Any incomplete block at the end of a bit-stream is ignored.
+
+        Args:
+            y (str | bytes): The message to be decoded. Bytes can only be decoded if L * M is a multiple of 8.
+
+        Raises:
+            ValueError: Raises exception when bytes are given and L * M is not a multiple of 8, or y is not made of complete blocks
+
+        Returns:
+            str | bytes: decrypted message of the same type as y
+        """
+        if isinstance(y, str):
+            return self.__bits(y[: len(y) - len(y) % self.blockLength], self.decrypt_block)
+        
+        if len(y) % self.blockSize != 0:
+            raise ValueError("SPN encrypted message length must be a multiple of the block length")
+        return self.__bytes(bytes(y), True)
+    
+    def __bits(self, x: str, block) -> str:
+        n = self.blockLength
+        return ''.join( format(block(int(x[i : i + n], 2)), f"0{n}b") for i in range(0, len(x), n) )
+    
+    def __bytes(self, x: bytes, decrypt: bool) -> bytes:
+        if self.blockLength % 8 != 0:
+            raise ValueError("SPN block length L * M must be a multiple of 8 to work on bytes")
+        n = self.blockSize
+        
+        with Instrumentation.call('SPNCipher.decrypt' if decrypt else 'SPNCipher.encrypt', len(x)) as call:
+            dtype = self.__dtypes.get(n)
+            if dtype is not None and len(x) >= n * self.BATCH_THRESHOLD:
+                with call.stage('normalize'):
+                    blocks = np.frombuffer(x, dtype=dtype)
+                with call.stage('transform'):
+                    blocks = self.__batchRounds(blocks, decrypt)
+                with call.stage('output'):
+                    return blocks.astype(dtype).tobytes()
+            
+            with call.stage('transform'):
+                block = self.decrypt_block if decrypt else self.encrypt_block
+                return b''.join( block(int.from_bytes(x[i : i + n], 'big')).to_bytes(n, 'big') for i in range(0, len(x), n) )
+
+
+def getKeySchedule(seedKey: str, N: int, blockLength: int = 16, shift: int = 4) -> list[str] | None:
+    """Generates the N+1 round keys from the seed key. Round key r is made of the blockLength bits of the seed key
+    starting at bit r * shift. The round keys are cached per seed key.
+
+    Args:
+        seedKey (str): seed key bit sequence, at least N * shift + blockLength bits long
+        N (int): number of rounds
+        blockLength (int, optional): length of the round keys, i.e., L * M. Defaults to 16.
+        shift (int, optional): offset between consecutive round keys in the seed key. Defaults to 4.
+
+    Returns:
+        list[str]: returns the list of round keys, None if the seed key is too short
+    """
+    if len(seedKey) < N * shift + blockLength:
+        return None
+    
+    expand = lambda key: tuple( seedKey[r*shift : r*shift + blockLength] for r in range(N + 1) )
+    return list( KeySchedule.CACHES['SPN'].get((seedKey, N, blockLength, shift), expand) )
+
+
+def encryptBytes(x: bytes, Ps: dict[str, str], Pp: list[int], k: list[str]) -> bytes:
+    """Performs SPN encryption on a byte string. Block length L * M must be a multiple of 8.
+
+    Args:
+        x (bytes): The message to be encoded. If length is not a multiple of block length, message is padded with 0s at beginning.
+        Ps (dict[str, str]): The Substitution Box of size 2^L consisting of all permutation of all L-bit long strings
+        Pp (list[int]): The Permutation Box of size L * M used to permute the bitstream
+        k (list[str]): N+1 round keys list
+
+    Raises:
+        ValueError: Raises exception when the block length is not a multiple of 8 bits
+
+    Returns:
+        bytes: returns encrypted bytes on successful encryption.
+    """
+    with Instrumentation.call('SPN.encryptBytes', len(x)) as call:
+        with call.stage('key setup'):
+            cipher = SPNCipher(Ps, Pp, k)
+        return cipher.encrypt(bytes(x))
+
+
+def decryptBytes(y: bytes, Ps: dict[str, str], Pp: list[int], k: list[str]) -> bytes:
+    """Performs SPN decryption on a byte string. Block length L * M must be a multiple of 8.
+
+    Args:
+        y (bytes): The encrypted message, its length must be a multiple of the block length.
+        Ps (dict[str, str]): The Substitution Box used for encryption
+        Pp (list[int]): The Permutation Box used for encryption
+        k (list[str]): N+1 round keys list used for encryption
+
+    Raises:
+        ValueError: Raises exception when the block length is not a multiple of 8 bits, or y is not made of complete blocks
+
+    Returns:
+        bytes: returns decrypted bytes on successful decryption.
+    """
+    with Instrumentation.call('SPN.decryptBytes', len(y)) as call:
+        with call.stage('key setup'):
+            cipher = SPNCipher(Ps, Pp, k)
+        return cipher.decrypt(bytes(y))
 
 
 def encrypt(x: str, Ps: dict, Pp: list[int], k: list[str]):
@@ -53,49 +364,11 @@ def encrypt(x: str, Ps: dict, Pp: list[int], k: list[str]):
     Returns:
         _type_: returns encrypted bitstream on successful encryption.
     """
-    L = len( list(Ps.keys())[0] )
-    M = len(Pp) // L
-    
-    ########################################## performing input sanity checks ##########################################
-    for (key, val) in Ps.items():
-        if len(key) != L or len(val) != L:
-            raise SubstitutionBoxMappingError("Substitution-Box must map L-bit sequence to another L-bit sequence")
-    
-    if len(Ps) != 2**L:
-        raise SubstitutionBoxLengthError("Substitution-Box must contain mapping for all 2^L combinations")
-    
-    unitLength = M*L
-    while len(x) % unitLength != 0:
-        x = "0" + x
-        
-    ###################################### performing input sanity checks complete ######################################
-    
-    
-    # Round keys K^1, K^2, ..., K^(N+1) equivalently K[0], K[1], ..., k[N]
-    N = len(k) - 1
-    
-    w_vec = []  # breaking message x in chunks of length L * M
-    for i in range(len(x)//unitLength):
-        w_vec.append( x[i*unitLength : i*unitLength + unitLength] )
-        
-    y_vec = []
-    
-    # performing SPN operation for each chunk of length L * M
-    for w in w_vec:
-        for r in range(N):  # performing N Substitution Permutation Rounds
-            u = __xor(w, k[r])  # u^r = w^r-1 XOR k^r
-            v = ""
-
-            for i in range(M):
-                v += Ps[ u[i*L: i*L + L] ]  # performing M substitution operations
-            
-            w = ""  # calculating w^r = Pp(v^r)
-            for i in range(L*M):
-                w += v[Pp[i]]
-
-        y_vec.append( __xor(v, k[N]) )  # cipher text y = v^N XOR K^(N+1) = v^N XOR K[N]
-        
-    return ''.join(y_vec)
+    with Instrumentation.call('SPN.encrypt', len(x)) as call:
+        with call.stage('key setup'):
+            cipher = SPNCipher(Ps, Pp, k)
+        with call.stage('transform'):
+            return cipher.encrypt(x)
 
 
 def decrypt(y: str, Ps: dict[str, str], Pp: list[int], k: list[str]):
@@ -116,62 +389,11 @@ def decrypt(y: str, Ps: dict[str, str], Pp: list[int], k: list[str]):
     Returns:
         _type_: returns encrypted bitstream on successful encryption.
     """
-    L = len( list(Ps.keys())[0] )
-    M = len(Pp) // L
-    
-    ########################################## performing input sanity checks ##########################################
-    for (key, val) in Ps.items():
-        if len(key) != L or len(val) != L:
-            raise SubstitutionBoxMappingError("Substitution-Box must map L-bit sequence to another L-bit sequence")
-    
-    if len(Ps) != 2**L:
-        raise SubstitutionBoxLengthError("Substitution-Box must contain mapping for all 2^L combinations")
-    
-    # while len(y) % unitLength != 0:
-    #     y = "0" + y
-        
-    ###################################### performing input sanity checks complete ######################################
-    
-    #################################### inverting Substitution and Permutation Boxes ###################################
-    Ps_inv = {v:kk for (kk,v) in Ps.items()}
-    Pp_inv = [0]*len(Pp)
-    for i in range(len(Pp)):
-        Pp_inv[Pp[i]] = i
-    #################################### inverting Substitution and Permutation Boxes ###################################
-
-    #TODO: decryption code here
-    N = len(k) - 1
-    unitLength = M*L
-    
-    y_vec = [ y[i*unitLength : i*unitLength + unitLength] for i in range(len(y)//unitLength) ]
-    x_vec = []
-    
-    for y in y_vec:
-        # Nth round roll-back
-        # y = v^N XOR k[N]
-        v = __xor(y, k[N])
-              
-        u = "" # declaring u global for the next 2 for-loops
-        for i in range(M):
-            u += Ps_inv[ v[i*L : i*L + L] ]
-        
-        # running 0 to N-1 rounds in reverse
-        w = ""
-        for r in range(N-1, -1, -1):
-            # w(r-1) = ur XOR kr
-            w = __xor(u, k[r])  # inverting key addition
-            v = ""
-            
-            for i in range(L*M):
-                v += w[Pp_inv[i]] # inverting permutation 
-            
-            u = ""
-            for i in range(M): # inverting substitution
-                u += Ps_inv[ v[i*L : i*L + L] ]
-        
-        x_vec.append(w)
-    
-    return ''.join(x_vec)
+    with Instrumentation.call('SPN.decrypt', len(y)) as call:
+        with call.stage('key setup'):
+            cipher = SPNCipher(Ps, Pp, k)
+        with call.stage('transform'):
+            return cipher.decrypt(y)
 
 
 def __main__():
@@ -189,7 +411,7 @@ def __main__():
     # 32 bit seed key -> 3A94D63F
     k = '00111010100101001101011000111111'
     # 16-bit round keys generated by taking 16 bits from seed key shifted by 4 bits
-    kr = [k[0:16], k[4:20], k[8:24], k[12:28], k[16:32]] 
+    kr = getKeySchedule(k, N=4, blockLength=16, shift=4)
     
     # plain text --> 26B7
     x = '0010011010110111'
@@ -202,8 +424,17 @@ def __main__():
     print("x  :",x)
     print("y* :",y_expected)
     print("y  :",y)
+    assert y == y_expected, f"SPN: E(26B7) is {y}, expected {y_expected}"
     x_decrypted = decrypt(y, Ps, Pp, kr)
-    print(x_decrypted == x)
+    assert x_decrypted == x, f"SPN: D(BCD6) is {x_decrypted}, expected {x}"
+    
+    # compiling the boxes and round keys once to encrypt many messages, bit-identical to encrypt()
+    cipher = SPNCipher(Ps, Pp, kr)
+    assert cipher.encrypt_block(0x26B7) == 0xBCD6 and cipher.decrypt_block(0xBCD6) == 0x26B7, "SPN: SPNCipher block"
+    assert cipher.decrypt(cipher.encrypt(bytes.fromhex("26B7"))) == bytes.fromhex("26B7"), "SPN: SPNCipher bytes"
+    assert (cipher.encrypt_batch(np.array([0x26B7] * 4)) == 0xBCD6).all(), "SPN: SPNCipher.encrypt_batch"
+    assert (cipher.decrypt_batch(np.array([0xBCD6])) == 0x26B7).all(), "SPN: SPNCipher.decrypt_batch"
+    print("SPN: 26B7 -> BCD6 test vector passed")
     
 
 if __name__ == "__main__":
@@ -0,0 +1,22 @@
+'''
+Private key block ciphers (SPN, DES), their key schedules and the modes of operation.
+
+IMP points:
+
+- submodules are imported on first use, e.g., PrivateKey.DES imports PrivateKey/DES.py when accessed, and
+numpy is only loaded once a cipher needs it.
+- the ciphers are also registered by name in Extras.Registry.
+'''
+import importlib
+
+__all__ = ['DES', 'KeySchedule', 'Modes', 'SPN']
+
+
+def __getattr__(name: str):
+    if name in __all__:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
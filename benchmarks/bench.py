@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+'''
+Measures the throughput and the per-call latency of every cipher, and of the matrix inversion over Z26.
+
+IMP points:
+
+- every case is timed over a range of input sizes. Calls are repeated until both a minimum number of calls and a
+minimum total time are reached, and the latency of every single call is recorded.
+- reported per case and size: number of calls, p50 and p99 latency (seconds), and throughput (MB/s) at p50 latency.
+- results are written as JSON, along with the python / numpy versions and the machine they were measured on.
+Two result files can be compared with compare.py to detect regressions.
+
+usage:
+    python benchmarks/bench.py --output results.json
+    python benchmarks/bench.py --quick --cases Hill SPN
+'''
+import argparse, json, platform, sys, time
+from datetime import datetime, timezone
+import numpy as np
+import cases
+
+# input sizes in bytes, from a single short message up to 100 MB
+SIZES = [16, 1 << 10, 1 << 16, 1 << 20, 16 << 20, 100 << 20]
+QUICK_SIZES = [16, 1 << 10, 1 << 16]
+
+# matrix dimensions for the matrix inversion cases
+DIMENSIONS = [2, 3, 4, 6, 8, 12, 16]
+
+MIN_CALLS = 5
+MAX_CALLS = 10000
+MIN_TIME = 0.25     # seconds
+
+
+def measure(function, minCalls: int = MIN_CALLS, maxCalls: int = MAX_CALLS, minTime: float = MIN_TIME) -> np.ndarray:
+    """Calls the function repeatedly, returning the latency of each call in seconds.
+    One untimed call is made first to warm up caches (key schedules, translation tables, ...).
+
+    Args:
+        function (Callable): function taking no arguments
+        minCalls (int, optional): minimum number of timed calls. Defaults to MIN_CALLS.
+        maxCalls (int, optional): maximum number of timed calls. Defaults to MAX_CALLS.
+        minTime (float, optional): calls continue until this much time (seconds) is spent. Defaults to MIN_TIME.
+
+    Returns:
+        np.ndarray: latency of each timed call
+    """
+    function()
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < maxCalls and (len(latencies) < minCalls or time.perf_counter() - start < minTime):
+        begin = time.perf_counter()
+        function()
+        latencies.append(time.perf_counter() - begin)
+    return np.array(latencies)
+
+
+def summarize(name: str, size: int, latencies: np.ndarray, unit: str = 'bytes') -> dict:
+    """Summary of the latencies of a case at the given size, as stored in the JSON results"""
+    p50, p99 = np.percentile(latencies, [50, 99])
+    result = {'case': name, unit: size, 'calls': len(latencies), 'p50': float(p50), 'p99': float(p99)}
+    if unit == 'bytes':
+        result['MBps'] = size / p50 / 1e6 if p50 > 0 else float('inf')
+    return result
+
+
+def run(selected: list[str] | None = None, sizes: list[int] = SIZES, dimensions: list[int] = DIMENSIONS,
+        minCalls: int = MIN_CALLS, minTime: float = MIN_TIME, log=sys.stderr) -> dict:
+    """Runs every case whose name contains any of the selected strings (all cases if None)
+
+    Returns:
+        dict: 'environment' describing the machine and versions, and 'results' with one summary per case and size
+    """
+    def isSelected(name: str) -> bool:
+        return selected is None or any(s.lower() in name.lower() for s in selected)
+
+    results = []
+    for (registry, values, unit) in ((cases.cipherCases(), sizes, 'bytes'), (cases.matrixCases(), dimensions, 'dimension')):
+        for (name, setup) in registry.items():
+            if not isSelected(name):
+                continue
+            for value in values:
+                result = summarize(name, value, measure(setup(value), minCalls, minTime=minTime), unit)
+                results.append(result)
+                if log is not None:
+                    throughput = f"{result['MBps']:10.2f} MB/s" if 'MBps' in result else ""
+                    print(f"{name:36s} {unit} {value:>10d}  p50 {result['p50'] * 1e6:12.1f} us  "
+                          f"p99 {result['p99'] * 1e6:12.1f} us {throughput}", file=log)
+
+    environment = {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'system': platform.platform(),
+    }
+    return {'environment': environment, 'results': results}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="cipher throughput and latency benchmarks")
+    parser.add_argument('--output', '-o', help="file to write the JSON results to, printed if not given")
+    parser.add_argument('--cases', nargs='*', help="only run the cases whose name contains any of these strings")
+    parser.add_argument('--sizes', nargs='*', type=int, help="input sizes in bytes")
+    parser.add_argument('--dimensions', nargs='*', type=int, help="matrix dimensions of the matrix inversion cases")
+    parser.add_argument('--quick', action='store_true', help=f"only the sizes {QUICK_SIZES}")
+    parser.add_argument('--min-calls', type=int, default=MIN_CALLS, help="minimum number of calls per case and size")
+    parser.add_argument('--min-time', type=float, default=MIN_TIME, help="minimum time (seconds) per case and size")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else SIZES)
+    report = run(args.cases, sizes, args.dimensions or DIMENSIONS, args.min_calls, args.min_time)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
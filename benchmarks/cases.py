@@ -0,0 +1,124 @@
+'''
+Benchmark cases for every cipher in Classical/ and PrivateKey/, and for the Extras.MatrixInverse module.
+
+IMP points:
+
+- a case is a name along with a setup function. setup(size) prepares the input of 'size' bytes (and the key,
+the cipher text for decryption, ...) outside of the timed region, and returns the function to be timed.
+- classical ciphers get random lower case letters, private key ciphers get random bytes of a multiple of the block size.
+- matrix inversion cases take the dimension of the matrix in place of the size.
+'''
+import math, os, sys
+from typing import Callable
+import numpy as np
+
+__root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if __root not in sys.path:
+    sys.path.insert(0, __root)
+
+from Classical import ShiftCipher, AffineCipher, AutoKeyCipher, HillCipher, AffineHillCipher
+from PrivateKey import SPN, DES, Modes
+from Extras import MatrixInverse
+
+# the random inputs are the same on every run so that the results are comparable
+__rng = np.random.default_rng(2023)
+
+HILL_KEY = [[3, 21, 20], [4, 15, 23], [6, 14, 5]]
+AFFINE_HILL_KEY = ([[3, 6, 4], [5, 15, 18], [17, 8, 5]], [8, 13, 1])
+
+SPN_SBOX = {
+    '0000': '1110', '0001': '0100', '0010': '1101', '0011': '0001',
+    '0100': '0010', '0101': '1111', '0110': '1011', '0111': '1000',
+    '1000': '0011', '1001': '1010', '1010': '0110', '1011': '1100',
+    '1100': '0101', '1101': '1001', '1110': '0000', '1111': '0111'
+}
+SPN_PBOX = [0, 4, 8, 12, 1, 5, 9, 13, 2, 6, 10, 14, 3, 7, 11, 15]
+SPN_KEY = '00111010100101001101011000111111'
+DES_KEY = bytes.fromhex('133457799BBCDFF1')
+
+
+def letters(size: int) -> str:
+    """Random lower case text of 'size' letters"""
+    return (__rng.integers(0, 26, size, dtype=np.uint8) + 97).tobytes().decode('ascii')
+
+
+def randomBytes(size: int, blockSize: int = 1) -> bytes:
+    """Random bytes, 'size' rounded up to a multiple of the block size"""
+    return __rng.integers(0, 256, -(-size // blockSize) * blockSize, dtype=np.uint8).tobytes()
+
+
+def spnCipher() -> SPN.SPNCipher:
+    return SPN.SPNCipher(SPN_SBOX, SPN_PBOX, SPN.getKeySchedule(SPN_KEY, N=4))
+
+
+def __classical(encrypt, decrypt):
+    # returns the setups timing encryption of plain text and decryption of the corresponding cipher text
+    def encryptSetup(size: int):
+        text = letters(size)
+        return lambda: encrypt(text)
+
+    def decryptSetup(size: int):
+        cipher = encrypt(letters(size))
+        return lambda: decrypt(cipher)
+
+    return encryptSetup, decryptSetup
+
+
+def __blockCipher(cipher, encrypt, decrypt):
+    # same as __classical, for ciphers working on bytes
+    def encryptSetup(size: int):
+        x = randomBytes(size, cipher.blockSize)
+        return lambda: encrypt(x)
+
+    def decryptSetup(size: int):
+        y = encrypt(randomBytes(size, cipher.blockSize))
+        return lambda: decrypt(y)
+
+    return encryptSetup, decryptSetup
+
+
+def __inverse(dimension: int):
+    # random matrix which is invertible over Z26
+    while True:
+        matrix = __rng.integers(0, 26, (dimension, dimension)).tolist()
+        if math.gcd(MatrixInverse.determinant(matrix), 26) == 1:
+            return lambda: MatrixInverse.inverse(matrix)
+
+
+def __inverseBatch(dimension: int, count: int = 4096):
+    matrices = __rng.integers(0, 26, (count, dimension, dimension))
+    return lambda: MatrixInverse.inverseBatch(matrices)
+
+
+def cipherCases() -> dict[str, Callable]:
+    """Benchmark cases of the ciphers, timed over input sizes in bytes. Maps the case name to its setup function."""
+    hillKey = HillCipher.HillKey(HILL_KEY)
+    affineHillKey = AffineHillCipher.AffineHillKey(*AFFINE_HILL_KEY)
+    spn = spnCipher()
+    des = DES.DESCipher(DES_KEY)
+
+    ciphers = {
+        'ShiftCipher': __classical(lambda x: ShiftCipher.encrypt(x, 7), lambda y: ShiftCipher.decrypt(y, 7)),
+        'AffineCipher': __classical(lambda x: AffineCipher.encrypt(x, 5, 8), lambda y: AffineCipher.decrypt(y, 5, 8)),
+        'AutoKeyCipher': __classical(lambda x: AutoKeyCipher.encrypt(x, 13), lambda y: AutoKeyCipher.decrypt(y, 13)),
+        'HillCipher': __classical(hillKey.encrypt, hillKey.decrypt),
+        'AffineHillCipher': __classical(affineHillKey.encrypt, affineHillKey.decrypt),
+        'SPN': __blockCipher(spn, spn.encrypt, spn.decrypt),
+        'SPN-CBC': __blockCipher(spn, lambda x: Modes.encrypt(x, spn, 'CBC', iv=bytes(2)), lambda y: Modes.decrypt(y, spn, 'CBC')),
+        'SPN-CTR': __blockCipher(spn, lambda x: Modes.encrypt(x, spn, 'CTR', iv=bytes(2)), lambda y: Modes.decrypt(y, spn, 'CTR')),
+        'DES': __blockCipher(des, des.encrypt, des.decrypt),
+    }
+
+    cases = {}
+    for (name, (encryptSetup, decryptSetup)) in ciphers.items():
+        cases[f"{name}.encrypt"] = encryptSetup
+        cases[f"{name}.decrypt"] = decryptSetup
+    return cases
+
+
+def matrixCases() -> dict[str, Callable]:
+    """Benchmark cases of the matrix inversion over Z26, timed over matrix dimensions. Maps the case name to its setup function."""
+    return {
+        'MatrixInverse.inverse': __inverse,
+        'MatrixInverse.inverseBatch[4096]': __inverseBatch,
+    }
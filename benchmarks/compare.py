@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+'''
+Compares two benchmark result files produced by bench.py.
+
+IMP points:
+
+- results are matched by case name and size (or matrix dimension). Cases present in only one file are listed separately.
+- the ratio is new p50 latency / old p50 latency, so a ratio above 1 means the new run is slower.
+- a case is a regression when its ratio exceeds 1 + threshold. The exit status is 1 if any regression is found,
+so that the comparison can gate a deployment.
+
+usage:
+    python benchmarks/compare.py baseline.json results.json --threshold 0.10
+'''
+import argparse, json, sys
+
+# relative slow down of the p50 latency tolerated before a case is reported as a regression
+DEFAULT_THRESHOLD = 0.10
+
+
+def __key(result: dict) -> tuple:
+    return (result['case'], result.get('bytes', result.get('dimension')))
+
+
+def compare(old: dict, new: dict, threshold: float = DEFAULT_THRESHOLD) -> dict:
+    """Matches the results of the two reports and computes the p50 latency ratio of each case
+
+    Args:
+        old (dict): baseline report as written by bench.py
+        new (dict): report to be checked against the baseline
+        threshold (float, optional): relative slow down tolerated. Defaults to DEFAULT_THRESHOLD.
+
+    Returns:
+        dict: 'rows' with (case, size, old p50, new p50, ratio) tuples, 'regressions' holding the rows slower
+        than the threshold, and 'missing' / 'added' with the cases present in only one of the reports
+    """
+    old_results = {__key(r): r for r in old['results']}
+    new_results = {__key(r): r for r in new['results']}
+
+    rows = []
+    for key in old_results.keys() & new_results.keys():
+        before, after = old_results[key]['p50'], new_results[key]['p50']
+        rows.append( (*key, before, after, after / before if before > 0 else float('inf')) )
+    rows.sort(key=lambda row: (row[0], row[1]))
+
+    return {
+        'rows': rows,
+        'regressions': [row for row in rows if row[4] > 1 + threshold],
+        'missing': sorted(old_results.keys() - new_results.keys()),
+        'added': sorted(new_results.keys() - old_results.keys()),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="compare two benchmark result files")
+    parser.add_argument('old', help="baseline results")
+    parser.add_argument('new', help="results to be checked")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="relative p50 latency increase reported as regression")
+    args = parser.parse_args(argv)
+
+    with open(args.old) as file:
+        old = json.load(file)
+    with open(args.new) as file:
+        new = json.load(file)
+    report = compare(old, new, args.threshold)
+
+    for (case, size, before, after, ratio) in report['rows']:
+        flag = "REGRESSION" if ratio > 1 + args.threshold else ""
+        print(f"{case:36s} {size:>10d}  {before * 1e6:12.1f} us -> {after * 1e6:12.1f} us  x{ratio:6.2f}  {flag}")
+    for (case, size) in report['missing']:
+        print(f"{case:36s} {size:>10d}  missing in {args.new}")
+    for (case, size) in report['added']:
+        print(f"{case:36s} {size:>10d}  not in {args.old}")
+
+    print(f"\n{len(report['regressions'])} regression(s) out of {len(report['rows'])} compared case(s)")
+    return 1 if report['regressions'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
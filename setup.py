@@ -1,2 +1,2 @@
 from setuptools import setup, find_packages
-setup(name='Extras', packages=find_packages())
\ No newline at end of file
+setup(name='Ciphers', packages=find_packages(include=['Classical', 'PrivateKey', 'Extras']), entry_points={'console_scripts': ['ciphers = Extras.CLI:main']})